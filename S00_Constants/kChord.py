@@ -0,0 +1,44 @@
+"""
+kChord.py
+
+Constants and tables for what a grid cell plays: its single note, a chord built on it, or that chord
+strummed or arpeggiated.
+
+A play mode is named by a chord, optionally followed by a pattern: 'Major' plays a block chord on
+the cell's note, 'Major Strum' rolls it upward a few milliseconds per note, and 'Major Up',
+'Major Down' and 'Major UpDown' arpeggiate it at a tempo while the cell is held. 'Note' is the
+plain single note. The tables are generated at import, so resolving a cell's play mode is one
+dictionary lookup.
+
+Constants:
+    - PLAY_NOTE: The play mode of a plain single-note cell.
+    - PATTERN_CHORD, PATTERN_STRUM, PATTERN_UP, PATTERN_DOWN, PATTERN_UPDOWN: Pattern names.
+    - PATTERNS: The pattern names, PATTERN_CHORD first.
+
+Tables:
+    - CHORD_INTERVALS: A dictionary mapping chord names to semitone intervals above the root.
+    - PLAY_NAMES: A tuple of every play mode name, PLAY_NOTE first.
+    - PLAY_MODES: A dictionary mapping play mode names to (intervals, pattern).
+"""
+from sys import intern
+
+PLAY_NOTE = 'Note'
+
+PATTERN_CHORD, PATTERN_STRUM, PATTERN_UP, PATTERN_DOWN, PATTERN_UPDOWN = 'Chord', 'Strum', 'Up', 'Down', 'UpDown'
+PATTERNS = (PATTERN_CHORD, PATTERN_STRUM, PATTERN_UP, PATTERN_DOWN, PATTERN_UPDOWN)
+
+# Semitones above the root, lowest first
+CHORD_INTERVALS = {
+    'Major': (0, 4, 7),      'Minor': (0, 3, 7),      'Dim':    (0, 3, 6),      'Aug':   (0, 4, 8),
+    'Sus2':  (0, 2, 7),      'Sus4':  (0, 5, 7),      'Maj7':   (0, 4, 7, 11),  'Min7':  (0, 3, 7, 10),
+    'Dom7':  (0, 4, 7, 10),  'Dim7':  (0, 3, 6, 9),   'Power':  (0, 7, 12),     'Octave': (0, 12),
+}
+
+# Play mode name -> (intervals, pattern); a block chord is named by the chord alone
+PLAY_MODES = {PLAY_NOTE: ((0,), PATTERN_CHORD)}
+for _sChord, _vIntervals in CHORD_INTERVALS.items():
+    for _sPattern in PATTERNS:
+        PLAY_MODES[intern(_sChord if _sPattern == PATTERN_CHORD else f'{_sChord} {_sPattern}')] = (_vIntervals, _sPattern)
+
+# Tuple of play mode names, in dialog order
+PLAY_NAMES = tuple(PLAY_MODES)
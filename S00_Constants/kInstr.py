@@ -1,8 +1,9 @@
 """
 kInstr.py
 
-This module defines constants and dictionaries for MIDI instrument numbers and names.
-It provides mappings between instrument names and their corresponding MIDI numbers, and vice versa.
+This module defines constants and tables for MIDI instrument numbers and names, covering all 128
+General MIDI programs. It provides mappings between instrument names and their corresponding MIDI
+numbers, and vice versa.
 
 Constants:
     - ACCORDION: The MIDI number for the accordion.
@@ -10,10 +11,12 @@ Constants:
     - BRIGHT_PIANO: The MIDI number for the bright piano.
     - (Additional constants...)
 
-Dictionaries:
+Tables:
+    - INSTR_NAMES: A tuple of 128 instrument names, indexed by program number.
     - INSTR_NUMS: A dictionary mapping instrument names to their MIDI numbers.
-    - INSTR_NAMES: A dictionary mapping MIDI numbers to instrument names.
 """
+from sys import intern
+
 # Constants for instrument numbers
 ACCORDION             =  21;  BANDONEON            =  23;  BRIGHT_PIANO         =   1;  CELESTA               =   8
 CHORUSED_PIANO        =   5;  CLAVINET             =   7;  DULCIMER             =  15;  ELECTRIC_PIANO        =   2
@@ -46,9 +49,9 @@ SHANAI                = 111;  TINKLE_BELL          = 112;  AGOGO
 WOOD_BLOCK            = 115;  TAIKO_DRUM           = 116;  MELODIC_TOM          = 117;  SYNTH_DRUM            = 118
 REVERSE_CYMBAL        = 119;  GUITAR_FRET_NOISE    = 120;  BREATH_NOISE         = 121;  SEASHORE              = 122
 BIRD_TWEET            = 123;  TELEPHONE_RING       = 124;  HELICOPTER           = 125;  APPLAUSE              = 126
-GUN_SHOT              = 127
+GUN_SHOT              = 127;  MARIMBA              =  12;  CHOIR_AAHS           =  52;  VOICE_OOHS            =  53
 
-INSTR_NAMES = {
+_INSTR_NAMES = {
     ACCORDION:             'Accordion',           BANDONEON:          'Bandoneon',
     BRIGHT_PIANO:          'Bright Piano',        CELESTA:            'Celesta',
     CHORUSED_PIANO:        'Chorused Piano',      CLAVINET:           'Clavinet',
@@ -111,7 +114,13 @@ INSTR_NAMES = {
     BREATH_NOISE:          'Breath Noise',        SEASHORE:           'Seashore',
     BIRD_TWEET:            'Bird Tweet',          TELEPHONE_RING:     'Telephone Ring',
     HELICOPTER:            'Helicopter',          APPLAUSE:           'Applause',
-    GUN_SHOT:              'Gun Shot'
+    GUN_SHOT:              'Gun Shot',            MARIMBA:            'Marimba',
+    CHOIR_AAHS:            'Choir Aahs',          VOICE_OOHS:         'Voice Oohs'
 }
+assert sorted(_INSTR_NAMES) == list(range(128)), 'ERR: kInstr: Not every General MIDI program is named.'
+
+# Tuple mapping numbers to instrument names
+INSTR_NAMES = tuple(intern(_INSTR_NAMES[n]) for n in range(128))
 
-INSTR_NUMS = {v: k for k, v in INSTR_NAMES.items()}
+# Dictionary mapping instrument names to numbers
+INSTR_NUMS = {sName: nInstr for nInstr, sName in enumerate(INSTR_NAMES)}
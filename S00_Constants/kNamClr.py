@@ -11,9 +11,17 @@ Constants:
     - (Additional constants...)
 
 Dictionaries:
-    - COLOR_NAMES: A dictionary mapping color names to their RGB values.
-    - COLOR_RGBS: A dictionary mapping RGB values to color names.
+    - COLOR_NAMES: A dictionary mapping RGB values to color names.
+    - COLOR_RGBS: A dictionary mapping color names to RGB values.
+    - COLOR_HEX: A dictionary mapping color names to '#rrggbb' strings.
+    - COLOR_TEXT: A dictionary mapping color names to the contrasting text color ('#FFFFFF' or '#000000').
+
+Tuples:
+    - COLOR_LIST: The color names, sorted.
 """
+from sys import intern
+from ClrUtils import get_contrastive_text_color, GetHexStr
+
 # RGB color constants
 RED,    GREEN,     BLUE,     YELLOW   = (255,   0,   0), (  0, 255,   0), (  0,   0, 255), (255, 255,   0)
 ORANGE, PURPLE,    CYAN,     MAGENTA  = (255, 165,   0), (128,   0, 128), (  0, 255, 255), (255,   0, 255)
@@ -36,4 +44,9 @@ COLOR_NAMES = {
     SALMON: 'Salmon', KHAKI: 'Khaki',         IVORY:    'Ivory',    SCARLET:  'Scarlet'
 }
 # Dictionary mapping color names to RGB triplets
-COLOR_RGBS = {v: k for k, v in COLOR_NAMES.items()}
+COLOR_RGBS = {intern(v): k for k, v in COLOR_NAMES.items()}
+
+# Computed once here instead of on every button update
+COLOR_HEX = {sName: intern(GetHexStr(rgb)) for sName, rgb in COLOR_RGBS.items()}
+COLOR_TEXT = {sName: intern(get_contrastive_text_color(rgb)) for sName, rgb in COLOR_RGBS.items()}
+COLOR_LIST = tuple(sorted(COLOR_RGBS))
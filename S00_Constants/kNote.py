@@ -1,16 +1,23 @@
 """
 kNote.py
 
-Constants for musical note numbers and dictionaries for mapping between note names and their MIDI numbers.
+Constants for musical note numbers and tables for mapping between note names and their MIDI numbers.
+
+The tables cover all 128 MIDI notes and are generated at import. Notes 51-89, the range the grids lay
+out, keep their register names (Bass_, Middle_, Treble_, High_ plus the pitch class). Notes below and
+above that range are named Low_ and Top_ plus the pitch class and its octave (Middle_C is C4).
 
 Constants:
     - Bass_D_SHARP_E_FLAT: The MIDI number for the note D#/Eb in the bass octave.
     - (Additional constants...)
+    - GRID_LOW, GRID_HIGH: The first and last note laid out by the grids.
+    - PITCH_CLASSES: The twelve pitch class names, C first.
 
-Dictionaries:
+Tables:
+    - NOTE_NAMES: A tuple of 128 note names, indexed by MIDI number.
     - NOTE_NUMS: A dictionary mapping note names to their MIDI numbers.
-    - NOTE_NAMES: A dictionary mapping MIDI numbers to note names.
 """
+from sys import intern
 
 # Constants for note numbers
 Bass_D_SHARP_E_FLAT   = 51; Bass_E                 = 52; Bass_F                = 53; Bass_F_SHARP_G_FLAT   = 54
@@ -24,22 +31,27 @@ High_G                = 79; High_G_SHARP_A_FLAT   = 80; High_A                 =
 High_B                = 83; High_C                = 84; High_C_SHARP_D_FLAT    = 85; High_D                = 86
 High_D_SHARP_E_FLAT   = 87; High_E                = 88; High_F                 = 89
 
+GRID_LOW, GRID_HIGH = Bass_D_SHARP_E_FLAT, High_F
+
+PITCH_CLASSES = ('C', 'C♯/D♭', 'D', 'D♯/E♭', 'E', 'F', 'F♯/G♭', 'G', 'G♯/A♭', 'A', 'A♯/B♭', 'B')
+
+# First note of each register in the grid range
+_REGISTERS = ((High_F_SHARP_G_FLAT, 'High'), (Treble_F_SHARP_G_FLAT, 'Treble'), (Middle_G, 'Middle'),
+              (Bass_D_SHARP_E_FLAT, 'Bass'))
+
+
+def _NoteName(nNote: int) -> str:
+    sClass = PITCH_CLASSES[nNote % 12]
+    if nNote < GRID_LOW:
+        return f'Low_{sClass}{nNote // 12 - 1}'
+    if nNote > GRID_HIGH:
+        return f'Top_{sClass}{nNote // 12 - 1}'
+    return next(f'{sRegister}_{sClass}' for nFirst, sRegister in _REGISTERS if nNote >= nFirst)
+
+
+# Tuple mapping numbers to note names
+NOTE_NAMES = tuple(intern(_NoteName(n)) for n in range(128))
+
 # Dictionary mapping note names to numbers
-NOTE_NUMS = {
-    'Bass_D♯/E♭':   Bass_D_SHARP_E_FLAT,   'Bass_E':       Bass_E,                'Bass_F':       Bass_F,
-    'Bass_F♯/G♭':   Bass_F_SHARP_G_FLAT,   'Middle_G':     Middle_G,              'Middle_G♯/A♭': Middle_G_SHARP_A_FLAT,
-    'Middle_A':     Middle_A,              'Middle_A♯/B♭': Middle_A_SHARP_B_FLAT, 'Middle_♭':     Middle_B,
-    'Middle_C':     Middle_C,              'Middle_C♯/D♭': Middle_C_SHARP_D_FLAT, 'Middle_D':     Middle_D,
-    'Middle_D♯/E♭': Middle_D_SHARP_E_FLAT, 'Middle_E':     Middle_E,              'Middle_F':     Middle_F,
-    'Treble_F♯/G♭': Treble_F_SHARP_G_FLAT, 'Treble_G':     Treble_G,              'Treble_G♯/A♭': Treble_G_SHARP_A_FLAT,
-    'Treble_A':     Treble_A,              'Treble_A♯/B♭': Treble_A_SHARP_B_FLAT, 'Treble_♭':     Treble_B,
-    'Treble_C':     Treble_C,              'Treble_C♯/D♭': Treble_C_SHARP_D_FLAT, 'Treble_D':     Treble_D,
-    'Treble_D♯/E♭': Treble_D_SHARP_E_FLAT, 'Treble_E':     Treble_E,              'Treble_F':     Treble_F,
-    'High_F♯/G♭':   High_F_SHARP_G_FLAT,   'High_G':       High_G,                'High_G♯/A♭':   High_G_SHARP_A_FLAT,
-    'High_A':       High_A,                'High_A♯/B♭':   High_A_SHARP_B_FLAT,   'High_♭':       High_B,
-    'High_C':       High_C,                'High_C♯/D♭':   High_C_SHARP_D_FLAT,   'High_D':       High_D,
-    'High_D♯/E♭':   High_D_SHARP_E_FLAT,   'High_E':       High_E,                'High_F':       High_F
-}
-
-# Dictionary mapping numbers to note names
-NOTE_NAMES = {value: key for key, value in NOTE_NUMS.items()}
+NOTE_NUMS = {sName: nNote for nNote, sName in enumerate(NOTE_NAMES)}
+assert len(NOTE_NUMS) == 128, 'ERR: kNote: Note names are not unique.'
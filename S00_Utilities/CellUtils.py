@@ -0,0 +1,120 @@
+"""
+CellUtils.py: Validated lookups of grid cell (color, instrument, note, play mode) names.
+
+The constant tables (kInstr, kNote, kNamClr, kChord) are checked once, when this module is imported. After
+that a cell's names are resolved with plain dictionary lookups into a tCellRec that carries
+everything a button or painted cell needs, and resolved records are memoized, so reassigning a cell
+to a combination seen before costs one cache lookup.
+
+The play mode is optional and defaults to kChord.PLAY_NOTE, the cell's single note. Any other mode
+is resolved to the tuple of notes it plays (the chord's intervals above the cell's note, up to note
+127) and its pattern, so playing a chord cell needs no arithmetic.
+
+Functions:
+- ValidateTables(): Checks the constant tables; run at import.
+- ResolveCell(sNamClr, sInstr, sNote, sPlay=PLAY_NOTE) -> tCellRec: Resolves valid names; asserts on an unknown one.
+- CellErrors(sNamClr, sInstr, sNote, sPlay=PLAY_NOTE) -> list: Describes every unknown name of one cell.
+- ValidateCells(vCells, nCols=0) -> list: Describes every bad cell of a layout, instead of stopping at the first.
+
+Example:
+    rec = ResolveCell('Red', 'Accordion', 'Middle_C')
+    oPlayer.On(rec.nProgram, rec.nNote)
+"""
+from functools import lru_cache
+from typing import List, NamedTuple, Sequence
+from ClrUtils import get_contrastive_text_color, GetHexStr
+from kInstr import INSTR_NAMES, INSTR_NUMS
+from kNote import NOTE_NAMES, NOTE_NUMS
+from kNamClr import COLOR_RGBS, COLOR_HEX, COLOR_TEXT
+from kChord import PLAY_NOTE, PLAY_MODES, PATTERNS
+
+
+class tCellRec(NamedTuple):
+    """A resolved cell: the names it was given plus program, note, hex and text colors, notes played, pattern and label."""
+    sNamClr: str
+    sInstr: str
+    sNote: str
+    sPlay: str
+    nProgram: int
+    nNote: int
+    sHex: str
+    sText: str
+    vNotes: tuple
+    sPattern: str
+    sLabel: str
+
+
+def ValidateTables() -> None:
+    """Assert that every constant table is complete and consistent."""
+    for sTable, vNames, dNums in (('kInstr', INSTR_NAMES, INSTR_NUMS), ('kNote', NOTE_NAMES, NOTE_NUMS)):
+        assert len(vNames) == 128, f'ERR: {sTable}: {len(vNames)} names, not 128.'
+        assert all(dNums.get(sName) == n for n, sName in enumerate(vNames)), f'ERR: {sTable}: Names and numbers disagree.'
+    for sName, rgb in COLOR_RGBS.items():
+        assert isinstance(rgb, tuple) and len(rgb) == 3 and all(isinstance(x, int) and 0 <= x <= 255 for x in rgb), \
+            f'ERR: kNamClr: Value {rgb} for key "{sName}" is not a valid RGB tuple.'
+        assert COLOR_HEX.get(sName) == GetHexStr(rgb) and COLOR_TEXT.get(sName) == get_contrastive_text_color(rgb), \
+            f'ERR: kNamClr: Derived colors of "{sName}" are stale.'
+    for sName, (vIntervals, sPattern) in PLAY_MODES.items():
+        assert vIntervals and vIntervals[0] == 0 and list(vIntervals) == sorted(set(vIntervals)) and sPattern in PATTERNS, \
+            f'ERR: kChord: Play mode "{sName}" is not a root-first chord with a known pattern.'
+
+
+ValidateTables()
+
+
+@lru_cache(maxsize=4096)
+def ResolveCell(sNamClr: str, sInstr: str, sNote: str, sPlay: str = PLAY_NOTE) -> tCellRec:
+    """Return the tCellRec of a cell; assert if a name is unknown (use CellErrors() for untrusted input)."""
+    nProgram, nNote, sHex = INSTR_NUMS.get(sInstr), NOTE_NUMS.get(sNote), COLOR_HEX.get(sNamClr)
+    tMode = PLAY_MODES.get(sPlay)
+    if nProgram is None or nNote is None or sHex is None or tMode is None:
+        assert False, 'ERR: ' + '; '.join(CellErrors(sNamClr, sInstr, sNote, sPlay))
+    vIntervals, sPattern = tMode
+    vNotes = tuple(nNote + nInterval for nInterval in vIntervals if nNote + nInterval < 128)
+    sLabel = f'{sInstr}\n{sNote}' if sPlay == PLAY_NOTE else f'{sInstr}\n{sNote}\n{sPlay}'
+    return tCellRec(sNamClr, sInstr, sNote, sPlay, nProgram, nNote, sHex, COLOR_TEXT[sNamClr], vNotes, sPattern, sLabel)
+
+
+def CellErrors(sNamClr: str, sInstr: str, sNote: str, sPlay: str = PLAY_NOTE) -> List[str]:
+    """Return a message for each unknown name of one cell, empty if the cell is valid."""
+    vErrors = []
+    if sNamClr not in COLOR_HEX:
+        vErrors.append(f'Color: "{sNamClr}" not found.')
+    if sInstr not in INSTR_NUMS:
+        vErrors.append(f'Instrument: "{sInstr}" not found.')
+    if sNote not in NOTE_NUMS:
+        vErrors.append(f'Note: "{sNote}" not found.')
+    if sPlay not in PLAY_MODES:
+        vErrors.append(f'Play: "{sPlay}" not found.')
+    return vErrors
+
+
+def ValidateCells(vCells: Sequence[Sequence[str]], nCols: int = 0) -> List[str]:
+    """
+    Return a message for every unknown name in a layout of (color, instrument, note[, play]) cells, in
+    row-major order; empty if every cell is valid. With nCols the messages give row and column, else the index.
+    """
+    vErrors = []
+    for index, cell in enumerate(vCells):
+        sWhere = f'Cell ({index // nCols}, {index % nCols})' if nCols else f'Cell {index}'
+        if len(cell) not in (3, 4):
+            vErrors.append(f'{sWhere}: Expected (color, instrument, note[, play]), got {tuple(cell)}.')
+            continue
+        vErrors.extend(f'{sWhere}: {sError}' for sError in CellErrors(*cell))
+    return vErrors
+
+
+if __name__ == "__main__":
+    rec = ResolveCell('Red', 'Accordion', 'Middle_C')
+    assert (rec.nProgram, rec.nNote, rec.sHex, rec.sText) == (21, 60, '#ff0000', '#FFFFFF')
+    assert ResolveCell('Red', 'Accordion', 'Middle_C') is rec and rec.vNotes == (60,)
+    assert ResolveCell('Red', 'Accordion', 'High_F', 'Dom7 Up')[-3:-1] == ((89, 93, 96, 99), 'Up')
+    assert ResolveCell('Red', 'Accordion', 'Top_G9', 'Octave').vNotes == (127,)  # Clipped to the MIDI range
+    vErrors = ValidateCells([('Red', 'Accordion', 'Middle_C'), ('Redd', 'Accordion', 'Middle_♭'), ('Red',),
+                             ('Red', 'Accordion', 'Middle_C', 'Major Sideways')], 2)
+    assert len(vErrors) == 4 and vErrors[0].startswith('Cell (0, 1): Color'), vErrors
+    try:
+        ResolveCell('Red', 'Kazoo', 'Middle_C')
+    except AssertionError as e:
+        assert str(e) == 'ERR: Instrument: "Kazoo" not found.'
+    print('\n'.join(vErrors))
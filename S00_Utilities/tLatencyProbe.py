@@ -0,0 +1,194 @@
+"""
+tLatencyProbe.py: Per-stage latency instrumentation.
+
+Records how long things take (a font fit, a button update, a grid resize pass) and how long it takes
+from an input event to the moment its MIDI bytes are handed to pygame.midi. Every sample goes into a
+bounded per-stage ring of milliseconds; percentiles are only computed when someone asks.
+
+Instrumentation is off unless PROBE.bEnabled is set. Disabled, a Timed() function costs one attribute
+check and Begin()/End() call sites are guarded by the same check, so the hot paths stay as they were.
+
+Startup milestones (time to first frame, time to first note) are recorded once each, relative to
+the moment this module was imported, whether or not the probe is enabled.
+
+Classes:
+- tStageStats: Bounded ring of latency samples for one stage, with percentiles and a histogram.
+- tLatencyProbe: Named stages, interval timing (Begin/End) and the Timed decorator.
+
+Objects:
+- PROBE: The shared tLatencyProbe instance.
+
+Example:
+    PROBE.bEnabled = True
+    ...
+    print(PROBE.Report())
+"""
+from array import array
+from functools import wraps
+from math import ceil
+from time import perf_counter
+from typing import Dict
+
+
+class tStageStats:
+    """Keeps the most recent SIZE samples (ms) of one stage plus running count and max."""
+    SIZE = 4096
+
+    def __init__(self, nSize: int = SIZE) -> None:
+        self.nSize = nSize
+        self._vSamples = array('d', bytes(8 * nSize))
+        self.nCount = 0
+        self.fMax = 0.0
+
+    def Add(self, fMs: float) -> None:
+        self._vSamples[self.nCount % self.nSize] = fMs
+        self.nCount += 1
+        if fMs > self.fMax:
+            self.fMax = fMs
+
+    def _Sorted(self) -> list:
+        return sorted(self._vSamples[:min(self.nCount, self.nSize)])
+
+    @staticmethod
+    def _Rank(vSorted: list, fPct: float) -> float:
+        # Nearest-rank percentile of an already sorted list
+        if not vSorted:
+            return 0.0
+        return vSorted[max(0, min(len(vSorted), ceil(fPct / 100 * len(vSorted))) - 1)]
+
+    def Percentile(self, fPct: float) -> float:
+        """Return the fPct percentile (0-100) of the kept samples."""
+        return self._Rank(self._Sorted(), fPct)
+
+    def Histogram(self) -> Dict[float, int]:
+        """Return {bucket upper bound ms: count} over power-of-two buckets from 1/64 ms up."""
+        dBuckets: Dict[float, int] = {}
+        for fMs in self._vSamples[:min(self.nCount, self.nSize)]:
+            fBound = 1 / 64
+            while fMs > fBound:
+                fBound *= 2
+            dBuckets[fBound] = dBuckets.get(fBound, 0) + 1
+        return dict(sorted(dBuckets.items()))
+
+    def Summary(self) -> dict:
+        """Return count, p50, p99 and max in ms."""
+        vSorted = self._Sorted()
+        return {'count': self.nCount, 'p50': self._Rank(vSorted, 50),
+                'p99': self._Rank(vSorted, 99), 'max': self.fMax}
+
+
+class tLatencyProbe:
+    """
+    Named latency stages.
+
+    Attributes:
+        bEnabled (bool): Master switch; nothing is recorded while False.
+        dStages (dict): Stage name -> tStageStats.
+        fStart (float): Reference time of the startup milestones.
+        bPrintMilestones (bool): Print each milestone when it is reached.
+    """
+    INPUT_TO_MIDI = 'input->midi'  # Stage from an input event to the bytes reaching pygame.midi
+
+    def __init__(self) -> None:
+        self.bEnabled = False
+        self.dStages: Dict[str, tStageStats] = {}
+        self._dBegun: Dict[str, float] = {}
+        self.fStart = perf_counter()
+        self.bPrintMilestones = False
+        self._dMilestones: Dict[str, float] = {}
+
+    @staticmethod
+    def Now() -> float:
+        """Return a monotonic timestamp in seconds."""
+        return perf_counter()
+
+    def Record(self, sStage: str, fMs: float) -> None:
+        """Add one sample (ms) to a stage."""
+        oStats = self.dStages.get(sStage)
+        if oStats is None:
+            oStats = self.dStages[sStage] = tStageStats()
+        oStats.Add(fMs)
+
+    def Begin(self, sStage: str) -> None:
+        """Stamp the start of an interval; the next End() of the same stage closes it."""
+        self._dBegun[sStage] = perf_counter()
+
+    def End(self, sStage: str) -> None:
+        """Close the interval opened by Begin(); ignored if none is open."""
+        fStart = self._dBegun.pop(sStage, None)
+        if fStart is not None:
+            self.Record(sStage, (perf_counter() - fStart) * 1000)
+
+    def MarkStart(self, fStart: float = None) -> None:
+        """Set the reference time of the startup milestones (default: now)."""
+        self.fStart = perf_counter() if fStart is None else fStart
+
+    def Milestone(self, sName: str) -> None:
+        """Record the first time sName is reached, in ms since fStart; later calls are ignored."""
+        if sName not in self._dMilestones:
+            fMs = self._dMilestones[sName] = (perf_counter() - self.fStart) * 1000
+            if self.bPrintMilestones:
+                print(f'Startup: {sName} after {fMs:.1f} ms')
+
+    def Milestones(self) -> Dict[str, float]:
+        """Return {milestone: ms since fStart}."""
+        return dict(self._dMilestones)
+
+    def Timed(self, sStage: str = None):
+        """Decorator recording each call's duration under sStage (default: the function name)."""
+        def Decorate(fn):
+            sName = sStage or fn.__name__
+            @wraps(fn)
+            def Wrapper(*args, **kwargs):
+                if not self.bEnabled:
+                    return fn(*args, **kwargs)
+                fStart = perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.Record(sName, (perf_counter() - fStart) * 1000)
+            return Wrapper
+        return Decorate
+
+    def Stats(self) -> Dict[str, dict]:
+        """Return {stage: {'count', 'p50', 'p99', 'max'}} for every stage with samples."""
+        return {sStage: oStats.Summary() for sStage, oStats in self.dStages.items()}
+
+    def Report(self) -> str:
+        """Return the stage summaries, then the startup milestones, as aligned text lines."""
+        vLines = [f'{"stage":<16}{"count":>8}{"p50 ms":>10}{"p99 ms":>10}{"max ms":>10}']
+        for sStage, d in sorted(self.Stats().items()):
+            vLines.append(f'{sStage:<16}{d["count"]:>8}{d["p50"]:>10.3f}{d["p99"]:>10.3f}{d["max"]:>10.3f}')
+        for sName, fMs in sorted(self._dMilestones.items(), key=lambda x: x[1]):
+            vLines.append(f'{sName:<24}{fMs:>10.1f} ms after start')
+        return '\n'.join(vLines)
+
+    def Reset(self) -> None:
+        """Drop every sample and open interval."""
+        self.dStages.clear()
+        self._dBegun.clear()
+
+
+PROBE = tLatencyProbe()  # Shared by every instrumented module
+
+if __name__ == "__main__":
+    oProbe = tLatencyProbe()
+    @oProbe.Timed('work')
+    def Work(n):
+        return sum(range(n))
+    Work(1000)
+    assert not oProbe.dStages  # Disabled: nothing recorded
+    oProbe.bEnabled = True
+    for n in range(1, 101):
+        oProbe.Record('fixed', float(n))
+        Work(1000)
+    oProbe.Milestone('first')
+    oProbe.Milestone('first')
+    assert list(oProbe.Milestones()) == ['first']
+    oProbe.Begin('gap')
+    oProbe.End('gap')
+    d = oProbe.Stats()
+    assert d['fixed']['p50'] == 50.0 and d['fixed']['p99'] == 99.0 and d['fixed']['max'] == 100.0
+    assert d['work']['count'] == 100 and d['gap']['count'] == 1
+    assert sum(oProbe.dStages['fixed'].Histogram().values()) == 100
+    print(oProbe.Report())
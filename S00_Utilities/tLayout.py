@@ -0,0 +1,124 @@
+"""
+tLayout.py: Grid layouts and their file format.
+
+A layout is a number of rows and columns plus, per cell in row-major order, a color, an instrument,
+a note name and a play mode (kChord: 'Note', a chord such as 'Major', or a pattern such as 'Minor Up').
+Layout files are JSON; the play mode may be left out and is only written when it is not 'Note':
+
+    {"rows": 2, "cols": 2,
+     "cells": [["Red", "Accordion", "Middle_C"], ["Blue", "Accordion", "Middle_D", "Major"],
+               ["Green", "Banjo", "Middle_E"], ["Gold", "Banjo", "Middle_F", "Min7 Up"]]}
+
+A tLayout is validated once, when it is created or loaded: every bad cell is reported in one assertion,
+and the cells are resolved (CellUtils.ResolveCell) up front, so applying the layout to a grid needs no
+further checks. Diff() lists the cells in which two layouts of the same shape differ; the grids use
+it, against the cells they currently show, to touch only those cells when switching presets.
+
+Classes:
+- tLayout: Rows, columns and (color, instrument, note, play) cells.
+
+Example:
+    oLayout = tLayout.Load('set1.json')
+    oGrid.ApplyLayout(oLayout)
+"""
+from json import dump, load
+from typing import List, Sequence
+from CellUtils import ResolveCell, ValidateCells
+from kNote import NOTE_NAMES, GRID_LOW, GRID_HIGH
+from kNamClr import COLOR_LIST
+from kChord import PLAY_NOTE
+
+
+class tLayout:
+    """
+    Attributes:
+        nRows (int): Number of rows.
+        nCols (int): Number of columns.
+        vCells (tuple): Per cell, row-major, a (color, instrument, note, play) tuple of names.
+        vRecs (tuple): Per cell, the resolved CellUtils.tCellRec.
+    """
+    def __init__(self, nRows: int, nCols: int, vCells: Sequence[Sequence[str]]) -> None:
+        assert nRows > 0 and nCols > 0, f'ERR: tLayout: {nRows}x{nCols} layout is empty.'
+        assert len(vCells) == nRows * nCols, f'ERR: tLayout: {len(vCells)} cells for {nRows}x{nCols}.'
+        vErrors = ValidateCells(vCells, nCols)
+        assert not vErrors, 'ERR: tLayout:\n' + '\n'.join(vErrors)
+        self.nRows, self.nCols = nRows, nCols
+        self.vCells = tuple(tuple(cell) if len(cell) == 4 else (*cell, PLAY_NOTE) for cell in vCells)
+        self.vRecs = tuple(ResolveCell(*cell) for cell in self.vCells)
+
+    @classmethod
+    def Default(cls, nRows: int, nCols: int, sInstr: str = 'Accordion') -> 'tLayout':
+        """Return the built-in layout: notes upward from GRID_LOW, colors in sorted order, one instrument."""
+        vNotes = NOTE_NAMES[GRID_LOW:GRID_HIGH + 1]
+        return cls(nRows, nCols, [(COLOR_LIST[i % len(COLOR_LIST)], sInstr, vNotes[i % len(vNotes)])
+                                  for i in range(nRows * nCols)])
+
+    @classmethod
+    def FromDict(cls, d: dict) -> 'tLayout':
+        """Return the layout described by a parsed layout file."""
+        for sKey in ('rows', 'cols', 'cells'):
+            assert sKey in d, f'ERR: tLayout: "{sKey}" missing.'
+        return cls(int(d['rows']), int(d['cols']), d['cells'])
+
+    @staticmethod
+    def _FileCell(cell) -> list:
+        # _FileCell(): A cell as written to a file; a plain note cell keeps the three-name form.
+        return list(cell[:3]) if cell[3] == PLAY_NOTE else list(cell)
+
+    def ToDict(self) -> dict:
+        return {'rows': self.nRows, 'cols': self.nCols, 'cells': [self._FileCell(cell) for cell in self.vCells]}
+
+    @classmethod
+    def Load(cls, sPath: str) -> 'tLayout':
+        """Read and validate a layout file."""
+        with open(sPath, encoding='utf-8') as f:
+            return cls.FromDict(load(f))
+
+    def Save(self, sPath: str) -> None:
+        """Write the layout file, one cell per line."""
+        with open(sPath, 'w', encoding='utf-8') as f:
+            f.write(f'{{"rows": {self.nRows}, "cols": {self.nCols},\n "cells": [\n')
+            for index, cell in enumerate(self.vCells):
+                f.write('  ')
+                dump(self._FileCell(cell), f, ensure_ascii=False)
+                f.write(',\n' if index < len(self.vCells) - 1 else '\n')
+            f.write(']}\n')
+
+    def SameShape(self, other: 'tLayout') -> bool:
+        return other is not None and (self.nRows, self.nCols) == (other.nRows, other.nCols)
+
+    def Diff(self, other) -> List[int]:
+        """
+        Return the indices of the cells that differ from other: a tLayout of the same shape, or the
+        (color, instrument, note, play) cells a grid currently shows.
+        """
+        vOther = other.vCells if isinstance(other, tLayout) else other
+        assert len(vOther) == len(self.vCells), 'ERR: tLayout: Diff() of layouts with different shapes.'
+        return [i for i, (a, b) in enumerate(zip(self.vCells, vOther)) if a != tuple(b)]
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, tLayout) and self.SameShape(other) and self.vCells == other.vCells
+
+    def __len__(self) -> int:
+        return len(self.vCells)
+
+
+if __name__ == "__main__":
+    from os import path
+    from tempfile import gettempdir
+    oA = tLayout.Default(8, 16)
+    sPath = path.join(gettempdir(), 'tLayout.json')
+    oA.Save(sPath)
+    assert tLayout.Load(sPath) == oA
+    vCells = list(oA.vCells)
+    vCells[5] = ('Red', 'Banjo', 'Middle_C')
+    vCells[6] = vCells[6][:3] + ('Major Strum',)
+    oB = tLayout(8, 16, vCells)
+    assert oB.Diff(oA) == [5, 6] and oB.vRecs[5].nProgram == 105 and len(oB.vRecs[6].vNotes) == 3
+    oB.Save(sPath)
+    assert tLayout.Load(sPath) == oB and len(oB.ToDict()['cells'][5]) == 3
+    try:
+        tLayout(1, 2, [('Redd', 'Accordion', 'Middle_C'), ('Red', 'Kazoo', 'Middle_♭')])
+    except AssertionError as e:
+        assert str(e).count('not found') == 3
+        print(e)
@@ -0,0 +1,159 @@
+# tCellVoice.py: Cell Voice Class
+"""
+tCellVoice.py
+
+Plays what one press of a grid cell plays, from Start() (the press) to Stop() (the release): a single
+note, a chord, a strummed chord or an arpeggio (see kChord for the patterns).
+
+A chord is one tMidiPlayer.ChordOn(): every note goes out in one Write() with one timestamp. A strum
+is the same single write, but each note carries its own timestamp STRUM_MS after the one before, so
+the driver rolls the chord and nothing waits. An arpeggio plays one note per step at fBpm, nPerBeat
+steps to the beat, for as long as the cell is held. Its steps run on the player's tMidiScheduler:
+each step schedules its note and then the next step (tMidiScheduler.CallAt()), on the scheduler's
+worker thread, so the GUI thread only starts and stops it. The worker dispatches under the player's
+oLock, so its notes never land in a batch the GUI thread has open, and other cells pressed meanwhile
+keep the player's note tracking consistent. Stop() ends the pattern; the note already sounding plays
+out its gate.
+
+Classes:
+    tCellVoice -- One held cell: note, chord, strum or arpeggio.
+
+Usage:
+    >>> oVoice = tCellVoice(oPlayer, rec.nProgram, rec.vNotes, rec.sPattern)
+    >>> oVoice.Start()      # On press
+    >>> oVoice.Stop()       # On release
+"""
+from kChord import PATTERN_CHORD, PATTERN_STRUM, PATTERN_DOWN, PATTERN_UPDOWN, PATTERNS
+
+
+class tCellVoice:
+    """
+    tCellVoice starts and stops the notes of one cell press.
+
+    Attributes:
+        STRUM_MS (float): Time between the notes of a strum.
+        BPM (float): Default arpeggio tempo, in beats per minute.
+        PER_BEAT (int): Default arpeggio steps per beat (4: sixteenth notes).
+        GATE (float): Share of a step an arpeggio note sounds.
+        oPlayer (tMidiPlayer): The player notes are sent through.
+        instrument (int): The program played.
+        vNotes (tuple): The notes, lowest first.
+        sPattern (str): One of kChord.PATTERNS.
+        vOrder (tuple): For an arpeggio, the notes in the order they are stepped through.
+        fStep (float): For an arpeggio, the step length in ms.
+        bPlaying (bool): Between Start() and Stop().
+        nSteps (int): Number of arpeggio steps played.
+
+    Methods:
+        Start(timestamp=None): Plays the cell; the pattern runs until Stop().
+        Stop(timestamp=None): Turns off the cell's notes, or ends its pattern.
+    """
+    STRUM_MS = 20.0
+    BPM = 120.0
+    PER_BEAT = 4
+    GATE = 0.8
+
+    def __init__(self, oPlayer, instrument: int, vNotes: tuple, sPattern: str = PATTERN_CHORD, volume: int = 127,
+                 fBpm: float = None, nPerBeat: int = None) -> None:
+        # __init__(): vNotes and sPattern as resolved by CellUtils.ResolveCell(); fBpm and nPerBeat default to the class tempo.
+        assert vNotes and sPattern in PATTERNS, f'ERR: tCellVoice: Nothing to play in {vNotes}, pattern "{sPattern}".'
+        self.oPlayer, self.instrument, self.vNotes, self.sPattern, self.volume = oPlayer, instrument, vNotes, sPattern, volume
+        if sPattern == PATTERN_DOWN:
+            self.vOrder = vNotes[::-1]
+        elif sPattern == PATTERN_UPDOWN:
+            self.vOrder = vNotes + vNotes[-2:0:-1]  # Top and bottom once per cycle
+        else:
+            self.vOrder = vNotes
+        self.fStep = 60000.0 / ((fBpm or self.BPM) * (nPerBeat or self.PER_BEAT))
+        self.bPlaying = False
+        self.nSteps = 0
+        self._fLastOn = None  # Strum: timestamp of its last note on
+
+    def Start(self, timestamp: float = None) -> None:
+        # Start(): A chord (or single note) now, a strum's notes at staggered timestamps, or the first arpeggio step.
+        assert not self.bPlaying, 'ERR: tCellVoice: Start() while playing.'
+        self.bPlaying = True
+        oPlayer, sPattern = self.oPlayer, self.sPattern
+        if sPattern == PATTERN_CHORD or len(self.vNotes) == 1:
+            oPlayer.ChordOn(self.instrument, self.vNotes, self.volume, timestamp)
+        elif sPattern == PATTERN_STRUM:
+            fTime = oPlayer.output.Time() if timestamp is None else timestamp
+            self._fLastOn = fTime + self.STRUM_MS * (len(self.vNotes) - 1)
+            oPlayer.ChordOn(self.instrument, self.vNotes, self.volume, fTime, self.STRUM_MS)
+        else:
+            oScheduler = oPlayer.Scheduler()
+            self._Step(oScheduler.Now() if timestamp is None else timestamp)
+
+    def _Step(self, fTime: float) -> None:
+        # _Step(): Plays one arpeggio note at fTime and schedules the next step; runs on the scheduler's worker.
+        if not self.bPlaying:
+            return
+        oScheduler = self.oPlayer.Scheduler()
+        oScheduler.NoteAt(fTime, self.fStep * self.GATE, self.instrument, self.vOrder[self.nSteps % len(self.vOrder)],
+                          self.volume)
+        self.nSteps += 1
+        oScheduler.CallAt(fTime + self.fStep, self._Step)  # Absolute times: the pattern does not drift
+
+    def Stop(self, timestamp: float = None) -> None:
+        # Stop(): Turns off a chord or strum in one write; an arpeggio takes no further steps.
+        if not self.bPlaying:
+            return
+        self.bPlaying = False
+        oPlayer, sPattern = self.oPlayer, self.sPattern
+        if sPattern == PATTERN_CHORD or len(self.vNotes) == 1:
+            oPlayer.ChordOff(self.instrument, self.vNotes, timestamp)
+        elif sPattern == PATTERN_STRUM:
+            fTime = oPlayer.output.Time() if timestamp is None else timestamp
+            oPlayer.ChordOff(self.instrument, self.vNotes, max(fTime, self._fLastOn))  # Not before the roll's last note
+
+
+if __name__ == "__main__":
+    from tMidiPlayer import tMidiPlayer
+    from tMidiBackend import tRecordBackend
+    from time import sleep
+    oPlayer = tMidiPlayer(oBackend=tRecordBackend())
+    oOutput = oPlayer.output
+    oVoice = tCellVoice(oPlayer, 0, (60, 64, 67))
+    oVoice.Start()
+    assert oOutput.nWrites == 1 and len(oOutput.Messages()) == 4  # Program change and three notes, one write
+    assert len({m[0] for m in oOutput.Messages()}) == 1 and len(oPlayer.dHeld) == 3
+    oVoice.Stop()
+    assert oOutput.nWrites == 2 and not oPlayer.dHeld
+    oVoice = tCellVoice(oPlayer, 0, (60, 64, 67), PATTERN_STRUM)
+    oPlayer.BeginBatch()  # Joins a caller's batch, e.g. a touch frame
+    oVoice.Start(1000.0)
+    oPlayer.EndBatch()
+    oVoice.Stop(1010.0)
+    vTimes = [m[0] for m in oOutput.Messages()[-6:]]
+    assert vTimes == [1000.0, 1020.0, 1040.0, 1040.0, 1040.0, 1040.0] and oOutput.nWrites == 4
+    oVoice = tCellVoice(oPlayer, 0, (60, 64, 67), PATTERN_UPDOWN, fBpm=600, nPerBeat=4)  # 25 ms steps
+    nBefore = len(oOutput.Messages())
+    oVoice.Start()
+    sleep(0.3)
+    oVoice.Stop()
+    assert oPlayer.Scheduler().Wait(1.0) and not oPlayer.dHeld
+    vOn = [m for m in oOutput.Messages()[nBefore:] if m[1] & 0xF0 == 0x90]
+    assert [m[2] for m in vOn[:5]] == [60, 64, 67, 64, 60] and oVoice.nSteps == len(vOn)
+    assert all(abs(b[0] - a[0] - 25) < 0.01 for a, b in zip(vOn, vOn[1:]))
+    from sys import setswitchinterval
+    setswitchinterval(1e-6)  # Switch threads often, so unlocked interleavings would show
+    nBefore = len(oOutput.Messages())
+    vArps = [tCellVoice(oPlayer, n, (48 + n, 52 + n, 55 + n), PATTERN_UPDOWN, fBpm=3000) for n in range(3)]  # 5 ms steps
+    for oArp in vArps:
+        oArp.Start()
+    for n in range(2000):  # Chords pressed on the GUI thread, on the arpeggios' instruments, while they run
+        oChord = tCellVoice(oPlayer, n % 3, (48 + n % 12, 52 + n % 12, 55 + n % 12))
+        oPlayer.BeginBatch()  # A touch frame
+        oChord.Start()
+        oPlayer.EndBatch()
+        oChord.Stop()
+    for oArp in vArps:
+        oArp.Stop()
+    assert oPlayer.Scheduler().Wait(1.0) and not oPlayer.dHeld and all(oArp.nSteps > 4 for oArp in vArps)
+    dBalance = {}  # (channel, note) -> note ons minus note offs
+    for fTime, status, note, velocity in oOutput.Messages()[nBefore:]:
+        if status & 0xE0 == 0x80:
+            dBalance[(status & 0x0F, note)] = dBalance.get((status & 0x0F, note), 0) + (1 if status & 0x10 else -1)
+    assert not any(dBalance.values()), 'ERR: tCellVoice: Unbalanced note on/off with arpeggios running.'
+    oPlayer.Close()
+    print(f'{oVoice.nSteps} arpeggio steps, {oOutput.nWrites} writes')
@@ -0,0 +1,130 @@
+# tChanAlloc.py: MIDI Channel Allocator Class
+"""
+tChanAlloc.py
+
+Maps instruments (General MIDI programs) to MIDI channels so that notes of different instruments
+can sound at the same time without re-patching each other.
+
+Each instrument in use owns one melodic channel (0-15, skipping the General MIDI drum channel 9).
+When all 15 are owned and a new instrument arrives, the least recently used instrument with no
+notes held is evicted. Only if every channel holds notes is one stolen: the least recently used
+instrument's notes are ended through fnSteal(channel, instrument) (tMidiPlayer sends their note-offs
+and forgets them) before its channel is handed on, so no later release of the old instrument's notes
+is counted against the new owner. Lookups, acquisitions and releases are dictionary/list operations;
+only eviction looks at more than one entry, and that is bounded by 15.
+
+Classes:
+    tChanAlloc -- Instrument to channel allocator with LRU eviction.
+"""
+from collections import OrderedDict
+from typing import Optional
+
+
+class tChanAlloc:
+    """
+    tChanAlloc assigns MIDI channels to instruments.
+
+    Attributes:
+        DRUM_CHANNEL (int): The General MIDI percussion channel, never allocated.
+        CHANNELS (tuple): The channels available to melodic instruments.
+        nEvictions (int): Number of times an instrument lost its channel to another.
+        nSteals (int): Number of those evictions that ended notes still held.
+        fnSteal (callable): fnSteal(channel, instrument) ends instrument's held notes before a steal.
+
+    Methods:
+        Acquire(instrument): Returns the instrument's channel, allocating one if needed, and marks a held note.
+        Release(channel): Marks a note on the channel as released.
+        Lookup(instrument): Returns the instrument's channel or None, without allocating.
+        Owner(channel): Returns the instrument owning a channel or None.
+        Reset(): Forgets every assignment.
+    """
+    DRUM_CHANNEL = 9
+    CHANNELS = tuple(range(DRUM_CHANNEL)) + tuple(range(DRUM_CHANNEL + 1, 16))
+
+    def __init__(self, channels=CHANNELS, fnSteal=None) -> None:
+        # __init__(): Without fnSteal the caller must not Release() notes of an instrument whose channel was stolen.
+        assert channels, 'ERR: tChanAlloc: No channels to allocate.'
+        self.vChannels = tuple(channels)
+        self.fnSteal = fnSteal
+        self.Reset()
+
+    def Reset(self) -> None:
+        # Reset(): Forgets every assignment; all channels become free.
+        self._dChanOf: 'OrderedDict[int, int]' = OrderedDict()  # instrument -> channel, LRU first
+        self._vOwner = [None] * 16                                # channel -> instrument
+        self._vHeld = [0] * 16                                    # channel -> notes held
+        self._vFree = list(reversed(self.vChannels))              # pop() hands out the lowest first
+        self.nEvictions, self.nSteals = 0, 0
+
+    def Lookup(self, instrument: int) -> Optional[int]:
+        # Lookup(): Returns the channel owned by instrument, None if it has none.
+        return self._dChanOf.get(instrument)
+
+    def Owner(self, channel: int) -> Optional[int]:
+        # Owner(): Returns the instrument owning channel, None if it is free.
+        return self._vOwner[channel]
+
+    def Acquire(self, instrument: int) -> int:
+        # Acquire(): Returns instrument's channel, allocating one (and evicting if full), and counts a held note.
+        channel = self._dChanOf.get(instrument)
+        if channel is None:
+            channel = self._vFree.pop() if self._vFree else self._Evict()
+            self._dChanOf[instrument] = channel
+            self._vOwner[channel] = instrument
+        else:
+            self._dChanOf.move_to_end(instrument)
+        self._vHeld[channel] += 1
+        return channel
+
+    def Release(self, channel: int) -> None:
+        # Release(): Counts a note on channel as released; the channel stays with its instrument.
+        if self._vHeld[channel] > 0:
+            self._vHeld[channel] -= 1
+
+    def _Evict(self) -> int:
+        # _Evict(): Frees the least recently used channel with no held notes; if every channel holds
+        # notes, steals the least recently used one after fnSteal() has ended its notes.
+        victim = next((i for i, c in self._dChanOf.items() if not self._vHeld[c]), None)
+        if victim is None:
+            victim = next(iter(self._dChanOf))
+            channel = self._dChanOf[victim]
+            if self.fnSteal:
+                self.fnSteal(channel, victim)  # Releases its notes through Release()
+            self._vHeld[channel] = 0
+            self.nSteals += 1
+        channel = self._dChanOf.pop(victim)
+        self._vOwner[channel] = None
+        self.nEvictions += 1
+        return channel
+
+    def Assignments(self) -> dict:
+        # Assignments(): Returns {channel: instrument} for every owned channel.
+        return {c: i for i, c in self._dChanOf.items()}
+
+
+if __name__ == "__main__":
+    oAlloc = tChanAlloc()
+    assert oAlloc.Acquire(21) == 0 and oAlloc.Acquire(0) == 1 and oAlloc.Acquire(21) == 0
+    for nInstr in range(100, 113):  # Fill the remaining 13 channels, skipping the drum channel
+        assert oAlloc.Acquire(nInstr) != tChanAlloc.DRUM_CHANNEL
+    oAlloc.Release(oAlloc.Lookup(0))  # Instrument 0 is idle, 21 still holds a note
+    assert oAlloc.Acquire(40) == 1    # Least recently used idle instrument is evicted
+    assert oAlloc.Lookup(0) is None and oAlloc.Owner(1) == 40 and oAlloc.nEvictions == 1 and not oAlloc.nSteals
+    # Every channel holding a note: the player ends the least recently used instrument's notes, then its channel is reused
+    from tMidiPlayer import tMidiPlayer
+    from tMidiBackend import tRecordBackend
+    oPlayer = tMidiPlayer(oBackend=tRecordBackend())
+    for nInstr in range(15):
+        oPlayer.On(nInstr, 60)
+    oPlayer.On(0, 64)                 # Instrument 0 holds two notes on channel 0
+    oPlayer.On(1, 62)                 # Instrument 1 is now more recent than 2
+    oPlayer.On(100, 72)               # Steals channel 2 from instrument 2
+    oChan = oPlayer.oChanAlloc
+    assert oChan.nSteals == 1 and oChan.Owner(2) == 100 and not oPlayer.IsOn(2, 60)
+    assert oPlayer.output.Messages()[-3][1:3] == (0x82, 60)  # Note-off, program change, note-on
+    oPlayer.Off(2, 60)                # Already ended: sends nothing, releases nothing
+    oPlayer.Off(100, 72)
+    assert oChan._vHeld[2] == 0 and oPlayer.vActive[2] == 0 and oPlayer.dHeld[(0, 64)] == 0
+    oPlayer.AllNotesOff()
+    assert not any(oChan._vHeld) and not oPlayer.dHeld
+    print(oAlloc.Assignments())
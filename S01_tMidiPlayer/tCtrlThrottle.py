@@ -0,0 +1,120 @@
+# tCtrlThrottle.py: Continuous Controller Rate Limiter Class
+"""
+tCtrlThrottle.py
+
+Rate-limits continuous controller streams (pitch bend, modulation, any CC) before they reach the
+MIDI output.
+
+Dragging a slider produces values far faster than a MIDI link carries them: a 31.25 kbaud DIN link
+moves about one three-byte message per millisecond, and every controller value is sent to each
+channel in use. Set() therefore only records the latest value of a controller (last value wins);
+values equal to the last one sent are dropped. A controller is sent again only after fMinMs, and
+all controllers together are held to fMaxPerMs messages per millisecond by a token bucket that
+counts the messages fnSend() reports, so a fast drag cannot crowd out note messages. Nothing here
+sleeps or owns a thread: Set() and Flush() return how long until the next value is due, and the
+caller (a QTimer in tCtrlSurface) calls Flush() then.
+
+Classes:
+    tCtrlThrottle -- Per-controller interval plus a shared message budget, last value wins.
+
+Usage:
+    >>> oThrottle = tCtrlThrottle(oPlayer.SetControl)
+    >>> fDelay = oThrottle.Set(1, 64)      # Sent now, or pending
+    >>> ...
+    >>> fDelay = oThrottle.Flush()         # After fDelay ms
+"""
+from time import perf_counter
+from typing import Callable, Optional
+
+
+class tCtrlThrottle:
+    """
+    tCtrlThrottle coalesces controller values and paces them.
+
+    Attributes:
+        MIN_MS (float): Default minimum interval between two values of one controller.
+        MAX_PER_MS (float): Default message budget of all controllers together; half of a DIN link.
+        BURST (int): Messages that may be sent at once after an idle spell.
+        nReceived (int): Number of values given to Set().
+        nSent (int): Number of values passed to fnSend().
+        nMessages (int): Number of MIDI messages fnSend() reported.
+
+    Methods:
+        Set(controller, value): Records a value; sends it if allowed. Returns ms until Flush() is due, or None.
+        Flush(fNow=None): Sends the pending values that are due. Returns ms until the next is due, or None.
+        Pending(): Returns the number of controllers with a value waiting.
+    """
+    MIN_MS = 10.0
+    MAX_PER_MS = 0.5
+    BURST = 32
+
+    def __init__(self, fnSend: Callable[[int, int], int], fMinMs: float = MIN_MS, fMaxPerMs: float = MAX_PER_MS,
+                 fnClock: Callable[[], float] = None) -> None:
+        # __init__(): fnSend(controller, value) sends one value and returns the number of messages it took.
+        assert fMinMs >= 0 and fMaxPerMs > 0, f'ERR: tCtrlThrottle: Bad limits {fMinMs} ms, {fMaxPerMs}/ms.'
+        self.fnSend = fnSend
+        self.fMinMs, self.fMaxPerMs = fMinMs, fMaxPerMs
+        self.fnClock = fnClock or (lambda: perf_counter() * 1000)
+        self._dPending = {}  # controller -> latest value not yet sent
+        self._dSent = {}     # controller -> (value, time) last sent
+        self._fTokens, self._fRefill = float(self.BURST), self.fnClock()
+        self.nReceived, self.nSent, self.nMessages = 0, 0, 0
+
+    def Set(self, controller: int, value: int) -> Optional[float]:
+        # Set(): Last value wins; a value equal to the one last sent cancels anything pending.
+        self.nReceived += 1
+        tSent = self._dSent.get(controller)
+        if tSent is not None and tSent[0] == value:
+            self._dPending.pop(controller, None)
+        else:
+            self._dPending[controller] = value
+        return self.Flush()
+
+    def _Due(self, controller: int, fNow: float) -> float:
+        # _Due(): Time at which controller may be sent again.
+        tSent = self._dSent.get(controller)
+        return fNow if tSent is None else tSent[1] + self.fMinMs
+
+    def Flush(self, fNow: float = None) -> Optional[float]:
+        # Flush(): Sends due values while the budget lasts; returns ms until the next is due, None if none waits.
+        if not self._dPending:
+            return None
+        fNow = self.fnClock() if fNow is None else fNow
+        self._fTokens = min(float(self.BURST), self._fTokens + (fNow - self._fRefill) * self.fMaxPerMs)
+        self._fRefill = fNow
+        fNext = None
+        for controller in list(self._dPending):
+            fDue = self._Due(controller, fNow)
+            if self._fTokens <= 0:  # Over budget: wait until a message's worth has refilled
+                fDue = max(fDue, fNow + (1 - self._fTokens) / self.fMaxPerMs)
+            if fDue <= fNow:
+                value = self._dPending.pop(controller)
+                nMessages = self.fnSend(controller, value) or 0
+                self._fTokens -= nMessages  # May go negative: a value fanned out to many channels is sent whole
+                self._dSent[controller] = (value, fNow)
+                self.nSent += 1
+                self.nMessages += nMessages
+            else:
+                fNext = fDue if fNext is None else min(fNext, fDue)
+        return None if fNext is None else max(0.0, fNext - fNow)
+
+    def Pending(self) -> int:
+        return len(self._dPending)
+
+
+if __name__ == "__main__":
+    for nChannels in (4, 16):  # Messages per value: one per channel in use
+        fClock = [0.0]
+        vSent = []
+        oThrottle = tCtrlThrottle(lambda c, v: vSent.append((fClock[0], c, v)) or nChannels, fnClock=lambda: fClock[0])
+        for n in range(1000):  # A 1 kHz drag of CC 1 for one second
+            fClock[0] = float(n)
+            oThrottle.Set(1, n % 128)
+        fDelay = oThrottle.Flush()
+        while fDelay is not None:
+            fClock[0] += fDelay
+            fDelay = oThrottle.Flush()
+        assert vSent[-1][2] == 999 % 128, 'Last value must win'
+        assert all(b[0] - a[0] >= tCtrlThrottle.MIN_MS for a, b in zip(vSent, vSent[1:]))
+        assert oThrottle.nMessages <= tCtrlThrottle.BURST + nChannels + fClock[0] * tCtrlThrottle.MAX_PER_MS
+        print(f'{oThrottle.nReceived} values in, {oThrottle.nSent} sent ({oThrottle.nMessages} messages) over {fClock[0]:.0f} ms')
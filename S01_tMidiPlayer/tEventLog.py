@@ -0,0 +1,124 @@
+# tEventLog.py: MIDI Event Ring Buffer Class
+"""
+tEventLog.py
+
+A fixed-size ring buffer of recent MIDI messages, for tMidiPlayer and anything else that wants a
+record of what was sent without paying for it on every note.
+
+Messages are stored as raw numbers in preallocated arrays: a float timestamp plus the status byte
+(message type and channel) and two data bytes. Nothing is formatted when a message is added; names
+are only looked up when Tail() or Dump() is called. The verbosity level can be changed at any time:
+OFF records nothing, RECORD (the default) only records, and ECHO also prints each message as it is
+added, which is what tMidiPlayer used to do unconditionally.
+
+Classes:
+    tEventLog -- Ring buffer of (timestamp, status, data1, data2) records.
+"""
+from array import array
+from sys import stdout
+from time import perf_counter
+from kInstr import INSTR_NAMES  # Tuple mapping ints to strings
+from kNote import NOTE_NAMES    # Tuple mapping ints to strings
+
+
+class tEventLog:
+    """
+    tEventLog keeps the most recent MIDI messages in preallocated arrays.
+
+    Attributes:
+        SIZE (int): Default number of records kept.
+        OFF, RECORD, ECHO (int): Verbosity levels.
+        nLevel (int): The current verbosity level.
+        nSize (int): Number of records kept.
+        nTotal (int): Number of records added since creation or Clear().
+
+    Methods:
+        Add(status, data1, data2=0): Records one message.
+        Tail(n=None): Returns the last n records, oldest first, as tuples.
+        Format(record): Returns a record as a readable line.
+        Dump(n=None): Writes the last n records as readable lines.
+        SetLevel(nLevel): Changes the verbosity level.
+        Clear(): Forgets every record.
+    """
+    SIZE = 4096
+    OFF, RECORD, ECHO = 0, 1, 2
+    _TYPE_NAMES = {0x80: 'Off', 0x90: 'On', 0xA0: 'Pressure', 0xB0: 'CC',
+                   0xC0: 'Program', 0xD0: 'Chan Pressure', 0xE0: 'Bend'}
+
+    def __init__(self, nSize: int = SIZE, nLevel: int = RECORD, fnClock=perf_counter) -> None:
+        assert nSize > 0, f'ERR: tEventLog: nSize {nSize} must be positive.'
+        self.nSize = nSize
+        self.nLevel = nLevel
+        self.fnClock = fnClock
+        self._vTime = array('d', bytes(8 * nSize))
+        self._vStatus = array('B', bytes(nSize))
+        self._vData1 = array('B', bytes(nSize))
+        self._vData2 = array('B', bytes(nSize))
+        self.nTotal = 0
+
+    def SetLevel(self, nLevel: int) -> None:
+        # SetLevel(): Changes the verbosity level (OFF, RECORD or ECHO).
+        assert nLevel in (self.OFF, self.RECORD, self.ECHO), f'ERR: tEventLog: Unknown level {nLevel}.'
+        self.nLevel = nLevel
+
+    def Add(self, status: int, data1: int, data2: int = 0) -> None:
+        # Add(): Records a message in the next slot, overwriting the oldest once full.
+        if not self.nLevel:
+            return
+        i = self.nTotal % self.nSize
+        self._vTime[i] = self.fnClock()
+        self._vStatus[i] = status
+        self._vData1[i] = data1
+        self._vData2[i] = data2
+        self.nTotal += 1
+        if self.nLevel >= self.ECHO:
+            print(self.Format((self._vTime[i], status, data1, data2)))
+
+    def __len__(self) -> int:
+        return min(self.nTotal, self.nSize)
+
+    def Tail(self, n: int = None) -> list:
+        # Tail(): Returns the last n records (all kept records if n is None) as
+        # (timestamp, status, data1, data2) tuples, oldest first.
+        nKept = len(self)
+        n = nKept if n is None else max(0, min(n, nKept))
+        vRecords = []
+        for nIndex in range(self.nTotal - n, self.nTotal):
+            i = nIndex % self.nSize
+            vRecords.append((self._vTime[i], self._vStatus[i], self._vData1[i], self._vData2[i]))
+        return vRecords
+
+    @classmethod
+    def Format(cls, record: tuple) -> str:
+        # Format(): Returns a record as a line such as '12.345678 On ch 1: Middle_C vel 127'.
+        fTime, status, data1, data2 = record
+        nType, nChannel = status & 0xF0, status & 0x0F
+        sType = cls._TYPE_NAMES.get(nType, f'0x{nType:02X}')
+        if nType == 0xC0:
+            sBody = f'Instrument {INSTR_NAMES[data1 & 0x7F]}'
+        elif nType in (0x80, 0x90, 0xA0):
+            sBody = f'Note {NOTE_NAMES[data1 & 0x7F]}, Volume {data2}'
+        else:
+            sBody = f'{data1} {data2}'
+        return f'{fTime:.6f} {sType}(): Channel {nChannel}, {sBody}'
+
+    def Dump(self, n: int = None, write=stdout.write) -> None:
+        # Dump(): Writes the last n records (all if None) as readable lines.
+        for record in self.Tail(n):
+            write(self.Format(record) + '\n')
+
+    def Clear(self) -> None:
+        # Clear(): Forgets every record; the arrays are reused.
+        self.nTotal = 0
+
+
+if __name__ == "__main__":
+    oLog = tEventLog(4)
+    for nNote in range(60, 66):
+        oLog.Add(0x90, nNote, 100)
+    assert len(oLog) == 4 and [r[2] for r in oLog.Tail()] == [62, 63, 64, 65]
+    assert [r[2] for r in oLog.Tail(2)] == [64, 65]
+    oLog.SetLevel(tEventLog.OFF)
+    oLog.Add(0x80, 65)
+    assert oLog.nTotal == 6
+    oLog.Dump()
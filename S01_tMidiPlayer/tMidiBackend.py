@@ -0,0 +1,320 @@
+# tMidiBackend.py: MIDI Output Backend Classes
+"""
+tMidiBackend.py
+
+The output backends behind tMidiPlayer. A backend takes raw short MIDI messages and knows what time
+it is; tMidiPlayer does the rest (program change elision, channel allocation, threading, logging).
+
+Classes:
+    tMidiBackend   -- The interface: WriteShort(), Write(), Time(), Close().
+    tMidiDevices   -- Cached pygame.midi device list; finds outputs and inputs by name.
+    tPygameBackend -- Writes to a pygame.midi Output, opened immediately, on first use or in the background.
+    tNullBackend   -- Discards everything, counting messages; for measuring the player itself.
+    tRecordBackend -- Keeps every message with its timestamp in compact arrays, for tests and benchmarks.
+
+Usage:
+    >>> oPlayer = tMidiPlayer(oBackend=tRecordBackend())
+    >>> oPlayer.On(21, 60)
+    >>> oPlayer.output.Messages()
+"""
+from array import array
+from threading import RLock, Thread
+from time import perf_counter
+
+
+class tMidiBackend:
+    """
+    tMidiBackend: Interface for MIDI output backends.
+
+    Methods:
+        WriteShort(status, data1=0, data2=0): Sends one short message now.
+        Write(vEvents): Sends [[[status, data1, data2], timestamp], ...] in one call.
+        Time(): Returns the backend clock in milliseconds, the timebase of Write() timestamps.
+        Close(): Releases the output.
+    """
+    def WriteShort(self, status: int, data1: int = 0, data2: int = 0) -> None:
+        raise NotImplementedError
+    def Write(self, vEvents: list) -> None:
+        raise NotImplementedError
+    def Time(self) -> float:
+        raise NotImplementedError
+    def Close(self) -> None:
+        pass
+
+
+def _Midi():
+    # _Midi(): Imports and initializes pygame.midi on first use, so importing this module stays cheap.
+    from pygame import midi
+    if not midi.get_init():
+        midi.init()
+    return midi
+
+
+class tMidiDevices:
+    """
+    tMidiDevices: Cached pygame.midi device enumeration.
+
+    The device list is read once per process (or on Refresh()), so choosing an output by name
+    does not re-scan the MIDI subsystem. Reading it, or the default device, holds a
+    tPygameBackend.Acquire() count, so another thread's Release() cannot shut pygame.midi down
+    in the middle, and pygame.midi is not left initialized when no port is open.
+
+    Methods:
+        List(bRefresh=False): Returns (id, interface, name, bInput, bOutput, bOpened) for every device.
+        Outputs(): Returns the output devices.
+        Inputs(): Returns the input devices.
+        FindOutput(sName): Returns the id of the output whose name matches sName.
+        FindInput(sName): Returns the id of the input whose name matches sName.
+        Resolve(output, bInput=False): Returns a device id for None (system default), an int id, or a name.
+    """
+    _vDevices = None
+    @classmethod
+    def List(cls, bRefresh: bool = False) -> list:
+        if cls._vDevices is None or bRefresh:
+            midi = tPygameBackend.Acquire()
+            try:
+                vDevices = []
+                for nId in range(midi.get_count()):
+                    interface, name, bInput, bOutput, bOpened = midi.get_device_info(nId)
+                    vDevices.append((nId, interface.decode(errors='replace'), name.decode(errors='replace'),
+                                     bool(bInput), bool(bOutput), bool(bOpened)))
+            finally:
+                tPygameBackend.Release()
+            cls._vDevices = vDevices
+        return cls._vDevices
+    @classmethod
+    def Refresh(cls) -> list:
+        return cls.List(bRefresh=True)
+    @classmethod
+    def Outputs(cls) -> list:
+        return [d for d in cls.List() if d[4]]
+    @classmethod
+    def Inputs(cls) -> list:
+        return [d for d in cls.List() if d[3]]
+    @staticmethod
+    def _Find(vDevices: list, sName: str, sKind: str) -> int:
+        # _Find(): Exact name first, then case-insensitive substring.
+        for d in vDevices:
+            if d[2] == sName:
+                return d[0]
+        sLower = sName.lower()
+        for d in vDevices:
+            if sLower in d[2].lower():
+                return d[0]
+        assert False, f'ERR: MIDI {sKind} "{sName}" not found in {[d[2] for d in vDevices]}.'
+    @classmethod
+    def FindOutput(cls, sName: str) -> int:
+        return cls._Find(cls.Outputs(), sName, 'output')
+    @classmethod
+    def FindInput(cls, sName: str) -> int:
+        return cls._Find(cls.Inputs(), sName, 'input')
+    @classmethod
+    def Resolve(cls, device, bInput: bool = False) -> int:
+        sKind = 'input' if bInput else 'output'
+        if device is None:
+            midi = tPygameBackend.Acquire()
+            try:
+                nId = midi.get_default_input_id() if bInput else midi.get_default_output_id()
+            finally:
+                tPygameBackend.Release()
+            assert nId >= 0, f'ERR: No default MIDI {sKind}.'
+            return nId
+        if isinstance(device, str):
+            return int(device) if device.isdigit() else (cls.FindInput(device) if bInput else cls.FindOutput(device))
+        return device
+
+
+class tPygameBackend(tMidiBackend):
+    """
+    tPygameBackend: Writes to a pygame.midi Output.
+
+    pygame is imported and pygame.midi initialized only when the output is opened, and shut down
+    when the last open backend closes; nothing else in the process needs to call midi.init() or
+    midi.quit(). With bDeferred the output is opened by the first message, or earlier in the
+    background with OpenAsync(), so a window can appear before the MIDI device is ready.
+
+    Time() never opens the output: it is a perf_counter clock of the backend's own, read on the GUI
+    thread for every queued message, and Write() shifts timestamps onto PortMidi's clock, measured
+    once when the output opens. A deferred output that fails to open prints the error once and drops
+    what is sent to it, instead of raising for every note.
+
+    Anything else opening a pygame.midi port (tMidiInput) brackets it with Acquire() and Release(),
+    which keep the same count, so pygame.midi stays initialized while any port is open.
+    """
+    _nOpen = 0  # Number of open pygame.midi ports: tPygameBackend outputs and Acquire() callers
+    _oLock = RLock()  # Reentrant: Open() holds it around Acquire()
+    def __init__(self, output_id=None, latency: int = 1, bDeferred: bool = False) -> None:
+        # __init__(): output_id is a device id, a device name, or None for the default output;
+        # latency > 0 (ms) enables timestamps.
+        self.output_id = output_id
+        self.latency = latency
+        self.output = None
+        self._midi = None
+        self._fStart = perf_counter()
+        self._fShift = 0.0  # PortMidi time minus Time(), measured by Open()
+        self._sError = None  # Why the output could not be opened, once a writer has tried
+        if not bDeferred:
+            self.Open()
+    def Open(self) -> None:
+        # Open(): Opens the output if it is not open yet; safe to call from any thread. _midi is set
+        # last, under _oLock, so a caller seeing it set sees an output that is fully open.
+        if self._midi is not None:
+            return
+        with tPygameBackend._oLock:
+            if self._midi is not None:
+                return
+            midi = tPygameBackend.Acquire()
+            try:
+                output = midi.Output(tMidiDevices.Resolve(self.output_id), latency=self.latency)
+            except Exception:
+                tPygameBackend.Release()
+                raise
+            self.output = output
+            self._fShift = midi.time() - self.Time()
+            self._midi = midi
+    def OpenAsync(self) -> Thread:
+        # OpenAsync(): Opens the output on a background thread; a message sent meanwhile waits for it.
+        oThread = Thread(target=self._TryOpen, name='tPygameBackend.Open', daemon=True)
+        oThread.start()
+        return oThread
+    def _TryOpen(self) -> bool:
+        # _TryOpen(): Open() for the writers; the first failure is printed, later ones are not retried.
+        if self._sError is None:
+            try:
+                self.Open()
+            except Exception as e:
+                self._sError = str(e)
+                print(f"Error occurred while opening MIDI output: {e}")
+        return self._midi is not None
+    def WriteShort(self, status: int, data1: int = 0, data2: int = 0) -> None:
+        if self._midi is None and not self._TryOpen():
+            return
+        self.output.write_short(status, data1, data2)
+    def Write(self, vEvents: list) -> None:
+        if self._midi is None and not self._TryOpen():
+            return
+        fShift = self._fShift
+        self.output.write([[msg, timestamp + fShift] for msg, timestamp in vEvents] if fShift else vEvents)
+    def Time(self) -> float:
+        # Time(): The backend's clock in ms; never opens or waits for the output.
+        return (perf_counter() - self._fStart) * 1000
+    def Close(self) -> None:
+        with tPygameBackend._oLock:
+            if self.output is not None:
+                self._midi = None  # First: Open() and the writers must not take this output for open any more
+                try:
+                    self.output.close()
+                finally:
+                    self.output = None
+                    tPygameBackend.Release()
+    @staticmethod
+    def Acquire():
+        # Acquire(): Counts one more open port, initializing pygame.midi for the first; returns pygame.midi.
+        with tPygameBackend._oLock:
+            midi = _Midi()
+            tPygameBackend._nOpen += 1
+            return midi
+    @staticmethod
+    def Release() -> None:
+        # Release(): Counts one port closed; the last one shuts pygame.midi down.
+        with tPygameBackend._oLock:
+            assert tPygameBackend._nOpen > 0, 'ERR: tPygameBackend: Release() without Acquire().'
+            tPygameBackend._nOpen -= 1
+            if tPygameBackend._nOpen == 0:
+                _Midi().quit()
+
+
+class tNullBackend(tMidiBackend):
+    """
+    tNullBackend: Discards every message; nMessages and nWrites count what would have been sent.
+    """
+    def __init__(self) -> None:
+        self.nMessages, self.nWrites = 0, 0
+        self._fStart = perf_counter()
+    def WriteShort(self, status: int, data1: int = 0, data2: int = 0) -> None:
+        self.nMessages += 1
+        self.nWrites += 1
+    def Write(self, vEvents: list) -> None:
+        self.nMessages += len(vEvents)
+        self.nWrites += 1
+    def Time(self) -> float:
+        return (perf_counter() - self._fStart) * 1000
+
+
+class tRecordBackend(tNullBackend):
+    """
+    tRecordBackend: Records every message in parallel arrays.
+
+    WriteShort() messages are stamped with Time() on arrival; Write() messages keep the timestamp
+    they were given. Use Messages() to read them back as (timestamp, status, data1, data2) tuples.
+    """
+    def __init__(self) -> None:
+        super().__init__()
+        self.vTime = array('d')
+        self.vStatus, self.vData1, self.vData2 = array('B'), array('B'), array('B')
+    def WriteShort(self, status: int, data1: int = 0, data2: int = 0) -> None:
+        super().WriteShort(status, data1, data2)
+        self.vTime.append(self.Time())
+        self.vStatus.append(status)
+        self.vData1.append(data1)
+        self.vData2.append(data2)
+    def Write(self, vEvents: list) -> None:
+        super().Write(vEvents)
+        for (msg, timestamp) in vEvents:
+            self.vTime.append(timestamp)
+            self.vStatus.append(msg[0])
+            self.vData1.append(msg[1] if len(msg) > 1 else 0)
+            self.vData2.append(msg[2] if len(msg) > 2 else 0)
+    def Messages(self) -> list:
+        # Messages(): Returns every recorded message as (timestamp, status, data1, data2), oldest first.
+        return list(zip(self.vTime, self.vStatus, self.vData1, self.vData2))
+    def Clear(self) -> None:
+        # Clear(): Forgets every recorded message and resets the counters.
+        for v in (self.vTime, self.vStatus, self.vData1, self.vData2):
+            del v[:]
+        self.nMessages, self.nWrites = 0, 0
+    def __len__(self) -> int:
+        return len(self.vStatus)
+
+
+if __name__ == "__main__":
+    oRec = tRecordBackend()
+    oRec.WriteShort(0x90, 60, 100)
+    oRec.Write([[[0x80, 60, 0], 5.0], [[0xC0, 21], 6.0]])
+    assert [m[1:] for m in oRec.Messages()] == [(0x90, 60, 100), (0x80, 60, 0), (0xC0, 21, 0)]
+    assert oRec.nWrites == 2 and len(oRec) == 3
+    class tFakeMidi:  # Stands in for pygame.midi: its clock starts at 0 on init, and opening can fail
+        bFail, nOpens, nQuits, vWritten = False, 0, 0, []
+        def get_count(self):
+            return 0
+        def get_default_output_id(self):
+            return -1
+        def time(self):
+            return 0.0
+        def Output(self, nId, latency):
+            assert not tFakeMidi.bFail, 'ERR: Device gone.'
+            tFakeMidi.nOpens += 1
+            return self
+        def write(self, vEvents):
+            tFakeMidi.vWritten += vEvents
+        def close(self):
+            pass
+        def quit(self):
+            tFakeMidi.nQuits += 1
+    oFake = tFakeMidi()
+    _Midi = lambda: oFake
+    assert tMidiDevices.Refresh() == [] and tPygameBackend._nOpen == 0 and tFakeMidi.nQuits == 1  # Not left initialized
+    tMidiDevices.Resolve = classmethod(lambda cls, device, bInput=False: 0)
+    oOut = tPygameBackend(bDeferred=True)
+    fNow = oOut.Time()
+    assert tFakeMidi.nOpens == 0 and oOut._midi is None  # The clock does not open the port
+    oOut.Write([[[0x90, 60, 100], fNow + 10]])
+    assert tFakeMidi.nOpens == 1 and tFakeMidi.vWritten[0][1] < 10.5  # Shifted onto the port's clock
+    oOut.Close()
+    tFakeMidi.bFail = True
+    oOut = tPygameBackend(bDeferred=True)
+    oOut.OpenAsync().join()  # Prints the error once
+    oOut.WriteShort(0x90, 60, 100)  # Dropped, not raised
+    oOut.Write([[[0x80, 60, 0], oOut.Time()]])
+    assert oOut._sError and len(tFakeMidi.vWritten) == 1
+    print(oRec.Messages())
@@ -0,0 +1,150 @@
+# tMidiInput.py: MIDI Input Poller Class
+"""
+tMidiInput.py
+
+Listens on a MIDI input and hands incoming notes to the GUI without flooding it.
+
+A background thread polls the input and reads whatever has arrived in batches of up to BATCH
+events (pygame.midi Input.read(n)), keeping only note-on, note-off and all-notes-off messages.
+These go onto a deque as compact (status, channel, note, velocity) tuples; deque.append and
+deque.popleft are atomic, so no lock is needed. fnNotify is called once when the deque goes from
+drained to non-empty, not once per message, and the consumer takes everything with one Drain().
+A GUI therefore schedules at most one update per notification, however dense the stream.
+
+The input is opened between tPygameBackend.Acquire() and Release(), the reference count its outputs
+keep, so pygame.midi stays initialized while either is open. Tests and loopbacks can Feed() raw events
+instead of opening a device (oSource=False).
+
+Classes:
+    tMidiInput -- Batched MIDI input poller with a drain-on-notify queue.
+
+Usage:
+    >>> oInput = tMidiInput('USB Keyboard', fnNotify=oGrid.sigInput.emit)
+    >>> ...
+    >>> for status, channel, note, velocity in oInput.Drain(): ...
+    >>> oInput.Close()
+"""
+from collections import deque
+from threading import Event, Thread
+from typing import Callable, List, Tuple
+from tMidiBackend import tMidiDevices, tPygameBackend
+
+tNoteEvent = Tuple[int, int, int, int]  # (status, channel, note, velocity); status is NOTE_ON, NOTE_OFF or CONTROL_CHANGE
+
+
+class tMidiInput:
+    """
+    tMidiInput polls a MIDI input on its own thread and queues its note messages.
+
+    Attributes:
+        BATCH (int): Maximum events per Input.read().
+        POLL_MS (float): Sleep between polls that find nothing.
+        NOTE_OFF, NOTE_ON, CONTROL_CHANGE (int): Status nibbles kept; other messages are dropped.
+        ALL_NOTES_OFF (int): The controller kept among control changes.
+        nEvents (int): Number of messages queued.
+        nReads (int): Number of reads that returned events.
+
+    Methods:
+        Feed(vEvents): Queues [[[status, data1, data2, data3], timestamp], ...] as if read.
+        Drain(): Returns and removes every queued (status, channel, note, velocity).
+        Close(): Stops the poller and closes the input.
+    """
+    BATCH = 256
+    POLL_MS = 1.0
+    NOTE_OFF, NOTE_ON, CONTROL_CHANGE = 0x80, 0x90, 0xB0
+    ALL_NOTES_OFF = 123
+
+    def __init__(self, input_id=None, fnNotify: Callable[[], None] = None, oSource=None) -> None:
+        # __init__(): input_id is a device id, a device name, or None for the default input.
+        # oSource is an object with poll() and read(n) to use instead; False polls nothing (Feed() only).
+        self.fnNotify = fnNotify
+        self.nEvents, self.nReads = 0, 0
+        self._qEvents = deque()
+        self._bNotified = False  # Set when fnNotify has been called and not yet answered by Drain()
+        self._bOwned = oSource is None
+        self.oSource = self._Open(input_id) if self._bOwned else oSource
+        self._oStop = Event()
+        self._oThread = None
+        if self.oSource:
+            self._oThread = Thread(target=self._Run, name='tMidiInput', daemon=True)
+            self._oThread.start()
+
+    @staticmethod
+    def _Open(input_id):
+        midi = tPygameBackend.Acquire()
+        try:
+            return midi.Input(tMidiDevices.Resolve(input_id, bInput=True), tMidiInput.BATCH)
+        except Exception:
+            tPygameBackend.Release()
+            raise
+
+    def Feed(self, vEvents: list) -> None:
+        # Feed(): Filters and queues raw events; called by the poller, or directly with oSource=False.
+        nBefore = self.nEvents
+        for msg, _ in vEvents:
+            status = msg[0] & 0xF0
+            if status == self.NOTE_ON or status == self.NOTE_OFF or \
+               (status == self.CONTROL_CHANGE and msg[1] == self.ALL_NOTES_OFF):
+                self._qEvents.append((status, msg[0] & 0x0F, msg[1], msg[2]))
+                self.nEvents += 1
+        if self.nEvents != nBefore and not self._bNotified:
+            self._bNotified = True
+            if self.fnNotify:
+                self.fnNotify()
+
+    def Drain(self) -> List[tNoteEvent]:
+        # Drain(): Takes everything queued; a message arriving after this call notifies again.
+        self._bNotified = False
+        qEvents, vEvents = self._qEvents, []
+        while qEvents:
+            vEvents.append(qEvents.popleft())
+        return vEvents
+
+    def _Run(self) -> None:
+        # _Run(): Poller loop; reads batches while events are waiting, otherwise sleeps POLL_MS.
+        oSource, fWait = self.oSource, self.POLL_MS / 1000
+        while not self._oStop.is_set():
+            try:
+                if oSource.poll():
+                    vEvents = oSource.read(self.BATCH)
+                    if vEvents:
+                        self.nReads += 1
+                        self.Feed(vEvents)
+                        continue
+            except Exception as e:
+                print(f"Error occurred while reading MIDI input: {e}")
+            self._oStop.wait(fWait)
+
+    def Close(self) -> None:
+        # Close(): Stops the poller, then closes the input if this object opened it.
+        self._oStop.set()
+        if self._oThread is not None:
+            self._oThread.join()
+            self._oThread = None
+        if self._bOwned and self.oSource is not None:
+            try:
+                self.oSource.close()
+            finally:
+                self.oSource = None
+                tPygameBackend.Release()
+
+
+if __name__ == "__main__":
+    class tFakeInput:
+        def __init__(self, vEvents):
+            self.vEvents = vEvents
+        def poll(self):
+            return bool(self.vEvents)
+        def read(self, n):
+            vBatch, self.vEvents = self.vEvents[:n], self.vEvents[n:]
+            return vBatch
+    vEvents = [[[0x91, 60 + n % 12, 100, 0], n] for n in range(1000)] + [[[0xF8, 0, 0, 0], 1000], [[0x81, 60, 0, 0], 1001]]
+    vNotified = []
+    oInput = tMidiInput(fnNotify=lambda: vNotified.append(1), oSource=tFakeInput(vEvents))
+    while oInput.nEvents < 1001:
+        pass
+    oInput.Close()
+    vDrained = oInput.Drain()
+    assert len(vDrained) == 1001 and vDrained[0] == (0x90, 1, 60, 100) and vDrained[-1] == (0x80, 1, 60, 0)
+    assert len(vNotified) == 1 and oInput.nReads >= 1000 // tMidiInput.BATCH
+    print(f'{oInput.nEvents} events in {oInput.nReads} reads, {len(vNotified)} notification')
@@ -0,0 +1,119 @@
+# tMidiOutThread.py: MIDI Output Worker Thread Class
+"""
+tMidiOutThread.py
+
+A dedicated thread that owns the writes to a MIDI output backend (see tMidiBackend).
+
+Callers (the Qt GUI thread, through tMidiPlayer) append compact (status, data1, data2, timestamp)
+tuples to a deque and return at once; deque.append and deque.popleft are atomic, so the queue needs
+no lock. The worker sleeps on an Event, wakes when events arrive, and drains them in batches with a
+single Write() per batch. Each event is stamped with the MIDI clock when it is queued, so with
+a non-zero output latency the driver places the note relative to the GUI event, not to when the
+worker got round to it.
+
+Classes:
+    tMidiOutThread -- Queue plus worker thread draining into a backend's Write().
+"""
+from collections import deque
+from threading import Event, Thread
+from time import monotonic, sleep
+from typing import Callable
+from tLatencyProbe import PROBE  # Latency instrumentation
+
+
+class tMidiOutThread:
+    """
+    tMidiOutThread drains queued MIDI messages into an output on its own thread.
+
+    Attributes:
+        BATCH (int): Maximum events per Write() (the pygame.midi limit).
+        output (tMidiBackend): The backend written to; only the worker thread touches it.
+        fnClock (callable): Returns the current MIDI time in milliseconds, used as timestamp.
+        nEvents (int): Number of events written.
+        nBatches (int): Number of Write() calls made.
+
+    Methods:
+        Put(status, data1, data2=0, timestamp=None): Queues one short MIDI message, stamped now
+            unless a timestamp is given.
+        PutMany(vMessages): Queues (status, data1, data2, timestamp) messages with one wake-up;
+            a None timestamp is replaced by the time of the call.
+        Flush(): Blocks until every queued message has been written.
+        Stop(): Writes everything still queued and ends the thread.
+    """
+    BATCH = 1024
+
+    def __init__(self, output, fnClock: Callable[[], int]) -> None:
+        self.output = output
+        self.fnClock = fnClock
+        self.nEvents, self.nBatches = 0, 0
+        self._qEvents = deque()
+        self._oWake = Event()
+        self._bBusy = False  # True while the worker is between waking and finishing its writes
+        self._bRun = True
+        self._oThread = Thread(target=self._Run, name='tMidiOutThread', daemon=True)
+        self._oThread.start()
+
+    def Put(self, status: int, data1: int, data2: int = 0, timestamp: float = None) -> None:
+        # Put(): Queues a message stamped with the current MIDI time (or timestamp) and wakes the worker.
+        self._qEvents.append((status, data1, data2, self.fnClock() if timestamp is None else timestamp))
+        self._oWake.set()
+
+    def PutMany(self, vMessages: list) -> None:
+        # PutMany(): Queues several messages at once, e.g. a chord, so the worker writes them together.
+        fNow = None
+        for status, data1, data2, timestamp in vMessages:
+            if timestamp is None:
+                if fNow is None:
+                    fNow = self.fnClock()
+                timestamp = fNow
+            self._qEvents.append((status, data1, data2, timestamp))
+        self._oWake.set()
+
+    def _Run(self) -> None:
+        # _Run(): Worker loop; sleeps until woken, then drains the queue.
+        while True:
+            self._oWake.wait()
+            self._bBusy = True
+            self._oWake.clear()
+            self._Drain()
+            if not self._bRun:
+                self._Drain()  # Anything queued while stopping, e.g. final note-offs
+                self._bBusy = False
+                return
+            self._bBusy = False
+
+    def _Drain(self) -> None:
+        # _Drain(): Writes queued events in batches of at most BATCH.
+        qEvents = self._qEvents
+        while qEvents:
+            vBatch = []
+            while qEvents and len(vBatch) < self.BATCH:
+                status, data1, data2, timestamp = qEvents.popleft()
+                vBatch.append([[status, data1, data2], timestamp])
+            if PROBE.bEnabled:
+                PROBE.End(PROBE.INPUT_TO_MIDI)
+            try:
+                self.output.Write(vBatch)
+            except Exception as e:
+                print(f"Error occurred while writing MIDI output: {e}")
+            self.nEvents += len(vBatch)
+            self.nBatches += 1
+
+    def Flush(self, timeout: float = 1.0) -> bool:
+        # Flush(): Waits until the queue is empty and written. Returns False on timeout.
+        fDeadline = monotonic() + timeout
+        while self._qEvents or self._bBusy:
+            if monotonic() >= fDeadline or not self._oThread.is_alive():
+                return False
+            sleep(0.001)
+        return True
+
+    def Stop(self, timeout: float = 1.0) -> None:
+        # Stop(): Writes everything still queued, then ends the worker thread.
+        if self._oThread.is_alive():
+            self._bRun = False
+            self._oWake.set()
+            self._oThread.join(timeout)
+
+    def IsAlive(self) -> bool:
+        return self._oThread.is_alive()
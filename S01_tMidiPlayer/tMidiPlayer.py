@@ -1,12 +1,19 @@
 # tMidiPlayer.py: MIDI Player Class
 from sys import exit            # Exits Program
+from sys import argv            # Command line arguments
 from random import choice       # Returns single randomly selected sequence item
 from signal import SIGINT       # User Interrupt Signal Ctrl-C
 from signal import signal       # register signal handler
-from time import sleep          # Suspends execution for the given number of seconds
-from kInstr import INSTR_NAMES  # Dictionary mapping ints to strings
-from kNote import NOTE_NAMES    # Dictionary mapping ints to strings
-from pygame import midi
+from kInstr import INSTR_NAMES  # Tuple mapping ints to strings
+from kNote import NOTE_NAMES, GRID_LOW, GRID_HIGH  # Tuple mapping ints to strings, the grid's note range
+from tMidiBackend import tPygameBackend, tMidiDevices  # Default output backend, device list
+from tChanAlloc import tChanAlloc  # Instrument to MIDI channel allocator
+from tMidiOutThread import tMidiOutThread  # Output worker thread
+from tMidiScheduler import tMidiScheduler  # Timed note playback
+from tMidiRecorder import tMidiRecorder  # Streaming .mid recording
+from tEventLog import tEventLog  # Ring buffer of recent messages
+from tLatencyProbe import PROBE  # Latency instrumentation
+from threading import RLock     # Serializes callers on different threads
 from sys import stdout          # Output stream
 write = stdout.write            # Buffer stdout contents for write
 flush = stdout.flush            # Immediately write stdout contents
@@ -14,75 +21,388 @@ flush = stdout.flush            # Immediately write stdout contents
 
 class tMidiPlayer:
     """
-    tMidiPlayer: Manage MIDI output for playing notes with adjustable latency, utilizing pygame's midi module.
+    tMidiPlayer: Manage MIDI output for playing notes with adjustable latency, utilizing pygame's midi module
+    by default or any other tMidiBackend (e.g. tNullBackend or tRecordBackend without MIDI hardware).
 
     This class encapsulates functionality for initializing the MIDI system, creating a MIDI output port,
     and providing methods for playing and stopping MIDI notes. The LATENCY attribute is used to
     configure the delay between issuing MIDI commands and their execution, thus affecting the
     responsiveness of MIDI playback.
 
+    Program changes are elided: the player remembers the program last sent on each channel and only
+    sends a program change when a note asks for a different one.
+
+    Each instrument plays on its own channel, handed out by a tChanAlloc, so held notes of different
+    instruments sound together instead of being re-patched by the next program change. If a 16th
+    instrument arrives while every channel holds notes, the least recently used instrument's notes
+    are turned off before its channel is reused.
+
+    With bThreaded, messages are queued to a tMidiOutThread that owns the output, so callers on the
+    GUI thread never block in pygame.midi; Close() turns off held notes and flushes the queue.
+
+    On(), Off() and SetProgram() take an optional timestamp (ms, on output.Time()'s clock); messages
+    with one are written with that timestamp so the driver plays them then. tMidiScheduler uses this.
+
+    The player tracks what is sounding: dHeld for each (instrument, note) and vActive, one 128-bit
+    set per channel. IsOn() is a dictionary lookup, a repeated On() for a sounding note is retriggered
+    or suppressed according to nRepeatPolicy, an Off() for a silent note sends nothing, and
+    AllNotesOff()/Panic() send note-offs only for notes that are actually on.
+
+    Between BeginBatch() and EndBatch() messages are collected instead of sent, then written in one
+    output Write() (one tMidiOutThread.PutMany() in threaded mode) with a single timestamp, so the
+    notes of one input frame, e.g. several touch points, leave together. ChordOn() and ChordOff() play
+    the notes of a chord that way: one write, one timestamp, however many notes.
+
+    Scheduler() returns a tMidiScheduler shared by everything playing through this player (tCellVoice's
+    arpeggios), started on first use; Panic() cancels what it has pending and Close() stops it.
+
+    SetControl() sets a continuous controller (any CC, or PITCH_BEND) for everything that plays: the
+    value is sent to every channel in use, and a channel an instrument acquires later gets the current
+    values before its first note. Values a channel already has are not resent. tCtrlThrottle paces
+    the values coming from a slider before they get here.
+
+    The player is called from more than one thread (the GUI, tMidiScheduler's worker), so every method
+    that sends or changes note state holds oLock, a reentrant lock. BeginBatch() takes it and EndBatch()
+    releases it: a batch is one thread's, and no other thread's messages land in it.
+
+    StartRecording() streams every message sent from then on, starting with the programs already on
+    each channel, to a Standard MIDI File through a tMidiRecorder.
+
     Attributes:
         LATENCY (int): Latency in milliseconds, intended to adjust the responsiveness of MIDI message processing.
-        output (pygame.midi.Output): The MIDI output port for sending MIDI messages.
+        NUM_CHANNELS (int): Number of MIDI channels tracked.
+        output (tMidiBackend): The backend MIDI messages are sent to.
+        vPrograms (list): Program last sent on each channel, None if not yet sent.
+        nProgramChanges (int): Number of program change messages actually sent.
+        oChanAlloc (tChanAlloc): Maps instruments to channels.
+        dHeld (dict): (instrument, note) -> channel for notes turned on and not yet off.
+        vActive (list): Per channel, an int with bit n set while note n is on.
+        REPEAT_RETRIGGER, REPEAT_SUPPRESS (int): Repeat policies; what On() does with a note already on.
+        nRepeatPolicy (int): The current repeat policy, REPEAT_RETRIGGER by default.
+        oOutThread (tMidiOutThread): The output worker in threaded mode, None otherwise.
+        oLog (tEventLog): Ring buffer of messages sent; oLog.SetLevel(tEventLog.ECHO) prints them.
+        oRecorder (tMidiRecorder): The recording in progress, None if not recording.
+        MODULATION, EXPRESSION (int): Controller numbers; PITCH_BEND (128) stands for the pitch bend wheel.
+        BEND_CENTER (int): The pitch bend value of an unbent wheel; bend values are 14-bit (0-16383).
+        dControls (dict): controller -> value set with SetControl().
+        oLock (RLock): Held while the player's state changes or a batch is open.
 
     Methods:
-        __init__(output_id=0): Initializes the tMidiPlayer with a specified MIDI output port.
+        __init__(output_id=None, bThreaded=False, oBackend=None, bDeferred=False): Initializes the tMidiPlayer
+            with a MIDI output port (id, name, or None for the default), or with oBackend if given.
+            With bDeferred the port is only opened by the first note.
         __del__(): Destroys the tMidiPlayer object.
-        On(instrument, note, volume=127): Plays a MIDI note with the specified instrument and volume.
-        Off(instrument, note, volume=127): Stops a MIDI note with the specified instrument.
+        Close(): Turns off held notes, stops the output worker and closes the output.
+        On(instrument, note, volume=127, timestamp=None): Plays a MIDI note with the specified instrument and volume.
+        Off(instrument, note, volume=127, timestamp=None): Stops a MIDI note with the specified instrument.
+        SetProgram(instrument, channel=0, timestamp=None): Sends a program change if the channel is not already on it.
+        GetProgram(channel=0): Returns the program last sent on a channel.
+        IsOn(instrument, note): Returns True if the note is on.
+        ActiveNotes(channel): Returns the notes sounding on a channel.
+        SetRepeatPolicy(nPolicy): Changes what On() does with a note already on.
+        ChordOn(instrument, vNotes, volume=127, timestamp=None, fSpread=0): Turns on several notes in one batch.
+        ChordOff(instrument, vNotes, timestamp=None): Turns off several notes in one batch.
+        AllNotesOff(channel=None, timestamp=None): Turns off every note on, on one channel or all.
+        Panic(): Turns off every note on, then sends All Notes Off on every channel.
+        SetControl(controller, value, timestamp=None): Sets a controller on every channel in use; returns the messages sent.
+        GetControl(controller, default=None): Returns the value last set for a controller.
+        BeginBatch(): Collects messages from now on instead of sending them.
+        EndBatch(timestamp=None): Sends the collected messages in one write; returns how many.
+        Scheduler(): Returns the player's shared tMidiScheduler.
+        StartRecording(sPath): Starts recording to a .mid file.
+        StopRecording(): Finishes the recording.
     """
     LATENCY = 1  # Latency in milliseconds
-    def __init__(self, output_id: int = 0) -> None:
+    NUM_CHANNELS = 16
+    NOTE_OFF, NOTE_ON, CONTROL_CHANGE, PROGRAM_CHANGE = 0x80, 0x90, 0xB0, 0xC0  # Status bytes, channel in the low nibble
+    ALL_NOTES_OFF = 123  # Channel mode controller
+    PITCH_BEND_STATUS = 0xE0
+    MODULATION, EXPRESSION, PITCH_BEND = 1, 11, 128  # Controller numbers; 128 is not a CC, it selects pitch bend
+    BEND_CENTER = 8192
+    REPEAT_RETRIGGER, REPEAT_SUPPRESS = 0, 1
+    def __init__(self, output_id=None, bThreaded: bool = False, oBackend=None, bDeferred: bool = False) -> None:
         # __init__(): Constructor
-        # Implementation: pygame.midi method calls
-        midi.quit()
-        midi.init()
-        self.output = midi.Output(output_id, latency=tMidiPlayer.LATENCY)  # Get MIDI output w/ specified latency
-    def On(self, instrument: int, note: int, volume: int = 127) -> None:
+        # Implementation: pygame.midi backend unless another backend is given
+        if oBackend is None:  # Get MIDI output w/ specified latency
+            oBackend = tPygameBackend(output_id, tMidiPlayer.LATENCY, bDeferred)
+        self.output = oBackend
+        self.oLock = RLock()
+        self.vPrograms = [None] * tMidiPlayer.NUM_CHANNELS  # Device state unknown until first program change
+        self.nProgramChanges = 0
+        self.oChanAlloc = tChanAlloc(fnSteal=self._StealChannel)
+        self.dHeld = {}
+        self.vActive = [0] * tMidiPlayer.NUM_CHANNELS
+        self.nRepeatPolicy = tMidiPlayer.REPEAT_RETRIGGER
+        self.oOutThread = tMidiOutThread(self.output, self.output.Time) if bThreaded else None
+        self.oLog = tEventLog()
+        self.bPlayed = False  # Set by the first note, for the first-note startup milestone
+        self.oRecorder = None
+        self._vBatch = None  # Messages collected between BeginBatch() and EndBatch(), by the thread holding oLock
+        self.dControls = {}
+        self._vChanControls = [{} for _ in range(tMidiPlayer.NUM_CHANNELS)]  # Per channel, controller -> value sent
+        self._oScheduler = None  # Started by the first Scheduler() call
+    def _Send(self, status: int, data1: int, data2: int = 0, timestamp: float = None) -> None:
+        # _Send(): Writes one short message, or queues it to the output worker in threaded mode.
+        # A timestamped message is written with its timestamp instead of 'now'.
+        if self.oLog.nLevel:
+            self.oLog.Add(status, data1, data2)
+        if self.oRecorder:
+            self.oRecorder.Add(status, data1, data2, timestamp)
+        if self._vBatch is not None:
+            self._vBatch.append((status, data1, data2, timestamp))
+        elif self.oOutThread:
+            self.oOutThread.Put(status, data1, data2, timestamp)
+        else:
+            if PROBE.bEnabled:
+                PROBE.End(PROBE.INPUT_TO_MIDI)
+            if timestamp is None:
+                self.output.WriteShort(status, data1, data2)
+            else:
+                self.output.Write([[[status, data1, data2], timestamp]])
+    def SetProgram(self, instrument: int, channel: int = 0, timestamp: float = None) -> bool:
+        # SetProgram(): Sends a program change only if the channel is on a different program.
+        # Returns True if a message was sent.
+        with self.oLock:
+            if self.vPrograms[channel] == instrument:
+                return False
+            self._Send(tMidiPlayer.PROGRAM_CHANGE | channel, instrument, 0, timestamp)
+            self.vPrograms[channel] = instrument
+            self.nProgramChanges += 1
+            return True
+    def GetProgram(self, channel: int = 0):
+        # GetProgram(): Returns the program last sent on the channel, None if none was sent.
+        return self.vPrograms[channel]
+    def On(self, instrument: int, note: int, volume: int = 127, timestamp: float = None) -> None:
         # On(): Turns on a MIDI note with the specified instrument and volume.
         # Implementation: pygame.midi method calls
-        print(f"On(): Instrument {INSTR_NAMES[instrument]}, Note {NOTE_NAMES[note]}, Volume {volume}")
-        self.output.set_instrument(instrument)
-        self.output.note_on(note, volume)
-    def Off(self, instrument: int, note: int, volume: int = 127) -> None:
+        with self.oLock:
+            channel = self.dHeld.get((instrument, note))
+            if channel is not None:  # Already on: retrigger it on its channel, or leave it sounding
+                if self.nRepeatPolicy == tMidiPlayer.REPEAT_RETRIGGER:
+                    self._Send(tMidiPlayer.NOTE_OFF | channel, note, 0, timestamp)
+                    self._Send(tMidiPlayer.NOTE_ON | channel, note, volume, timestamp)
+                return
+            channel = self.oChanAlloc.Acquire(instrument)
+            self.SetProgram(instrument, channel, timestamp)
+            if self.dControls and self._vChanControls[channel] != self.dControls:
+                for controller, value in self.dControls.items():  # A channel new to the controls catches up
+                    self._SendControl(channel, controller, value, timestamp)
+            self.dHeld[(instrument, note)] = channel
+            self.vActive[channel] |= 1 << note
+            self._Send(tMidiPlayer.NOTE_ON | channel, note, volume, timestamp)
+            if not self.bPlayed:
+                self.bPlayed = True
+                PROBE.Milestone('first_note')
+    def Off(self, instrument: int, note: int, volume: int = 127, timestamp: float = None) -> None:
         # Off(): Turns off a MIDI note.
         # Implementation:  pygame.midi method calls
-        print(f"Off(): Instrument {INSTR_NAMES[instrument]}, Note {NOTE_NAMES[note]}, Volume {volume}")
-        self.output.set_instrument(instrument)
-        self.output.note_off(note, volume)
+        # Note-off does not depend on the program, so no program change is sent; one here
+        # would only re-patch whatever else is sounding on the channel.
+        with self.oLock:
+            channel = self.dHeld.pop((instrument, note), None)
+            if channel is None:  # Not on; e.g. a second release, or already turned off by AllNotesOff()
+                return
+            self.oChanAlloc.Release(channel)
+            self.vActive[channel] &= ~(1 << note)
+            self._Send(tMidiPlayer.NOTE_OFF | channel, note, volume, timestamp)
+    def ChordOn(self, instrument: int, vNotes, volume: int = 127, timestamp: float = None, fSpread: float = 0) -> None:
+        # ChordOn(): Turns on every note of vNotes, written together with one timestamp (or now). With fSpread
+        # each note is stamped fSpread ms after the one before (a strum), still in the same write.
+        # Inside a caller's batch the notes join it; a single note is a plain On(). Holds oLock throughout.
+        with self.oLock:
+            if fSpread and timestamp is None:
+                timestamp = self.output.Time()
+            vTimes = [timestamp + fSpread * n for n in range(len(vNotes))] if fSpread else [None] * len(vNotes)
+            if len(vNotes) == 1 or self._vBatch is not None:
+                for note, fTime in zip(vNotes, vTimes):
+                    self.On(instrument, note, volume, timestamp if fTime is None else fTime)
+                return
+            self.BeginBatch()
+            try:
+                for note, fTime in zip(vNotes, vTimes):
+                    self.On(instrument, note, volume, fTime)
+            finally:
+                self.EndBatch(timestamp)
+    def ChordOff(self, instrument: int, vNotes, timestamp: float = None) -> None:
+        # ChordOff(): Turns off every note of vNotes, written together like ChordOn().
+        with self.oLock:
+            if len(vNotes) == 1 or self._vBatch is not None:
+                for note in vNotes:
+                    self.Off(instrument, note, timestamp=timestamp)
+                return
+            self.BeginBatch()
+            try:
+                for note in vNotes:
+                    self.Off(instrument, note)
+            finally:
+                self.EndBatch(timestamp)
+    def _StealChannel(self, channel: int, instrument: int) -> None:
+        # _StealChannel(): Every channel holds notes and tChanAlloc is taking this one from instrument;
+        # its notes are turned off and forgotten first, so their later Off() sends and releases nothing.
+        self.AllNotesOff(channel)
+    def IsOn(self, instrument: int, note: int) -> bool:
+        # IsOn(): Returns True if the note was turned on with this instrument and not yet off.
+        return (instrument, note) in self.dHeld
+    def ActiveNotes(self, channel: int) -> list:
+        # ActiveNotes(): Returns the notes sounding on the channel, lowest first.
+        bits, vNotes = self.vActive[channel], []
+        while bits:
+            low = bits & -bits
+            vNotes.append(low.bit_length() - 1)
+            bits ^= low
+        return vNotes
+    def SetRepeatPolicy(self, nPolicy: int) -> None:
+        # SetRepeatPolicy(): REPEAT_RETRIGGER sends note off and on again for a note already on;
+        # REPEAT_SUPPRESS ignores the second On(). Either way one Off() ends the note.
+        assert nPolicy in (tMidiPlayer.REPEAT_RETRIGGER, tMidiPlayer.REPEAT_SUPPRESS), \
+            f'ERR: tMidiPlayer: Unknown repeat policy {nPolicy}.'
+        self.nRepeatPolicy = nPolicy
+    def AllNotesOff(self, channel: int = None, timestamp: float = None) -> int:
+        # AllNotesOff(): Sends a note off for every note on, on channel or on all channels.
+        # Returns the number of note offs sent; silent channels cost nothing.
+        with self.oLock:
+            vChannels = range(tMidiPlayer.NUM_CHANNELS) if channel is None else (channel,)
+            nSent = 0
+            for channel in vChannels:
+                if not self.vActive[channel]:
+                    continue
+                for note in self.ActiveNotes(channel):
+                    self._Send(tMidiPlayer.NOTE_OFF | channel, note, 0, timestamp)
+                    self.oChanAlloc.Release(channel)
+                    nSent += 1
+                self.vActive[channel] = 0
+            if nSent:
+                self.dHeld = {key: c for key, c in self.dHeld.items() if c not in vChannels}
+            return nSent
+    def Panic(self) -> None:
+        # Panic(): AllNotesOff(), then the All Notes Off controller on every channel for anything
+        # the player does not know about (e.g. notes left on by another program). Scheduled notes are dropped.
+        with self.oLock:
+            if self._oScheduler:
+                self._oScheduler.Cancel()
+            self.AllNotesOff()
+            for channel in range(tMidiPlayer.NUM_CHANNELS):
+                self._Send(tMidiPlayer.CONTROL_CHANGE | channel, tMidiPlayer.ALL_NOTES_OFF, 0)
+    def _SendControl(self, channel: int, controller: int, value: int, timestamp: float = None) -> int:
+        # _SendControl(): Sends one controller value on a channel unless the channel has it; returns 0 or 1.
+        dSent = self._vChanControls[channel]
+        if dSent.get(controller) == value:
+            return 0
+        dSent[controller] = value
+        if controller == tMidiPlayer.PITCH_BEND:
+            self._Send(tMidiPlayer.PITCH_BEND_STATUS | channel, value & 0x7F, value >> 7, timestamp)
+        else:
+            self._Send(tMidiPlayer.CONTROL_CHANGE | channel, controller, value, timestamp)
+        return 1
+    def SetControl(self, controller: int, value: int, timestamp: float = None) -> int:
+        # SetControl(): Sets a CC (0-119, value 0-127) or PITCH_BEND (value 0-16383) on every channel in use.
+        # Returns the number of messages sent, for tCtrlThrottle's budget.
+        with self.oLock:
+            assert 0 <= controller < 120 or controller == tMidiPlayer.PITCH_BEND, \
+                f'ERR: tMidiPlayer: Controller {controller} is not a continuous controller.'
+            assert 0 <= value <= (16383 if controller == tMidiPlayer.PITCH_BEND else 127), \
+                f'ERR: tMidiPlayer: Value {value} out of range for controller {controller}.'
+            self.dControls[controller] = value
+            nSent = 0
+            for channel in self.oChanAlloc.Assignments():
+                nSent += self._SendControl(channel, controller, value, timestamp)
+            return nSent
+    def GetControl(self, controller: int, default: int = None):
+        # GetControl(): Returns the value last set for controller, default if none.
+        return self.dControls.get(controller, default)
+    def BeginBatch(self) -> None:
+        # BeginBatch(): Collects messages until EndBatch(); batches do not nest. Holds oLock until EndBatch().
+        self.oLock.acquire()
+        if self._vBatch is not None:
+            self.oLock.release()
+            raise AssertionError('ERR: tMidiPlayer: BeginBatch() inside a batch.')
+        self._vBatch = []
+    def EndBatch(self, timestamp: float = None) -> int:
+        # EndBatch(): Sends the collected messages in one write, stamped with timestamp (or now) unless
+        # they carry their own. Returns the number of messages sent, and releases oLock.
+        try:
+            vBatch, self._vBatch = self._vBatch, None
+            if not vBatch:
+                return 0
+            if self.oOutThread:
+                self.oOutThread.PutMany([(s, d1, d2, timestamp if t is None else t) for s, d1, d2, t in vBatch])
+                return len(vBatch)
+            if PROBE.bEnabled:
+                PROBE.End(PROBE.INPUT_TO_MIDI)
+            if timestamp is None:
+                timestamp = self.output.Time()
+            self.output.Write([[[s, d1, d2], timestamp if t is None else t] for s, d1, d2, t in vBatch])
+            return len(vBatch)
+        finally:
+            self.oLock.release()
+    def Scheduler(self) -> tMidiScheduler:
+        # Scheduler(): The scheduler shared by everything playing through this player, started on first use.
+        with self.oLock:
+            if self._oScheduler is None:
+                self._oScheduler = tMidiScheduler(self)
+            return self._oScheduler
+    def StartRecording(self, sPath: str) -> tMidiRecorder:
+        # StartRecording(): Records every message sent from now on to a Standard MIDI File.
+        # The programs already on each channel are recorded first, since elided changes are never resent.
+        with self.oLock:
+            self.StopRecording()
+            oRecorder = tMidiRecorder(sPath, fnClock=self.output.Time)
+            for channel, instrument in enumerate(self.vPrograms):
+                if instrument is not None:
+                    oRecorder.Add(tMidiPlayer.PROGRAM_CHANGE | channel, instrument)
+            self.oRecorder = oRecorder
+            return oRecorder
+    def StopRecording(self) -> None:
+        # StopRecording(): Finishes the file of the recording in progress, if any.
+        with self.oLock:
+            oRecorder, self.oRecorder = self.oRecorder, None
+            if oRecorder:
+                oRecorder.Close()
+    def Close(self) -> None:
+        # Close(): Turns off every held note, drains the output worker and closes the output.
+        if getattr(self, 'output', None) is None:
+            return
+        if self._oScheduler:
+            self._oScheduler.Stop()  # Turns off the notes it left on; not under oLock, its worker may be waiting for it
+            self._oScheduler = None
+        with self.oLock:
+            self.AllNotesOff()
+            self.StopRecording()  # After the note-offs, so the file has them
+            if self.oOutThread:
+                self.oOutThread.Stop()  # Writes everything still queued, including the note-offs above
+                self.oOutThread = None
+        try:
+            self.output.Close()
+        except Exception as e:
+            print(f"Error occurred while closing MIDI output: {e}")
+        self.output = None
     def __del__(self):
-        # __del__(): Ensures proper cleanup by closing the MIDI output and quitting the MIDI system.
-        # Implementation: pygame.midi method calls
+        # __del__(): Ensures proper cleanup by closing the MIDI output (the pygame backend quits the MIDI system).
         # print('tMidiPlayer: Destructor called.')
-        if hasattr(self, 'output') and self.output:
-            try:
-                self.output.close()
-            except Exception as e:
-                print(f"Error occurred while closing MIDI output: {e}")
-        midi.quit()
+        self.Close()
     @staticmethod
     def main():
         signal(SIGINT, lambda signum, frame: (write("\nExiting gracefully...\n"),
                                               flush(),
                                               exit(0)))
-        oMidiPlayer = tMidiPlayer(1)  # Assuming MIDI device ID 1 is correct
-        vNotes = list(NOTE_NAMES.keys())
-        vInstruments = list(INSTR_NAMES.keys())
+        for nId, sInterface, sName, bInput, bOutput, bOpened in tMidiDevices.Outputs():
+            write(f"Output {nId}: {sName} ({sInterface})\n")
+        oMidiPlayer = tMidiPlayer(argv[1] if len(argv) > 1 else None)  # Device id or name, default output if none
+        oScheduler = tMidiScheduler(oMidiPlayer)
+        vNotes = range(GRID_LOW, GRID_HIGH + 1)
+        vInstruments = range(len(INSTR_NAMES))
+        nDuration = 1000  # Play each note for 1 second
+        fTime = oScheduler.Now() + 100
         while True:
             nNote = choice(vNotes)
             nInstr = choice(vInstruments)
+            # Schedule the next note on the output clock; times are absolute, so nothing drifts
+            oScheduler.NoteAt(fTime, nDuration, nInstr, nNote)
+            oScheduler.SleepUntil(fTime)
             # Print instrument and note selection and flush output
-            write(f"Playing: {NOTE_NAMES[nNote]}, Instrument: {INSTR_NAMES[nInstr]} - ON ")
+            write(f"Playing: {NOTE_NAMES[nNote]}, Instrument: {INSTR_NAMES[nInstr]}\n")
             flush()
-            try:
-                oMidiPlayer.On(nInstr, nNote)
-                sleep(1)  # Play note for 1 second
-                write("OFF\n")
-                flush()
-                oMidiPlayer.Off(nInstr, nNote)
-            except Exception as e:
-                print(f"Error handling MIDI output: {e}")
-                break  # Optional: Break the loop on error, or you could continue depending on your use case.
+            fTime += nDuration
         del oMidiPlayer
 if __name__ == "__main__":
     tMidiPlayer.main()
@@ -0,0 +1,204 @@
+# tMidiRecorder.py: Streaming Standard MIDI File Recorder Class
+"""
+tMidiRecorder.py
+
+Records MIDI messages to a Standard MIDI File while they are played.
+
+Add() may be called from any thread (the GUI, tMidiScheduler's worker) and only stores the message
+and its time in preallocated arrays used as a ring, the same layout tEventLog uses; a lock held for
+the few stores of one slot keeps two producers from claiming the same one. A writer thread wakes every FLUSH_MS, encodes
+whatever has arrived since its last pass and appends it to the file, so memory stays at the size of
+the ring however long the session runs, and the file on disk is complete up to the last flush. If
+the writer ever falls a whole ring behind, new messages are counted in nDropped rather than blocking
+the player.
+
+The file is format 0 (one track) at 1000 ticks per quarter note and 60 bpm, so one tick is one
+millisecond. Producers on different threads can add messages slightly out of time order, so each
+block is sorted by time before it is encoded; a message older than one already written goes out with
+a zero delta, and the track position does not move back for it. The track length in the header is written as 0 and patched on Close(); most readers
+accept the file even before that.
+
+Classes:
+    tMidiRecorder -- Ring buffer plus writer thread streaming to a .mid file.
+
+Usage:
+    >>> oPlayer.StartRecording('take.mid')
+    >>> ...
+    >>> oPlayer.StopRecording()
+"""
+from array import array
+from struct import pack
+from threading import Event, Lock, Thread
+from time import perf_counter
+
+
+class tMidiRecorder:
+    """
+    tMidiRecorder streams recorded MIDI messages to a Standard MIDI File.
+
+    Attributes:
+        SIZE (int): Default ring size in messages.
+        FLUSH_MS (int): Interval between writer passes.
+        TICKS (int): Ticks per quarter note; with TEMPO, one tick per millisecond.
+        TEMPO (int): Microseconds per quarter note.
+        sPath (str): The file written.
+        nRecorded (int): Number of messages written to the file.
+        nDropped (int): Number of messages lost because the ring was full.
+
+    Methods:
+        Add(status, data1, data2=0, fTime=None): Records one message at fTime (ms) or now.
+        Flush(): Writes everything recorded so far to the file (writer thread only).
+        Close(): Writes the rest, ends the track and closes the file.
+    """
+    SIZE = 4096
+    FLUSH_MS = 250
+    TICKS = 1000
+    TEMPO = 1000000  # 60 bpm
+
+    def __init__(self, sPath: str, nSize: int = SIZE, fnClock=None) -> None:
+        assert nSize > 0, f'ERR: tMidiRecorder: nSize {nSize} must be positive.'
+        self.sPath = sPath
+        self.nSize = nSize
+        self.fnClock = fnClock or (lambda: perf_counter() * 1000)
+        self._vTime = array('d', bytes(8 * nSize))
+        self._vStatus = array('B', bytes(nSize))
+        self._vData1 = array('B', bytes(nSize))
+        self._vData2 = array('B', bytes(nSize))
+        self._nHead = 0    # Messages added; only Add() writes it, under _oLock
+        self._nTail = 0    # Messages written; only the writer writes it
+        self.nRecorded, self.nDropped = 0, 0
+        self._oLock = Lock()  # Serializes producers; the writer does not take it
+        self._fLast = None  # Track position (ms) of the last message written, for delta times; never moves back
+        self._nTrackBytes = 0
+        self._oFile = open(sPath, 'wb')
+        self._oFile.write(b'MThd' + pack('>IHHH', 6, 0, 1, self.TICKS))
+        self._oFile.write(b'MTrk' + pack('>I', 0))  # Length patched by Close()
+        self._WriteTrack(b'\x00\xFF\x51\x03' + self.TEMPO.to_bytes(3, 'big'))
+        self._oWake = Event()
+        self._bRun = True
+        self._oThread = Thread(target=self._Run, name='tMidiRecorder', daemon=True)
+        self._oThread.start()
+
+    def Add(self, status: int, data1: int, data2: int = 0, fTime: float = None) -> None:
+        # Add(): Stores a message in the ring; never waits for the writer and never touches the file.
+        if fTime is None:
+            fTime = self.fnClock()
+        with self._oLock:
+            nHead = self._nHead
+            if nHead - self._nTail >= self.nSize:
+                self.nDropped += 1
+                return
+            i = nHead % self.nSize
+            self._vTime[i] = fTime
+            self._vStatus[i] = status
+            self._vData1[i] = data1
+            self._vData2[i] = data2
+            self._nHead = nHead + 1  # Published last, so the writer never sees a half-written slot
+
+    @staticmethod
+    def _VarLen(n: int) -> bytes:
+        # _VarLen(): SMF variable-length quantity, 7 bits per byte, most significant first.
+        vBytes = [n & 0x7F]
+        n >>= 7
+        while n:
+            vBytes.append(0x80 | (n & 0x7F))
+            n >>= 7
+        return bytes(reversed(vBytes))
+
+    def _WriteTrack(self, sBytes: bytes) -> None:
+        self._oFile.write(sBytes)
+        self._nTrackBytes += len(sBytes)
+
+    def _Encode(self) -> bytes:
+        # _Encode(): Encodes messages between tail and head as track events, in time order.
+        vOut = bytearray()
+        nHead, fLast = self._nHead, self._fLast
+        vIndex = [nIndex % self.nSize for nIndex in range(self._nTail, nHead)]
+        vIndex.sort(key=self._vTime.__getitem__)  # Stable: messages with the same time keep the order they were added
+        for i in vIndex:
+            fTime, status = self._vTime[i], self._vStatus[i]
+            if fLast is None:
+                fLast = fTime
+            nDelta = max(0, round(fTime - fLast))  # One tick per ms; a late arrival is written at the current position
+            fLast += nDelta  # Whole ticks, so rounding never accumulates
+            vOut += self._VarLen(nDelta)
+            vOut.append(status)
+            vOut.append(self._vData1[i])
+            if status & 0xE0 != 0xC0:  # Program change and channel pressure have one data byte
+                vOut.append(self._vData2[i])
+        self._fLast = fLast
+        self.nRecorded += nHead - self._nTail
+        self._nTail = nHead
+        return bytes(vOut)
+
+    def Flush(self) -> None:
+        # Flush(): Encodes and writes pending messages; only the writer thread, or Close() once it has stopped it, calls this.
+        sBytes = self._Encode()
+        if sBytes:
+            self._WriteTrack(sBytes)
+            self._oFile.flush()
+
+    def _Run(self) -> None:
+        # _Run(): Writer loop; one pass every FLUSH_MS until Close().
+        while self._bRun:
+            self._oWake.wait(self.FLUSH_MS / 1000)
+            self._oWake.clear()
+            try:
+                self.Flush()
+            except Exception as e:
+                print(f"Error occurred while writing MIDI file: {e}")
+
+    def Close(self) -> None:
+        # Close(): Stops the writer, writes the remaining messages and the end of track, patches the length.
+        if self._oFile.closed:
+            return
+        self._bRun = False
+        self._oWake.set()
+        self._oThread.join()
+        self.Flush()
+        self._WriteTrack(b'\x00\xFF\x2F\x00')  # End of track
+        self._oFile.seek(18)  # MThd chunk (14 bytes) + 'MTrk'
+        self._oFile.write(pack('>I', self._nTrackBytes))
+        self._oFile.close()
+
+
+if __name__ == "__main__":
+    from os import path
+    from tempfile import gettempdir
+    sPath = path.join(gettempdir(), 'tMidiRecorder.mid')
+    oRec = tMidiRecorder(sPath, nSize=256)
+    oRec.Add(0xC0, 21, 0, 0.0)
+    for n in range(200):
+        oRec.Add(0x90, 60 + n % 12, 100, 10.0 * n)
+        oRec.Add(0x80, 60 + n % 12, 0, 10.0 * n + 5)
+    oRec.Close()
+    assert oRec.nRecorded + oRec.nDropped == 401
+    with open(sPath, 'rb') as f:
+        sData = f.read()
+    assert sData[:4] == b'MThd' and sData[14:18] == b'MTrk' and sData.endswith(b'\xFF\x2F\x00')
+    assert int.from_bytes(sData[18:22], 'big') == len(sData) - 22
+    oSorted = tMidiRecorder(sPath)
+    for fTime, note in ((0.0, 60), (30.0, 63), (10.0, 61), (20.0, 62)):  # Out of order within one block
+        oSorted.Add(0x90, note, 100, fTime)
+    from time import sleep
+    while oSorted.nRecorded < 4:  # The writer's first pass encodes the four as one block
+        sleep(0.01)
+    oSorted.Add(0x90, 59, 100, 25.0)  # Older than the last message written
+    oSorted.Add(0x90, 64, 100, 40.0)
+    oSorted.Close()
+    with open(sPath, 'rb') as f:
+        sEvents = f.read()[29:-4]  # Header, track header and tempo; end of track
+    assert [tuple(sEvents[n:n + 4:2]) for n in range(0, len(sEvents), 4)] == \
+        [(0, 60), (10, 61), (10, 62), (10, 63), (0, 59), (10, 64)]
+    from threading import Thread
+    oMulti = tMidiRecorder(path.join(gettempdir(), 'tMidiRecorderMulti.mid'), nSize=8192)
+    vThreads = [Thread(target=lambda c=c: [oMulti.Add(0x90 | c, n % 128, 100, float(n)) for n in range(2000)])
+                for c in range(4)]  # Four producers at once
+    for oThread in vThreads:
+        oThread.start()
+    for oThread in vThreads:
+        oThread.join()
+    oMulti.Close()
+    vSlots = sorted(zip(oMulti._vStatus[:8000], oMulti._vTime[:8000]))
+    assert oMulti.nRecorded == 8000 and vSlots == sorted((0x90 | c, float(n)) for c in range(4) for n in range(2000))
+    print(f'{oRec.nRecorded} recorded, {oRec.nDropped} dropped, {len(sData)} bytes in {sPath}')
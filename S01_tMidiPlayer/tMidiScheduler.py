@@ -0,0 +1,260 @@
+# tMidiScheduler.py: Timed MIDI Note Scheduler Class
+"""
+tMidiScheduler.py
+
+Plays notes at given times instead of 'now'. Events are kept in a heap ordered by time on the
+output backend's clock (milliseconds; tPygameBackend's own clock, shifted onto PortMidi's as it
+writes). A worker thread sleeps until the earliest event is within LOOKAHEAD milliseconds, then
+hands every event in that window to tMidiPlayer with its exact timestamp. With a non-zero output latency, pygame.midi's
+timestamped write() leaves the final placement to the driver, so the worker's wake-up jitter does
+not reach the notes.
+
+Times are absolute, never relative to the previous event, so a sequence scheduled as start + n * step
+does not drift however long it runs. Any number of notes can be pending or overlapping; the worker
+waits on a Condition, not in a polling loop.
+
+CallAt() schedules a function instead of a note; the worker calls it LOOKAHEAD ms ahead of its time,
+with that time, so a repeating pattern (tCellVoice's arpeggios) can schedule its next step from
+the step before, without a timer on the GUI thread.
+
+The worker calls the player, and CallAt() functions, from its own thread, holding the player's oLock
+for each window it dispatches, so notes played live on the same player meanwhile (and their batches)
+wait for it rather than interleave with it. Lock order is oLock, then the scheduler's Condition; the
+worker never waits for oLock while holding the Condition, and takes oLock before it pops a window, so
+a Cancel() never falls between an event leaving the heap and reaching the player. With PortMidi live notes queue behind events
+already written up to LOOKAHEAD ms ahead, so keep LOOKAHEAD short when mixing the two.
+
+Classes:
+    tMidiScheduler -- Time-ordered queue of note on/off events dispatched ahead of time.
+
+Usage:
+    >>> oSched = tMidiScheduler(tMidiPlayer())
+    >>> fStart = oSched.Now() + 100
+    >>> for i, nNote in enumerate((60, 64, 67)):
+    ...     oSched.NoteAt(fStart + 250 * i, 250, 0, nNote)
+    >>> oSched.Wait()
+"""
+from heapq import heappop, heappush
+from itertools import count
+from threading import Condition, Thread
+from time import sleep
+
+
+class tMidiScheduler:
+    """
+    tMidiScheduler dispatches timed note events to a tMidiPlayer from a worker thread.
+
+    Attributes:
+        LOOKAHEAD (float): How far ahead of its time (ms) an event is handed to the player.
+        oPlayer (tMidiPlayer): The player notes are sent through.
+        nDispatched (int): Number of events handed to the player.
+
+    Methods:
+        Now(): Returns the current time (ms) on the output clock.
+        OnAt(fTime, instrument, note, volume=127): Schedules a note on.
+        OffAt(fTime, instrument, note): Schedules a note off.
+        NoteAt(fTime, fDuration, instrument, note, volume=127): Schedules a note on and its note off.
+        CallAt(fTime, fnCall): Schedules fnCall(fTime), called on the worker thread.
+        Pending(): Returns the number of events not yet dispatched.
+        Cancel(): Drops every pending event and turns off notes the scheduler left on.
+        Wait(timeout=None): Blocks until every pending event has been dispatched.
+        SleepUntil(fTime): Blocks the caller until fTime on the output clock.
+        Stop(): Ends the worker thread; pending events are dropped.
+    """
+    LOOKAHEAD = 20  # ms
+    ON, OFF, CALL = 1, 0, 2  # Event kinds; OFF sorts first, so a note off and an on at the same time free the channel first
+
+    def __init__(self, oPlayer, fLookahead: float = LOOKAHEAD) -> None:
+        self.oPlayer = oPlayer
+        self.LOOKAHEAD = fLookahead
+        self.nDispatched = 0
+        self._vHeap = []       # (time, kind, sequence, instrument, note, volume); a CALL has the function as instrument
+        self._nSeq = count()   # Keeps events with equal time and kind in the order they were added
+        self._dOn = {}         # (instrument, note) -> number of scheduled note ons dispatched and not yet off
+        self._oCond = Condition()
+        self._bRun = True
+        self._oThread = Thread(target=self._Run, name='tMidiScheduler', daemon=True)
+        self._oThread.start()
+
+    def Now(self) -> float:
+        # Now(): The output clock; every scheduled time is on this clock.
+        return self.oPlayer.output.Time()
+
+    def _Push(self, fTime: float, nKind: int, instrument: int, note: int, volume: int) -> None:
+        with self._oCond:
+            bEarliest = not self._vHeap or fTime < self._vHeap[0][0]
+            heappush(self._vHeap, (fTime, nKind, next(self._nSeq), instrument, note, volume))
+            if bEarliest:
+                self._oCond.notify()  # The worker may be sleeping until a later event
+
+    def OnAt(self, fTime: float, instrument: int, note: int, volume: int = 127) -> None:
+        # OnAt(): Schedules a note on at fTime (ms, output clock).
+        self._Push(fTime, self.ON, instrument, note, volume)
+
+    def OffAt(self, fTime: float, instrument: int, note: int) -> None:
+        # OffAt(): Schedules a note off at fTime (ms, output clock).
+        self._Push(fTime, self.OFF, instrument, note, 0)
+
+    def NoteAt(self, fTime: float, fDuration: float, instrument: int, note: int, volume: int = 127) -> None:
+        # NoteAt(): Schedules a note lasting fDuration ms from fTime.
+        assert fDuration > 0, f'ERR: tMidiScheduler: Duration {fDuration} must be positive.'
+        self.OnAt(fTime, instrument, note, volume)
+        self.OffAt(fTime + fDuration, instrument, note)
+
+    def CallAt(self, fTime: float, fnCall) -> None:
+        # CallAt(): Schedules fnCall(fTime) on the worker, LOOKAHEAD ms before fTime; after notes due at the same time.
+        self._Push(fTime, self.CALL, fnCall, 0, 0)
+
+    def Pending(self) -> int:
+        return len(self._vHeap)
+
+    def _Run(self) -> None:
+        # _Run(): Worker loop; sleeps until the earliest event is due, then dispatches the window. The window is
+        # popped and dispatched under one hold of the player's oLock, so a Cancel() (e.g. from Panic()) comes
+        # either before the pop, and nothing of the window plays, or after the dispatch, and turns it off.
+        vDue = []
+        while True:
+            with self._oCond:
+                while self._bRun:
+                    if not self._vHeap:
+                        self._oCond.wait()
+                        continue
+                    fWait = self._vHeap[0][0] - self.LOOKAHEAD - self.Now()
+                    if fWait <= 0:
+                        break
+                    self._oCond.wait(fWait / 1000)
+                if not self._bRun:
+                    return
+            with self.oPlayer.oLock:  # Lock order: oLock, then the Condition
+                with self._oCond:
+                    if not self._bRun:
+                        return
+                    fHorizon = self.Now() + self.LOOKAHEAD
+                    while self._vHeap and self._vHeap[0][0] <= fHorizon:
+                        vDue.append(heappop(self._vHeap))
+                self._Dispatch(vDue)
+            vDue.clear()
+            with self._oCond:
+                if not self._vHeap:
+                    self._oCond.notify_all()  # Wake Wait()
+
+    def _Dispatch(self, vDue: list) -> None:
+        # _Dispatch(): Hands events to the player in time order, each stamped with its own time; _Run() holds oLock.
+        oPlayer, dOn = self.oPlayer, self._dOn
+        for fTime, nKind, _, instrument, note, volume in vDue:
+            key = (instrument, note)
+            try:
+                if nKind == self.CALL:
+                    instrument(fTime)
+                elif nKind == self.ON:
+                    oPlayer.On(instrument, note, volume, timestamp=fTime)
+                    dOn[key] = dOn.get(key, 0) + 1
+                elif dOn.get(key):
+                    oPlayer.Off(instrument, note, timestamp=fTime)
+                    dOn[key] -= 1
+                    if not dOn[key]:
+                        del dOn[key]
+            except Exception as e:
+                print(f"Error occurred while dispatching scheduled MIDI event: {e}")
+            self.nDispatched += 1
+
+    def Cancel(self) -> None:
+        # Cancel(): Drops pending events; notes already turned on by the scheduler are turned off now.
+        with self._oCond:
+            self._vHeap.clear()
+            self._oCond.notify_all()
+        with self.oPlayer.oLock:  # Not while holding the Condition: the lock order is oLock first
+            for (instrument, note), nOn in list(self._dOn.items()):
+                for _ in range(nOn):
+                    self.oPlayer.Off(instrument, note)
+            self._dOn.clear()
+
+    def Wait(self, timeout: float = None) -> bool:
+        # Wait(): Blocks until no event is pending (timeout in seconds). Returns False on timeout.
+        with self._oCond:
+            return self._oCond.wait_for(lambda: not self._vHeap or not self._bRun, timeout)
+
+    def SleepUntil(self, fTime: float) -> None:
+        # SleepUntil(): Blocks until fTime on the output clock; for callers scheduling in chunks.
+        fWait = fTime - self.Now()
+        if fWait > 0:
+            sleep(fWait / 1000)
+
+    def Stop(self, timeout: float = 1.0) -> None:
+        # Stop(): Ends the worker; pending events are dropped, notes it left on are turned off.
+        if self._oThread.is_alive():
+            with self._oCond:
+                self._bRun = False
+                self._oCond.notify_all()
+            self._oThread.join(timeout)
+        self.Cancel()
+
+
+if __name__ == "__main__":
+    from tMidiPlayer import tMidiPlayer
+    from tMidiBackend import tRecordBackend
+    oPlayer = tMidiPlayer(oBackend=tRecordBackend())
+    oSched = tMidiScheduler(oPlayer)
+    fStart = oSched.Now() + 50
+    for i in range(2000):  # Overlapping notes, added out of order
+        oSched.NoteAt(fStart + (i * 7919) % 500, 40, 0, 36 + i % 48)
+    assert oSched.Wait(5.0)
+    vMsgs = oPlayer.output.Messages()
+    vTimes = [m[0] for m in vMsgs]
+    assert vTimes == sorted(vTimes) and oSched.nDispatched == 4000
+    assert sum(1 for m in vMsgs if m[1] & 0xF0 == 0x90) == 2000 and not oPlayer.dHeld
+    vCalls = []
+    def Step(fTime, n=[0]):  # Reschedules itself: four steps 10 ms apart, each playing a note
+        oSched.NoteAt(fTime, 5, 0, 60 + n[0])
+        vCalls.append(fTime)
+        n[0] += 1
+        if n[0] < 4:
+            oSched.CallAt(fTime + 10, Step)
+    oSched.CallAt(oSched.Now() + 10, Step)
+    assert oSched.Wait(5.0) and len(vCalls) == 4 and oPlayer.output.Messages()[-1][1:3] == (0x80, 63)
+    from threading import Thread
+    from sys import setswitchinterval
+    setswitchinterval(1e-6)  # Switch threads often, so unlocked interleavings would show
+    nBefore = len(oPlayer.output.Messages())
+    fStart = oSched.Now() + 10
+    for i in range(1000):  # Scheduled notes on four instruments while another thread plays the same ones live
+        oSched.NoteAt(fStart + (i * 7919) % 300, 15, i % 4, 48 + i % 24)
+    def Live():
+        for i in range(3000):
+            instrument, note = (i * 3) % 4, 48 + (i * 5) % 24
+            if i % 3:
+                oPlayer.On(instrument, note)
+                oPlayer.Off(instrument, note)
+            else:
+                oPlayer.BeginBatch()
+                oPlayer.On(instrument, note)
+                oPlayer.On(instrument, note + 1)
+                oPlayer.EndBatch()
+                oPlayer.BeginBatch()
+                oPlayer.Off(instrument, note)
+                oPlayer.Off(instrument, note + 1)
+                oPlayer.EndBatch()
+    vLive = [Thread(target=Live) for _ in range(2)]
+    for oThread in vLive:
+        oThread.start()
+    for oThread in vLive:
+        oThread.join()
+    assert oSched.Wait(5.0) and not oPlayer.dHeld
+    dBalance = {}  # (channel, note) -> note ons minus note offs
+    for fTime, status, note, velocity in oPlayer.output.Messages()[nBefore:]:
+        if status & 0xE0 == 0x80:
+            key = (status & 0x0F, note)
+            dBalance[key] = dBalance.get(key, 0) + (1 if status & 0xF0 == 0x90 else -1)
+    assert not any(dBalance.values()), 'ERR: tMidiScheduler: Unbalanced note on/off with live play.'
+    vCalls.clear()
+    oShared = oPlayer.Scheduler()  # The one Panic() cancels
+    with oPlayer.oLock:  # The worker wakes for these and waits for oLock; Panic() gets there first
+        oShared.NoteAt(oShared.Now() + 5, 200, 0, 60)
+        oShared.CallAt(oShared.Now() + 5, vCalls.append)
+        sleep(0.05)
+        oPlayer.Panic()
+    sleep(0.05)
+    assert not oPlayer.dHeld and not oShared._dOn and not oShared.Pending() and not vCalls, \
+        'ERR: tMidiScheduler: An event popped before Panic() played after it.'
+    oSched.Stop()
+    print(f'{len(vMsgs)} messages from {vTimes[0]:.1f} to {vTimes[-1]:.1f} ms')
@@ -92,13 +92,6 @@ class tMidiBtn(QPushButton):
     @staticmethod
     def main():
         app = QApplication(argv)
-        class tSimPlayer:  # Mock tMidiPlayer class for testing
-            @staticmethod
-            def On(instr, note):
-                print(f"Note {note} of instrument {instr} pressed.")
-            @staticmethod
-            def Off(instr, note):
-                print(f"Note {note} of instrument {instr} released.")
         # Create an instance of tMidiBtn
         btn = tMidiBtn(tMidiPlayer(), 'Red', 'Accordion', 'Bass_D♯/E♭')
         btn.show()
@@ -1,41 +1,178 @@
+"""
+tMidiBtnDlg.py
+
+Dialog for choosing the color, instrument, note and play mode of one or more grid cells.
+
+The combo boxes share list models built once per process from the constant tables, and the
+dialog itself is built once and reused (tMidiBtnDlg.Shared()), so opening it costs no more with 128
+instruments and 128 notes than with a handful. The combos are editable: typing filters the list to
+the entries containing the text (a QCompleter over the same model, so nothing is rebuilt), and OK
+accepts an exact or unambiguous name.
+
+For several cells at once, SetCells() shows the values they share and leaves the others blank;
+getSelections() returns None for such a field left blank, and Merge() applies the selections to a cell,
+keeping its own value for those fields.
+
+The play mode combo (kChord: note, chord, strum or arpeggio) is shown for cells given with a play
+mode, (color, instrument, note, play); for (color, instrument, note) cells, and until SetCells() is
+first called, it is hidden and getSelections() returns three names.
+
+Usage:
+    >>> dialog = tMidiBtnDlg.Shared(self)
+    >>> dialog.SetCells([('Red', 'Accordion', 'Middle_C')])
+    >>> if dialog.exec_():
+    ...     sNamClr, sInstr, sNote = dialog.getSelections()
+"""
 from PyQt5.QtWidgets import QDialog, QDialogButtonBox
 from PyQt5.QtWidgets import QVBoxLayout
-from PyQt5.QtWidgets import QComboBox
+from PyQt5.QtWidgets import QComboBox, QCompleter
 from PyQt5.QtWidgets import QLabel
+from PyQt5.QtCore import Qt, QStringListModel
 
 # Constant module imports for predefined values
-from kNamClr import COLOR_RGBS  # Module containing predefined color RGB values
-from kNote import NOTE_NUMS     # Module containing predefined note numbers
-from kInstr import INSTR_NUMS   # Module containing predefined instrument numbers
+from kNamClr import COLOR_LIST   # Sorted color names
+from kNote import NOTE_NAMES     # Note names by number
+from kInstr import INSTR_NAMES   # Instrument names by number
+from kChord import PLAY_NAMES    # Play mode names
+
+
 class tMidiBtnDlg(QDialog):
+    """
+    tMidiBtnDlg: Color, instrument, note and play mode selection for one or more cells.
+
+    Attributes:
+        FIELDS (tuple): (label, names) per combo, in getSelections() order.
+        vCombos (list): The color, instrument, note and play mode combo boxes.
+        nFields (int): The number of fields shown: 3, or 4 with the play mode.
+
+    Methods:
+        Shared(parent=None): Returns the dialog instance shared by every caller.
+        SetCells(vCells): Shows the values of (color, instrument, note[, play]) cells; blank where they differ.
+        getSelections(): Returns (color, instrument, note[, play]); None for a field left blank.
+        Merge(cell): Returns cell with the selected fields replaced.
+    """
+    FIELDS = (('Select Color:', COLOR_LIST), ('Select Instrument:', INSTR_NAMES), ('Select Note:', NOTE_NAMES),
+              ('Select Play:', PLAY_NAMES))
+    _vModels = None   # One QStringListModel per field, shared by every dialog
+    _vIndex = None    # Per field, name -> row
+    _oShared = None
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle('Select MIDI Settings')
         layout = QVBoxLayout(self)
         self.SetupDialog(layout)
         self.setLayout(layout)
+
+    @classmethod
+    def _Models(cls):
+        # _Models(): Builds the shared list models on first use (a QApplication must exist by then).
+        if cls._vModels is None:
+            cls._vModels = [QStringListModel(list(vNames)) for _, vNames in cls.FIELDS]
+            cls._vIndex = [{sName: row for row, sName in enumerate(vNames)} for _, vNames in cls.FIELDS]
+        return cls._vModels
+
+    @classmethod
+    def Shared(cls, parent=None):
+        """Return the one dialog instance, created on first use; parent only positions it."""
+        if cls._oShared is None:
+            cls._oShared = cls()
+            cls._oShared.setModal(True)
+        if parent is not None:
+            window = parent.window()
+            cls._oShared.move(window.frameGeometry().center() - cls._oShared.rect().center())
+        return cls._oShared
+
     def SetupDialog(self, layout):
-        self.comboColor = QComboBox()
-        self.comboInstrument = QComboBox()
-        self.comboNote = QComboBox()
-        self.comboColor.addItems(COLOR_RGBS.keys())
-        self.comboInstrument.addItems(INSTR_NUMS.keys())
-        self.comboNote.addItems(NOTE_NUMS.keys())
-        layout.addWidget(QLabel('Select Color:'))
-        layout.addWidget(self.comboColor)
-        layout.addWidget(QLabel('Select Instrument:'))
-        layout.addWidget(self.comboInstrument)
-        layout.addWidget(QLabel('Select Note:'))
-        layout.addWidget(self.comboNote)
+        self.vCombos, self.vLabels = [], []
+        for (sLabel, _), model in zip(self.FIELDS, self._Models()):
+            combo = QComboBox()
+            combo.setModel(model)
+            combo.setEditable(True)
+            combo.setInsertPolicy(QComboBox.NoInsert)
+            completer = QCompleter(model, combo)  # Type-ahead over the same model
+            completer.setCaseSensitivity(Qt.CaseInsensitive)
+            completer.setFilterMode(Qt.MatchContains)
+            completer.setCompletionMode(QCompleter.PopupCompletion)
+            combo.setCompleter(completer)
+            label = QLabel(sLabel)
+            layout.addWidget(label)
+            layout.addWidget(combo)
+            self.vCombos.append(combo)
+            self.vLabels.append(label)
+        # Names kept for callers of the single-cell dialog
+        self.comboColor, self.comboInstrument, self.comboNote, self.comboPlay = self.vCombos
+        self.vKeep = [False] * len(self.vCombos)  # Per field, blank allowed: the cells being edited differ
+        self.nFields = 0
+        self._ShowFields(3)  # Until SetCells() is given cells with a play mode
         btns = QDialogButtonBox(QDialogButtonBox.Ok |
                                 QDialogButtonBox.Cancel)
         btns.accepted.connect(self.accept)
         btns.rejected.connect(self.reject)
         layout.addWidget(btns)
+
+    def _ShowFields(self, nFields):
+        # _ShowFields(): Shows the first nFields combos and hides the rest.
+        if nFields == self.nFields:
+            return
+        self.nFields = nFields
+        for nField, (label, combo) in enumerate(zip(self.vLabels, self.vCombos)):
+            label.setVisible(nField < nFields)
+            combo.setVisible(nField < nFields)
+        self.adjustSize()
+
+    def SetCells(self, vCells):
+        """
+        Shows the (color, instrument, note) or (color, instrument, note, play) names of one or more
+        cells. A field on which the cells differ is left blank, meaning 'keep each cell's own value'.
+        """
+        assert vCells, 'ERR: tMidiBtnDlg: No cells to edit.'
+        nFields = len(vCells[0])
+        assert nFields in (3, 4) and all(len(cell) == nFields for cell in vCells), \
+            'ERR: tMidiBtnDlg: Cells must all have three or all four names.'
+        self._ShowFields(nFields)
+        self.setWindowTitle('Select MIDI Settings' if len(vCells) == 1 else f'Select MIDI Settings ({len(vCells)} cells)')
+        for nField, combo in enumerate(self.vCombos[:nFields]):
+            vValues = {cell[nField] for cell in vCells}
+            self.vKeep[nField] = len(vValues) > 1
+            if not self.vKeep[nField]:
+                combo.setCurrentIndex(self._vIndex[nField][vValues.pop()])
+                combo.lineEdit().setPlaceholderText('')
+            else:
+                combo.setCurrentIndex(-1)
+                combo.setEditText('')
+                combo.lineEdit().setPlaceholderText('(unchanged)')
+        self.vCombos[0].setFocus()
+
+    def _Selection(self, nField):
+        # _Selection(): The name in a combo: exact, else the only name containing the text
+        # (case-insensitive); None if blank, False if it matches no name or several.
+        sText = self.vCombos[nField].currentText().strip()
+        if not sText:
+            return None
+        if sText in self._vIndex[nField]:
+            return sText
+        sLower = sText.lower()
+        vMatches = [sName for sName in self.FIELDS[nField][1] if sLower in sName.lower()]
+        return vMatches[0] if len(vMatches) == 1 else False
+
+    def accept(self):
+        # accept(): Closes only if every field names exactly one entry, or is blank where SetCells() allowed it.
+        for nField, combo in enumerate(self.vCombos[:self.nFields]):
+            sSel = self._Selection(nField)
+            if sSel is False or (sSel is None and not self.vKeep[nField]):
+                combo.setFocus()
+                combo.lineEdit().selectAll()
+                return
+        super().accept()
+
     def getSelections(self):
-        return (self.comboColor.currentText(),
-                self.comboInstrument.currentText(),
-                self.comboNote.currentText())
+        return tuple(self._Selection(nField) for nField in range(self.nFields))
+
+    def Merge(self, cell):
+        """Return cell (color, instrument, note[, play], as given to SetCells()) with every selected field replaced."""
+        return tuple(cell[nField] if sSel is None else sSel for nField, sSel in enumerate(self.getSelections()))
+
 
 if __name__ == "__main__":
     from tMidiBtn import tMidiBtn
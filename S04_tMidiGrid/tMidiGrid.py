@@ -3,8 +3,8 @@ from PyQt5.QtWidgets import QApplication, QWidget, QGridLayout
 from PyQt5.QtCore import Qt
 from tMidiPlayer import tMidiPlayer
 from tMidiBtn import tMidiBtn
-from kNote import NOTE_NUMS
-from kNamClr import COLOR_RGBS
+from kNote import NOTE_NAMES, GRID_LOW, GRID_HIGH
+from kNamClr import COLOR_LIST
 
 class tMidiGrid(QWidget):
     NUM_ROWS = 4
@@ -20,15 +20,15 @@ class tMidiGrid(QWidget):
         layout.setSpacing(0)  # Remove spacing between buttons
         self.setLayout(layout)
 
-        # Generate a sorted list of notes and colors
-        sorted_notes = sorted(NOTE_NUMS.items(), key=lambda x: x[1])[:self.NUM_ROWS * self.NUM_COLS]
-        sorted_colors = sorted(COLOR_RGBS.keys())[:self.NUM_ROWS * self.NUM_COLS]
+        # Sorted lists of notes (from the bottom of the grid range) and colors
+        sorted_notes = NOTE_NAMES[GRID_LOW:GRID_HIGH + 1][:self.NUM_ROWS * self.NUM_COLS]
+        sorted_colors = COLOR_LIST[:self.NUM_ROWS * self.NUM_COLS]
 
         index = 0
         for row in range(self.NUM_ROWS):
             for col in range(self.NUM_COLS):
                 if index < len(sorted_notes) and index < len(sorted_colors):
-                    note, color = sorted_notes[index][0], sorted_colors[index]
+                    note, color = sorted_notes[index], sorted_colors[index]
                     btn = tMidiBtn(self.oMidiPlayer, color, 'Accordion', note)
                     btn.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
                     layout.addWidget(btn, row, col)
@@ -36,11 +36,14 @@ from sys import argv, exit  # Access command-line arguments and terminate progra
 # GUI components
 from PyQt5.QtWidgets import QPushButton, QApplication  # Button and Application Widgets
 from PyQt5.QtCore import Qt  # Qt constants
-from PyQt5.QtGui import QFont, QFontMetrics  # Font handling
+from PyQt5.QtGui import QFont  # Font handling
 
 # Custom module imports for MIDI functionality
 from tMidiPlayer import tMidiPlayer  # Custom class for handling MIDI player functionalities
+from tMidiBackend import tRecordBackend  # Backend recording messages in memory
+from tEventLog import tEventLog  # Event log verbosity levels
 from tMidiBtnDlg import tMidiBtnDlg
+from tFontFitter import tFontFitter  # Shared font-size fitting engine
 
 # Utility module imports for color and validation handling
 from ClrUtils import get_contrastive_text_color, GetHexStr  # Color utilities
@@ -54,12 +57,15 @@ from kInstr import INSTR_NUMS  # Predefined instrument numbers
 class tMidiBtn(QPushButton):
     MAX_FONT_SZ = 50  # Define the maximum font size
     MIN_FONT_SZ =  4  # Define the minimum font size
+    FONT_NAME = 'Arial'  # Define the font name
+    PADDING = 10  # Define the padding around the text
     def __init__(self, oMidiPlayer: tMidiPlayer, sNamClr: str, sInstr: str, sNote: str, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.oMidiPlayer = oMidiPlayer
+        self.oFitter = tFontFitter(self.FONT_NAME, self.MIN_FONT_SZ, self.MAX_FONT_SZ, self.PADDING)
         self.Instr, self.Note = None, None
         self.Update(sNamClr, sInstr, sNote)
-        self.setFont(QFont('Arial', self.MIN_FONT_SZ))
+        self.setFont(QFont(self.FONT_NAME, self.MIN_FONT_SZ))
         self.CalcFontSz()
     def Update(self, sNamClr, sInstr, sNote):
         nInstr = ExitOnNoIntVal(sInstr, INSTR_NUMS, 'Instrument')
@@ -75,66 +81,11 @@ class tMidiBtn(QPushButton):
         self.setText(f"{sInstr}\n{sNote}")
         self.Instr = nInstr
         self.Note = nNote
-    def xCalcFontSz(self):
-        test_fit = self.MIN_FONT_SZ
-        font = QFont('Arial', test_fit)
-        metrics = QFontMetrics(font)
-        text_width = metrics.horizontalAdvance(self.text())
-        text_height = metrics.height()
-
-        print(f"Initial test_fit: {test_fit}, text_width: {text_width}, text_height: {text_height}, "
-              f"button_width: {self.width()}, button_height: {self.height()}")
-        # Incrementally increase font size until it doesn't fit
-        while text_width <= self.width() and text_height <= self.height() and test_fit < self.MAX_FONT_SZ:
-            test_fit += 1
-            font = QFont('Arial', test_fit)
-            metrics = QFontMetrics(font)
-            text_width = metrics.horizontalAdvance(self.text())
-            text_height = metrics.height()
-
-            print(f"Testing test_fit: {test_fit}, text_width: {text_width}, text_height: {text_height},"
-                  f" button_width: {self.width()}, button_height: {self.height()}")
-        # Decrement font size by 1 to ensure it fits within the dimensions
-        test_fit -= 1
-        print(f"Final test_fit: {test_fit}")
-        self.setFont(QFont('Arial', test_fit))
-        self.update()  # Refresh the widget to apply font size immediately
-
-    def binCalcFontSz(self):
-        low = self.MIN_FONT_SZ
-        high = self.MAX_FONT_SZ
-        best_fit = low
-
-        while low <= high:
-            mid = (low + high) // 2
-            font = QFont('Arial', mid)
-            metrics = QFontMetrics(font)
-            text_rect = metrics.boundingRect(self.text())
-            text_width = text_rect.width()
-            text_height = text_rect.height()
-
-            if text_width <= self.width() - 10 and text_height <= self.height() - 10:
-                best_fit = mid
-                low = mid + 1
-            else:
-                high = mid - 1
-
-        self.setFont(QFont('Arial', best_fit))
-        self.update()  # Refresh the widget to apply font size immediately
-
     def CalcFontSz(self):
-        font_size = self.MAX_FONT_SZ
-        while font_size >= self.MIN_FONT_SZ:
-            font = QFont('Arial', font_size)
-            metrics = QFontMetrics(font)
-            text_width = metrics.horizontalAdvance(self.text())
-            text_height = metrics.height()
-            if ((text_width < self.width() and text_height < self.height())
-                or font_size == self.MIN_FONT_SZ):
-                break
-            font_size -= 1
-        self.setFont(QFont('Arial', font_size))
-        self.update()  # Refresh the widget to apply font size immediately
+        font_size = self.oFitter.Fit(self.text(), self.width(), self.height())
+        if self.font().pointSize() != font_size:
+            self.setFont(QFont(self.FONT_NAME, font_size))
+            self.update()  # Refresh the widget to apply font size immediately
 
     def resizeEvent(self, event):
         self.CalcFontSz()  # Adjust font size when resized
@@ -157,16 +108,10 @@ class tMidiBtn(QPushButton):
     @staticmethod
     def main():
         app = QApplication(argv)
-        class tSimPlayer:  # Mock tMidiPlayer class for testing
-            @staticmethod
-            def On(instr, note):
-                print(f"Note {note} of instrument {instr} pressed.")
-            @staticmethod
-            def Off(instr, note):
-                print(f"Note {note} of instrument {instr} released.")
-
+        oMidiPlayer = tMidiPlayer(oBackend=tRecordBackend())  # Records instead of playing; no MIDI device needed
+        oMidiPlayer.oLog.SetLevel(tEventLog.ECHO)              # Print each message as it is sent
         # Create an instance of tMidiBtn
-        btn = tMidiBtn(tSimPlayer(),
+        btn = tMidiBtn(oMidiPlayer,
                        'Red',
                        'Accordion',
                        'Bass_D♯/E♭')
@@ -0,0 +1,195 @@
+# tFaceCache.py
+"""
+tFaceCache.py
+
+A process-wide cache of pre-rendered button faces, shared by every MIDI button and painted grid.
+
+A face is everything a cell shows: its background color, its label in the contrasting text color
+at the fitted font, and its state (pressed, selected, lit by incoming MIDI). Faces depend only on
+those values, the cell size and the device pixel ratio, so each distinct face is rendered into a
+QPixmap once and every repaint afterwards is a single drawPixmap. A grid of cells sharing colors and sizes needs only a
+handful of renders, and highlighting many cells at once (a chord) costs one blit per cell.
+
+Pixmaps are large compared with the font sizes in FONT_FIT_CACHE, so the cache is bounded in bytes
+rather than entries: least-recently-used faces are dropped once the total exceeds nMaxBytes.
+
+Classes:
+    tFaceCache -- Byte-bounded LRU map from face parameters to a rendered QPixmap.
+
+Objects:
+    FACE_CACHE -- The shared tFaceCache instance.
+
+Usage:
+    Run this script directly to exercise the cache:
+        $ python tFaceCache.py
+"""
+from collections import OrderedDict  # Ordered mapping used for LRU bookkeeping
+from typing import Tuple
+from PyQt5.QtGui import QColor, QFont, QPainter, QPen, QPixmap
+from PyQt5.QtCore import QRect, Qt
+# PyQt5 Imports:
+# QColor, QFont, QPen: Face colors, label font and selection outline.
+# QPainter, QPixmap: Rendering a face once and keeping it.
+# QRect, Qt: Face geometry and alignment flags.
+
+tFaceKey = Tuple[str, str, str, str, int, int, int, int, float]  # (bg, fg, label, font, size, w, h, state, dpr)
+
+
+class tFaceCache:
+    """
+    tFaceCache renders and keeps button faces with byte-bounded LRU eviction.
+
+    Attributes:
+        MAX_BYTES (int): Default number of pixmap bytes kept before evicting.
+        PRESSED (int): State bit: the cell is held; drawn darker.
+        SELECTED (int): State bit: the cell is selected; drawn with an outline.
+        LIT (int): State bit: the cell's note is sounding on the MIDI input; drawn tinted toward the text color.
+        PRESSED_DARKER (int): Factor passed to QColor.darker() for a held cell.
+        LIT_MIX (float): Share of the text color in a lit cell's background.
+        SELECTED_PEN (int): Width of the selection outline.
+        nMaxBytes (int): Number of pixmap bytes this cache keeps.
+        nBytes (int): Number of pixmap bytes held now.
+        nHits (int): Number of faces found.
+        nMisses (int): Number of faces rendered.
+        nEvictions (int): Number of faces dropped to stay within nMaxBytes.
+    """
+    MAX_BYTES = 64 * 1024 * 1024
+    PRESSED, SELECTED, LIT = 1, 2, 4
+    PRESSED_DARKER = 140
+    LIT_MIX = 0.35
+    SELECTED_PEN = 3
+
+    def __init__(self, nMaxBytes: int = MAX_BYTES) -> None:
+        """
+        Initializes an empty cache.
+
+        Args:
+            nMaxBytes (int, optional): The maximum number of pixmap bytes. Defaults to MAX_BYTES.
+        """
+        assert nMaxBytes > 0, f'ERR: tFaceCache: nMaxBytes {nMaxBytes} must be positive.'
+        self.nMaxBytes = nMaxBytes
+        self._dFaces: 'OrderedDict[tFaceKey, QPixmap]' = OrderedDict()
+        self.nBytes = 0
+        self.nHits, self.nMisses, self.nEvictions = 0, 0, 0
+
+    @staticmethod
+    def Key(sBg: str, sFg: str, sLabel: str, font: QFont, nWidth: int, nHeight: int,
+            nState: int = 0, fDpr: float = 1.0) -> tFaceKey:
+        """
+        Builds the lookup key for one face.
+
+        Args:
+            sBg (str): The background color, '#rrggbb'.
+            sFg (str): The text color, '#rrggbb'.
+            sLabel (str): The label.
+            font (QFont): The fitted font; only its family and point size are used.
+            nWidth (int): The face width in device-independent pixels.
+            nHeight (int): The face height in device-independent pixels.
+            nState (int, optional): PRESSED, SELECTED and/or LIT. Defaults to 0.
+            fDpr (float, optional): The device pixel ratio. Defaults to 1.0.
+
+        Returns:
+            tuple: A hashable key.
+        """
+        return (sBg, sFg, sLabel, font.family(), font.pointSize(), nWidth, nHeight, nState, fDpr)
+
+    @staticmethod
+    def _Bytes(pixmap: QPixmap) -> int:
+        return pixmap.width() * pixmap.height() * max(1, pixmap.depth() // 8)
+
+    def Face(self, sBg: str, sFg: str, sLabel: str, font: QFont, nWidth: int, nHeight: int,
+             nState: int = 0, fDpr: float = 1.0) -> QPixmap:
+        """
+        Returns the face for these parameters, rendering and caching it on a miss.
+
+        Args:
+            See Key().
+
+        Returns:
+            QPixmap: The face, with its device pixel ratio set.
+        """
+        key = (sBg, sFg, sLabel, font.family(), font.pointSize(), nWidth, nHeight, nState, fDpr)
+        pixmap = self._dFaces.get(key)
+        if pixmap is not None:
+            self._dFaces.move_to_end(key)
+            self.nHits += 1
+            return pixmap
+        self.nMisses += 1
+        pixmap = self.Render(sBg, sFg, sLabel, font, nWidth, nHeight, nState, fDpr)
+        self._dFaces[key] = pixmap
+        self.nBytes += self._Bytes(pixmap)
+        while self.nBytes > self.nMaxBytes and len(self._dFaces) > 1:
+            _, old = self._dFaces.popitem(last=False)
+            self.nBytes -= self._Bytes(old)
+            self.nEvictions += 1
+        return pixmap
+
+    @classmethod
+    def Render(cls, sBg: str, sFg: str, sLabel: str, font: QFont, nWidth: int, nHeight: int,
+               nState: int = 0, fDpr: float = 1.0) -> QPixmap:
+        """
+        Renders one face, uncached.
+
+        Args:
+            See Key().
+
+        Returns:
+            QPixmap: The face, with its device pixel ratio set.
+        """
+        pixmap = QPixmap(max(1, round(nWidth * fDpr)), max(1, round(nHeight * fDpr)))
+        pixmap.setDevicePixelRatio(fDpr)
+        bg, fg = QColor(sBg), QColor(sFg)
+        if nState & cls.LIT:
+            f = cls.LIT_MIX
+            bg = QColor(round(bg.red() + (fg.red() - bg.red()) * f), round(bg.green() + (fg.green() - bg.green()) * f),
+                        round(bg.blue() + (fg.blue() - bg.blue()) * f))
+        pixmap.fill(bg.darker(cls.PRESSED_DARKER) if nState & cls.PRESSED else bg)
+        rect = QRect(0, 0, nWidth, nHeight)
+        painter = QPainter(pixmap)
+        painter.setFont(font)
+        painter.setPen(fg)
+        painter.drawText(rect, Qt.AlignCenter, sLabel)
+        if nState & cls.SELECTED:
+            painter.setPen(QPen(fg, cls.SELECTED_PEN))
+            painter.drawRect(rect.adjusted(1, 1, -2, -2))
+        painter.end()
+        return pixmap
+
+    def Clear(self) -> None:
+        """Drops every face and resets the counters."""
+        self._dFaces.clear()
+        self.nBytes = 0
+        self.nHits, self.nMisses, self.nEvictions = 0, 0, 0
+
+    def Stats(self) -> dict:
+        """
+        Returns the cache counters.
+
+        Returns:
+            dict: Faces, bytes, capacity, hits, misses, evictions and hit ratio.
+        """
+        nLookups = self.nHits + self.nMisses
+        return {'size': len(self._dFaces), 'bytes': self.nBytes, 'capacity': self.nMaxBytes,
+                'hits': self.nHits, 'misses': self.nMisses, 'evictions': self.nEvictions,
+                'hit_ratio': self.nHits / nLookups if nLookups else 0.0}
+
+    def __len__(self) -> int:
+        return len(self._dFaces)
+
+
+FACE_CACHE = tFaceCache()  # Shared by every tMidiBtn and tMidiPaintGrid in the process
+
+if __name__ == "__main__":
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication([])
+    font = QFont('Arial', 12)
+    oCache = tFaceCache(2 * 100 * 50 * 4)  # Room for two 100x50 faces
+    pA = oCache.Face('#ff0000', '#FFFFFF', 'A', font, 100, 50)
+    assert oCache.Face('#ff0000', '#FFFFFF', 'A', font, 100, 50) is pA
+    oCache.Face('#ff0000', '#FFFFFF', 'A', font, 100, 50, tFaceCache.PRESSED)
+    oCache.Face('#ff0000', '#FFFFFF', 'B', font, 100, 50)  # Evicts the unpressed A
+    assert oCache.Face('#ff0000', '#FFFFFF', 'A', font, 100, 50) is not pA
+    assert oCache.nBytes <= oCache.nMaxBytes and oCache.Stats()['evictions'] == 2
+    pHi = oCache.Face('#ff0000', '#FFFFFF', 'A', font, 100, 50, fDpr=2.0)
+    assert (pHi.width(), pHi.height()) == (200, 100)
+    print(oCache.Stats())
@@ -0,0 +1,141 @@
+# tFontFitCache.py
+"""
+tFontFitCache.py
+
+A process-wide memo of fitted font sizes shared by every text-resizing button.
+
+Resizing a grid of buttons asks the same question over and over: "what is the largest font
+that fits this text into this box?". The answer depends only on the text, the font name,
+the available width/height, the padding and the font size range, so it can be computed once
+and looked up afterwards. Entries are evicted least-recently-used once the cache is full.
+
+Classes:
+    tFontFitCache -- Bounded LRU map from fit parameters to a font size, with hit/miss counters.
+
+Objects:
+    FONT_FIT_CACHE -- The shared tFontFitCache instance used by tTxtReSzBtn.
+
+Usage:
+    Run this script directly to exercise the cache:
+        $ python tFontFitCache.py
+"""
+from collections import OrderedDict  # Ordered mapping used for LRU bookkeeping
+from typing import Optional, Tuple
+
+tFitKey = Tuple[str, str, int, int, int, int, int]  # (text, font, width, height, padding, min, max)
+
+
+class tFontFitCache:
+    """
+    tFontFitCache memoizes fitted font sizes with bounded LRU eviction.
+
+    Attributes:
+        MAX_ENTRIES (int): Default number of entries kept before evicting.
+        nMaxEntries (int): Number of entries this cache keeps.
+        nHits (int): Number of successful lookups.
+        nMisses (int): Number of failed lookups.
+        nEvictions (int): Number of entries dropped to stay within nMaxEntries.
+    """
+    MAX_ENTRIES = 1024
+
+    def __init__(self, nMaxEntries: int = MAX_ENTRIES) -> None:
+        """
+        Initializes an empty cache.
+
+        Args:
+            nMaxEntries (int, optional): The maximum number of entries. Defaults to MAX_ENTRIES.
+        """
+        assert nMaxEntries > 0, f'ERR: tFontFitCache: nMaxEntries {nMaxEntries} must be positive.'
+        self.nMaxEntries = nMaxEntries
+        self._dFits: 'OrderedDict[tFitKey, int]' = OrderedDict()
+        self.nHits, self.nMisses, self.nEvictions = 0, 0, 0
+
+    @staticmethod
+    def Key(sTxt: str, sFont: str, nWidth: int, nHeight: int,
+            nPadding: int, nMinSz: int, nMaxSz: int) -> tFitKey:
+        """
+        Builds the lookup key for one fit request.
+
+        Args:
+            sTxt (str): The text to fit.
+            sFont (str): The font name.
+            nWidth (int): The available width, padding already removed.
+            nHeight (int): The available height, padding already removed.
+            nPadding (int): The padding around the text.
+            nMinSz (int): The minimum font size.
+            nMaxSz (int): The maximum font size.
+
+        Returns:
+            tuple: A hashable key.
+        """
+        return (sTxt, sFont, nWidth, nHeight, nPadding, nMinSz, nMaxSz)
+
+    def Get(self, key: tFitKey) -> Optional[int]:
+        """
+        Looks up a fitted font size and marks it as recently used.
+
+        Args:
+            key (tuple): A key built with Key().
+
+        Returns:
+            int or None: The cached font size, or None on a miss.
+        """
+        nSz = self._dFits.get(key)
+        if nSz is None:
+            self.nMisses += 1
+            return None
+        self._dFits.move_to_end(key)
+        self.nHits += 1
+        return nSz
+
+    def Put(self, key: tFitKey, nSz: int) -> None:
+        """
+        Stores a fitted font size, evicting the least recently used entry when full.
+
+        Args:
+            key (tuple): A key built with Key().
+            nSz (int): The fitted font size.
+        """
+        self._dFits[key] = nSz
+        self._dFits.move_to_end(key)
+        if len(self._dFits) > self.nMaxEntries:
+            self._dFits.popitem(last=False)
+            self.nEvictions += 1
+
+    def Clear(self) -> None:
+        """Drops every entry and resets the counters."""
+        self._dFits.clear()
+        self.nHits, self.nMisses, self.nEvictions = 0, 0, 0
+
+    def Stats(self) -> dict:
+        """
+        Returns the cache counters.
+
+        Returns:
+            dict: Size, capacity, hits, misses, evictions and hit ratio.
+        """
+        nLookups = self.nHits + self.nMisses
+        return {'size': len(self._dFits), 'capacity': self.nMaxEntries,
+                'hits': self.nHits, 'misses': self.nMisses, 'evictions': self.nEvictions,
+                'hit_ratio': self.nHits / nLookups if nLookups else 0.0}
+
+    def __len__(self) -> int:
+        return len(self._dFits)
+
+
+FONT_FIT_CACHE = tFontFitCache()  # Shared by every tTxtReSzBtn in the process
+
+if __name__ == "__main__":
+    oCache = tFontFitCache(2)
+    kA = tFontFitCache.Key('A', 'Arial', 100, 50, 10, 4, 50)
+    kB = tFontFitCache.Key('B', 'Arial', 100, 50, 10, 4, 50)
+    kC = tFontFitCache.Key('C', 'Arial', 100, 50, 10, 4, 50)
+    assert oCache.Get(kA) is None
+    oCache.Put(kA, 20)
+    oCache.Put(kB, 18)
+    assert oCache.Get(kA) == 20  # A is now most recently used
+    oCache.Put(kC, 16)           # Evicts B
+    assert oCache.Get(kB) is None
+    assert oCache.Get(kC) == 16
+    assert oCache.Stats()['evictions'] == 1
+    print(oCache.Stats())
@@ -0,0 +1,197 @@
+# tFontFitter.py
+"""
+tFontFitter.py
+
+The font-size fitting engine shared by every text-resizing button.
+
+A font's text extent grows almost linearly with its point size, so the engine measures the text
+once at a reference size, extrapolates the largest size that should fit the box, and then checks
+that guess and its neighbour. Only when the guess is off does it fall back to a binary search of
+the remaining range, so a fit costs two measurements in the usual case and O(log(range)) at worst.
+All measurements go through one shared QFontMetricsF context per font size; nothing is painted.
+Results are memoized in FONT_FIT_CACHE.
+
+Classes:
+    tFontFitter -- Fits multi-line text into a width/height box within a font size range.
+
+Usage:
+    Run this script directly to print a few fits and the measurement counts:
+        $ python tFontFitter.py
+"""
+from PyQt5.QtGui import QFont, QFontMetricsF, QImage
+from PyQt5.QtCore import QRectF, Qt
+from typing import Dict, Tuple
+from tFontFitCache import FONT_FIT_CACHE, tFontFitCache
+# PyQt5 Imports:
+# QFont: Represents the font used for rendering text.
+# QFontMetricsF: Measures text in floating point precision.
+# QImage: The single offscreen paint device all measurements are made against.
+# QRectF: Defines a rectangle in floating point precision.
+# Qt: Namespace containing flags and enums for various purposes.
+
+
+class tFontFitter:
+    """
+    tFontFitter finds the largest font size at which a text fits a box.
+
+    Attributes:
+        REF_FONT_SZ (int): The point size the text is measured at before extrapolating.
+        MAX_REF_ENTRIES (int): Number of reference measurements kept before they are dropped.
+        FONT_NAME (str): The font name.
+        MIN_FONT_SZ (int): The minimum font size.
+        MAX_FONT_SZ (int): The maximum font size.
+        PADDING (int): The padding subtracted from the box before fitting.
+        nMeasures (int): Number of text measurements made by this fitter.
+    """
+    REF_FONT_SZ = 100
+    MAX_REF_ENTRIES = 1024
+    _oDevice = None                                      # Shared measurement context (created lazily)
+    _dMetrics: Dict[Tuple[str, int], QFontMetricsF] = {}  # (font name, size) -> metrics on _oDevice
+    _dRefSz: Dict[Tuple[str, str], Tuple[float, float]] = {}  # (text, font name) -> extent at REF_FONT_SZ
+    _RECT = QRectF(0, 0, 1e6, 1e6)                      # Large enough that nothing wraps
+    _FLAGS = int(Qt.AlignLeft | Qt.AlignTop)
+
+    def __init__(self, font_name='Arial', min_font_size=4, max_font_size=50, padding=10,
+                 oCache: tFontFitCache = FONT_FIT_CACHE):
+        """
+        Initializes the fitter with a font name, size range and padding.
+
+        Args:
+            font_name (str, optional): The font name. Defaults to 'Arial'.
+            min_font_size (int, optional): The minimum font size. Defaults to 4.
+            max_font_size (int, optional): The maximum font size. Defaults to 50.
+            padding (int, optional): The padding around the text. Defaults to 10.
+            oCache (tFontFitCache, optional): The memo of fits. Defaults to FONT_FIT_CACHE.
+        """
+        assert 0 < min_font_size <= max_font_size, \
+            f'ERR: tFontFitter: Font size range {min_font_size}..{max_font_size} is empty.'
+        self.FONT_NAME = font_name
+        self.MIN_FONT_SZ = min_font_size
+        self.MAX_FONT_SZ = max_font_size
+        self.PADDING = padding
+        self.oCache = oCache
+        self.nMeasures = 0
+
+    @classmethod
+    def _Metrics(cls, font_name: str, font_size: int) -> QFontMetricsF:
+        """Returns the shared metrics object for a font name and size."""
+        metrics = cls._dMetrics.get((font_name, font_size))
+        if metrics is None:
+            if cls._oDevice is None:
+                cls._oDevice = QImage(1, 1, QImage.Format_ARGB32)
+            metrics = QFontMetricsF(QFont(font_name, font_size), cls._oDevice)
+            cls._dMetrics[(font_name, font_size)] = metrics
+        return metrics
+
+    def Measure(self, text: str, font_size: int) -> Tuple[float, float]:
+        """
+        Measures the extent of possibly multi-line text at a font size.
+
+        Args:
+            text (str): The text to measure; lines are separated by '\\n'.
+            font_size (int): The point size to measure at.
+
+        Returns:
+            tuple: The (width, height) of the text's bounding box.
+        """
+        self.nMeasures += 1
+        rect = self._Metrics(self.FONT_NAME, font_size).boundingRect(self._RECT, self._FLAGS, text)
+        return rect.width(), rect.height()
+
+    def _RefExtent(self, text: str) -> Tuple[float, float]:
+        """Returns the text's extent at REF_FONT_SZ, measuring it at most once per text and font."""
+        key = (text, self.FONT_NAME)
+        extent = tFontFitter._dRefSz.get(key)
+        if extent is None:
+            if len(tFontFitter._dRefSz) >= self.MAX_REF_ENTRIES:
+                tFontFitter._dRefSz.clear()
+            extent = self.Measure(text, self.REF_FONT_SZ)
+            tFontFitter._dRefSz[key] = extent
+        return extent
+
+    def _Fits(self, text: str, font_size: int, width: float, height: float) -> bool:
+        w, h = self.Measure(text, font_size)
+        return w <= width and h <= height
+
+    def Fit(self, text: str, width: int, height: int) -> int:
+        """
+        Returns the largest font size at which text fits a box of the given size.
+
+        Args:
+            text (str): The text to fit.
+            width (int): The box width; PADDING is subtracted.
+            height (int): The box height; PADDING is subtracted.
+
+        Returns:
+            int: The fitted font size, MIN_FONT_SZ if nothing fits.
+        """
+        available_width = width - self.PADDING
+        available_height = height - self.PADDING
+        key = tFontFitCache.Key(text, self.FONT_NAME, available_width, available_height,
+                                self.PADDING, self.MIN_FONT_SZ, self.MAX_FONT_SZ)
+        font_size = self.oCache.Get(key)
+        if font_size is None:
+            font_size = self._Search(text, available_width, available_height)
+            self.oCache.Put(key, font_size)
+        return font_size
+
+    def _Search(self, text: str, width: float, height: float) -> int:
+        """Extrapolates from the reference extent, then confirms or binary searches."""
+        low, high = self.MIN_FONT_SZ, self.MAX_FONT_SZ
+        if width <= 0 or height <= 0:
+            return low
+        ref_width, ref_height = self._RefExtent(text)
+        if ref_width <= 0 or ref_height <= 0:
+            return high  # Empty text fits at any size
+        scale = min(width / ref_width, height / ref_height)
+        guess = max(low, min(high, int(self.REF_FONT_SZ * scale)))
+
+        # Confirm the guess: it fits and either it is the maximum or the next size does not
+        if self._Fits(text, guess, width, height):
+            if guess == high or not self._Fits(text, guess + 1, width, height):
+                return guess
+            best, low = guess + 1, guess + 2
+        else:
+            best, high = low, guess - 1
+        while low <= high:
+            mid = (low + high) // 2
+            if self._Fits(text, mid, width, height):
+                best, low = mid, mid + 1
+            else:
+                high = mid - 1
+        return best
+
+    def FitFont(self, text: str, width: int, height: int) -> QFont:
+        """
+        Returns a QFont at the fitted size for text in a box of the given size.
+
+        Args:
+            text (str): The text to fit.
+            width (int): The box width; PADDING is subtracted.
+            height (int): The box height; PADDING is subtracted.
+
+        Returns:
+            QFont: The fitted font.
+        """
+        return QFont(self.FONT_NAME, self.Fit(text, width, height))
+
+    @staticmethod
+    def main():
+        """Prints fits for a few box sizes and checks them against a linear scan."""
+        from PyQt5.QtWidgets import QApplication
+        app = QApplication([])
+        oFitter = tFontFitter('Times New Roman', 3, 90, 4)
+        sTxt = 'Accordion\nBass_D♯/E♭'
+        for w, h in ((40, 20), (100, 50), (200, 100), (400, 300), (1200, 900)):
+            nBefore = oFitter.nMeasures
+            nSz = oFitter.Fit(sTxt, w, h)
+            nUsed = oFitter.nMeasures - nBefore
+            vFits = [n for n in range(3, 91) if oFitter._Fits(sTxt, n, w - 4, h - 4)]
+            assert nSz == (vFits[-1] if vFits else 3), f'{w}x{h}: {nSz} vs {vFits[-1:]}'
+            print(f'{w:4}x{h:<4} -> {nSz:2}pt in {nUsed} measurements')
+        print(FONT_FIT_CACHE.Stats())
+        del app
+
+
+if __name__ == "__main__":
+    tFontFitter.main()
@@ -15,19 +15,18 @@ Author: Dan Mailman
 Date: 15-May-24
 """
 from PyQt5.QtWidgets import QPushButton, QApplication
-from PyQt5.QtGui import QFont, QImage, QPainter
-from PyQt5.QtCore import QRectF, Qt
+from PyQt5.QtGui import QFont
 from sys import argv, exit
+from tFontFitter import tFontFitter
+from tLatencyProbe import PROBE
 # PyQt5 Imports:
 # QPushButton: Provides the button widget.
 # QApplication: Manages application-wide resources and settings.
 # QFont: Represents the font used for rendering text.
-# QImage: Used for offscreen image representation.
-# QPainter: Provides functions to paint on widgets or images.
-# QRectF: Defines a rectangle in floating point precision.
-# Qt: Namespace containing flags and enums for various purposes.
 # sys.argv: A list of command line arguments passed to the script.
 # sys.exit: Exits from Python.
+# tFontFitter: Shared font-size fitting engine, memoized process-wide.
+# PROBE: Latency instrumentation; CalcFontSz is timed when it is enabled.
 
 class tTxtReSzBtn(QPushButton):
     """
@@ -39,6 +38,9 @@ class tTxtReSzBtn(QPushButton):
         MAX_FONT_SZ (int): The maximum font size.
         FONT_NAME (str): The font name.
         PADDING (int): The padding around the text.
+        oFitter (tFontFitter): The engine that fits the text to the button.
+        bAutoFit (bool): Whether the button refits its own font on resize. Containers that
+                         fit their buttons in bulk (see tMidiGrid) turn this off.
     """
 
     def __init__(self, Txt, min_font_size=4, max_font_size=50, font_name='Arial', padding=10, *args, **kwargs):
@@ -57,6 +59,8 @@ class tTxtReSzBtn(QPushButton):
         self.MAX_FONT_SZ = max_font_size
         self.FONT_NAME = font_name
         self.PADDING = padding
+        self.oFitter = tFontFitter(font_name, min_font_size, max_font_size, padding)
+        self.bAutoFit = True
         self.UpdateText(Txt)
         self.setFont(QFont(self.FONT_NAME, self.MIN_FONT_SZ))
         self.CalcFontSz()
@@ -71,45 +75,25 @@ class tTxtReSzBtn(QPushButton):
         self.setText(Txt)
         #print(f'UpdateText(): self.text({self.text()})')
 
+    @PROBE.Timed('CalcFontSz')
     def CalcFontSz(self):
         """
         Calculates and sets the optimal font size for the button text
         based on the button's current dimensions.
         """
+        # Shared engine: a memo lookup, or a couple of measurements on a miss
+        self.ApplyFontSz(self.oFitter.Fit(self.text(), self.width(), self.height()))
 
-        def getBoundingBox(text, font):
-            """
-            Calculates the bounding box of the text with the given font.
-
-            Args:
-                text (str): The text to measure.
-                font (QFont): The font to use for measurement.
-
-            Returns:
-                QRectF: The bounding box of the text.
-            """
-            image = QImage(1, 1, QImage.Format_ARGB32)
-            painter = QPainter(image)
-            painter.setFont(font)
-            rect = painter.boundingRect(QRectF(0, 0, float('inf'), float('inf')), Qt.TextWordWrap, text)
-            painter.end()
-            return rect
-
-        available_width = self.width() - self.PADDING
-        available_height = self.height() - self.PADDING
-
-        for font_size in range(self.MIN_FONT_SZ, self.MAX_FONT_SZ + 1):
-            font = QFont(self.FONT_NAME, font_size)
-            rect = getBoundingBox(self.text(), font)
-
-            if rect.width() > available_width or rect.height() > available_height:
-                font_size -= 1  # Use the last fitting size
-                break
+    def ApplyFontSz(self, font_size):
+        """
+        Sets the button font to the given size, skipping the update if nothing changes.
 
-        # Ensure font size is within bounds
-        font_size = max(self.MIN_FONT_SZ, min(self.MAX_FONT_SZ, font_size))
-        self.setFont(QFont(self.FONT_NAME, font_size))
-        self.update()  # Refresh the widget to apply font size immediately
+        Args:
+            font_size (int): The font size, usually from oFitter.
+        """
+        if self.font().pointSize() != font_size or self.font().family() != self.FONT_NAME:
+            self.setFont(QFont(self.FONT_NAME, font_size))
+            self.update()  # Refresh the widget to apply font size immediately
 
     def resizeEvent(self, event):
         """
@@ -119,7 +103,8 @@ class tTxtReSzBtn(QPushButton):
             event (QResizeEvent): The resize event.
         """
         super().resizeEvent(event)
-        self.CalcFontSz()  # Adjust font size when resized
+        if self.bAutoFit:
+            self.CalcFontSz()  # Adjust font size when resized
 
     @staticmethod
     def main():
@@ -6,25 +6,31 @@ Dan Mailman
 Description:
     This module defines the tMidiBtn class, which extends tTxtReSzBtn from PyQt5.
     It is designed to represent a MIDI controller button that interacts with a MIDI player.
-    Each button is associated with a specific musical instrument and note, and is styled
-    with dynamic colors based on predefined settings.
+    Each button is associated with a specific musical instrument and note, and is drawn
+    in dynamic colors based on predefined settings. Rather than through a per-button style sheet,
+    each face (colors, label, font, pressed/selected state) is rendered once into FACE_CACHE and
+    every repaint is a single pixmap blit.
+    A button plays its cell's play mode (kChord): its single note, or a chord, strum or arpeggio on it,
+    through a tCellVoice started on the press and stopped on the release.
 
 Dependencies:
     PyQt5: Used for the GUI components.
     tMidiPlayer: A custom class handling MIDI playback functionalities.
-    ClrUtils: Utilities for color manipulation including getting contrastive text colors.
-    Utilities: Contains helper functions like ExitOnNoIntVal and ExitOnNoRGBVal for input validation.
-    kNamClr, kNote, kInstr: Modules containing constants and mappings for colors, notes, and instruments.
+    tCellVoice: Plays a cell's note, chord, strum or arpeggio while it is held.
+    CellUtils: Validated, memoized lookups of cell names.
+    kNamClr, kNote, kInstr, kChord: Modules containing constants and mappings for colors, notes, instruments and play modes.
     tTxtReSzBtn: Custom button class that resizes text dynamically.
+    tFaceCache: Shared cache of pre-rendered button faces.
 
 Usage:
     This class is intended to be used in a graphical MIDI control application where each button triggers
-    a specific note of an instrument. To test the button, run this module directly, and a GUI window
+    a specific note of an instrument. A right click reassigns the button; Ctrl+click selects buttons so that
+    a right click on any selected one reassigns them all. To test the button, run this module directly, and a GUI window
     with a functioning MIDI button will appear.
 
 Example:
     >>> from tMidiPlayer import tMidiPlayer
-    >>> btn = tMidiBtn(tMidiPlayer(), 'Red', 'Accordion', 'Bass_D♯/E♭')
+    >>> btn = tMidiBtn(tMidiPlayer(), 'Red', 'Accordion', 'Bass_D♯/E♭', 'Minor Up')
     >>> btn.show()
 
 Notes:
@@ -37,81 +43,140 @@ from sys import argv  # Access command-line arguments
 from sys import exit  # Terminate program with exit code
 
 # GUI components
-from PyQt5.QtWidgets import QPushButton, QApplication
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtGui import QPainter
 from PyQt5.QtCore import Qt
 
 # Custom module imports for MIDI functionality
 from tMidiPlayer import tMidiPlayer  # Custom class for handling MIDI player functionalities
+from tMidiBackend import tRecordBackend  # Backend recording messages in memory
+from tEventLog import tEventLog  # Event log verbosity levels
+from tCellVoice import tCellVoice  # One press: note, chord, strum or arpeggio
 
 from tMidiBtnDlg import tMidiBtnDlg
-# Utility module imports for color and validation handling
-from ClrUtils import get_contrastive_text_color  # Utility to get contrastive text color for readability
-from ClrUtils import GetHexStr                   # Utility to convert RGB values to Hexadecimal color string
-from Utilities import ExitOnNoIntVal             # Utility to exit and log error on invalid integer input
-from Utilities import ExitOnNoRGBVal             # Utility to exit and log error on invalid RGB input
-
-# Constant module imports for predefined values
-from kNamClr import COLOR_RGBS  # Module containing predefined color RGB values
-from kNote import NOTE_NUMS     # Module containing predefined note numbers
-from kInstr import INSTR_NUMS   # Module containing predefined instrument numbers
+# Utility module imports for validated lookups
+from CellUtils import ResolveCell  # (color, instrument, note, play) names to a memoized tCellRec
+from kChord import PLAY_NOTE  # The play mode of a single-note cell
 
 # Importing tTxtReSzBtn for text resizing functionality
 from tTxtReSzBtn import tTxtReSzBtn
+from tFaceCache import FACE_CACHE  # Pre-rendered faces, shared process-wide
+
+# Latency instrumentation (inactive unless PROBE.bEnabled)
+from tLatencyProbe import PROBE
 
 class tMidiBtn(tTxtReSzBtn):
+    nGeneration = 0  # Counts Update() calls on every button; containers indexing buttons by note rebuild when it moves
+
     def __init__(self, oMidiPlayer: tMidiPlayer,
                  sNamClr: str,
                  sInstr: str,
                  sNote: str,
+                 sPlay: str = PLAY_NOTE,
                  min_font_size=3, max_font_size=90, font_name='Times New Roman', padding=4,
                  *args, **kwargs):
-        super().__init__(f"{sInstr}\n{sNote}", min_font_size, max_font_size, font_name, padding, *args, **kwargs)
+        super().__init__(ResolveCell(sNamClr, sInstr, sNote, sPlay).sLabel, min_font_size, max_font_size, font_name, padding, *args, **kwargs)
         self.oMidiPlayer = oMidiPlayer
         self.Instr, self.Note = None, None
-        self.Update(sNamClr, sInstr, sNote)
-
-    def Update(self, sNamClr, sInstr, sNote):
-        nInstr = ExitOnNoIntVal(sInstr, INSTR_NUMS, 'Instrument')
-        nNote = ExitOnNoIntVal(sNote, NOTE_NUMS, 'Note')
-        color = ExitOnNoRGBVal(sNamClr, COLOR_RGBS, 'Color')
-        text_color = get_contrastive_text_color(color)
+        self.oCell = None  # The tCellRec of the current assignment
+        self.oVoice = None  # The tCellVoice started by a left press and not yet released
+        self.bSelected = False  # Ctrl+click toggles; a right click on a selected button edits every selected sibling
+        self.bLit = False  # The note is sounding on a monitored MIDI input (see tMidiGrid.Listen())
+        self.Update(sNamClr, sInstr, sNote, sPlay)
+
+    @PROBE.Timed('Update')
+    def Update(self, sNamClr, sInstr, sNote, sPlay=PLAY_NOTE):
+        oCell = ResolveCell(sNamClr, sInstr, sNote, sPlay)  # Tables were validated on import; asserts on unknown names
         self.setObjectName("tMidiButton")  # Set a unique object name
-        self.setStyleSheet(f"QPushButton#tMidiButton {{background-color: {GetHexStr(color)}; color: {text_color};}}")
-        self.UpdateText(f"{sInstr}\n{sNote}")
-        self.Instr = nInstr
-        self.Note = nNote
-        #print(self.styleSheet())
+        self.UpdateText(oCell.sLabel)
+        self.oCell = oCell
+        self.Instr = oCell.nProgram
+        self.Note = oCell.nNote
+        tMidiBtn.nGeneration += 1
+        self.update()  # The colors may change without the label
+
+    def paintEvent(self, event):
+        # paintEvent(): Blits the cached face; it is rendered only the first time it is seen.
+        oCell = self.oCell
+        nState = (FACE_CACHE.PRESSED if self.isDown() else 0) | (FACE_CACHE.SELECTED if self.bSelected else 0) | \
+                 (FACE_CACHE.LIT if self.bLit else 0)
+        painter = QPainter(self)
+        painter.drawPixmap(0, 0, FACE_CACHE.Face(oCell.sHex, oCell.sText, self.text(), self.font(),
+                                                 self.width(), self.height(), nState, self.devicePixelRatioF()))
+        painter.end()
+
+    def SetSelected(self, bSelected):
+        if bSelected != self.bSelected:
+            self.bSelected = bSelected
+            self.update()
+
+    def SetLit(self, bLit):
+        if bLit != self.bLit:
+            self.bLit = bLit
+            self.update()
+
+    def Selection(self):
+        # Selection(): The buttons a right click on this one edits: every selected sibling if this one is selected.
+        parent = self.parentWidget()
+        if not self.bSelected or parent is None:
+            return [self]
+        return [btn for btn in parent.findChildren(tMidiBtn) if btn.bSelected]
 
     def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton and event.modifiers() & Qt.ControlModifier:
+            self.SetSelected(not self.bSelected)  # Selects instead of playing
+            return
         super().mousePressEvent(event)
         if event.button() == Qt.LeftButton:
-            self.oMidiPlayer.On(self.Instr, self.Note)
+            if PROBE.bEnabled:
+                PROBE.Begin(PROBE.INPUT_TO_MIDI)
+            self.ReleaseNote()
+            self.oVoice = self.Voice()
+            self.oVoice.Start()
 
     def mouseReleaseEvent(self, event):
         super().mouseReleaseEvent(event)
         if event.button() == Qt.LeftButton:
-            self.oMidiPlayer.Off(self.Instr, self.Note)
+            self.ReleaseNote()
         elif event.button() == Qt.RightButton:
             self.openSelectionDialog()
 
+    def Voice(self):
+        # Voice(): A new, unstarted tCellVoice for the current cell; the grid's keys and touches use it too.
+        oCell = self.oCell
+        return tCellVoice(self.oMidiPlayer, oCell.nProgram, oCell.vNotes, oCell.sPattern)
+
+    def ReleaseNote(self):
+        # ReleaseNote(): Stops what this button started, even if Update() changed the cell since.
+        oVoice, self.oVoice = self.oVoice, None
+        if oVoice:
+            oVoice.Stop()
+
+    def hideEvent(self, event):
+        self.ReleaseNote()  # A hidden button gets no mouse release
+        super().hideEvent(event)
+
     def openSelectionDialog(self):
-        dialog = tMidiBtnDlg(self)
+        vBtns = self.Selection()
+        for btn in vBtns:
+            btn.ReleaseNote()  # The modal dialog would swallow the left button's release
+        dialog = tMidiBtnDlg.Shared(self)
+        dialog.SetCells([btn.oCell[:4] for btn in vBtns])
         if dialog.exec_():
-            sNamClr, sInstr, sNote = dialog.getSelections()
-            self.Update(sNamClr, sInstr, sNote)
+            for btn in vBtns:
+                tCell = dialog.Merge(btn.oCell[:4])
+                if tCell != btn.oCell[:4]:
+                    btn.Update(*tCell)
+                    btn.CalcFontSz()  # The label changed; refit it to the current size
+                btn.SetSelected(False)
 
     @staticmethod
     def main():
         app = QApplication(argv)
-        class tSimPlayer:  # Mock tMidiPlayer class for testing
-            @staticmethod
-            def On(instr, note):
-                print(f"Note {note} of instrument {instr} pressed.")
-            @staticmethod
-            def Off(instr, note):
-                print(f"Note {note} of instrument {instr} released.")
+        oMidiPlayer = tMidiPlayer(oBackend=tRecordBackend())  # Records instead of playing; no MIDI device needed
+        oMidiPlayer.oLog.SetLevel(tEventLog.ECHO)              # Print each message as it is sent
         # Create an instance of tMidiBtn
-        btn = tMidiBtn(tSimPlayer(), 'Red', 'Accordion', 'Bass_D♯/E♭')
+        btn = tMidiBtn(oMidiPlayer, 'Red', 'Accordion', 'Bass_D♯/E♭')
         btn.resize(200, 100)  # Set initial size for testing
         btn.show()
         exit(app.exec_())
@@ -0,0 +1,174 @@
+"""
+tCtrlSurface.py
+
+Description:
+    This module defines tCtrlSurface, a strip of continuous controls placed next to a tMidiGrid:
+    sliders for pitch bend, modulation and expression (or any other controllers) and an XY pad
+    driving two controllers at once. Values go to tMidiPlayer.SetControl() through a
+    tCtrlThrottle, so a fast drag is coalesced to the latest value and paced to what a MIDI link
+    carries, and never crowds out the notes played on the grid. The throttle's pending values are
+    sent from a single-shot QTimer started for exactly the time the throttle asks for.
+
+Dependencies:
+    PyQt5: Used for the GUI components.
+    tMidiPlayer: A custom class handling MIDI playback functionalities.
+    tCtrlThrottle: Per-controller rate limiting with last-value-wins coalescing.
+
+Example:
+    >>> from tMidiPlayer import tMidiPlayer
+    >>> surface = tCtrlSurface(tMidiPlayer())
+    >>> surface.show()
+"""
+from math import ceil
+from sys import argv, exit
+
+from PyQt5.QtWidgets import QApplication, QWidget, QHBoxLayout, QVBoxLayout, QLabel, QSlider, QSizePolicy
+from PyQt5.QtGui import QColor, QPainter
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal
+
+from tMidiPlayer import tMidiPlayer
+from tCtrlThrottle import tCtrlThrottle
+
+
+class tXYPad(QWidget):
+    """
+    tXYPad is a square pad reporting the pointer position while a button is held.
+
+    Attributes:
+        sigMoved (pyqtSignal): Emitted with (x, y), each 0.0-1.0, y upward.
+        fX, fY (float): The position last reported.
+    """
+    sigMoved = pyqtSignal(float, float)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.fX, self.fY = 0.5, 0.5
+        self.setMinimumSize(80, 80)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+
+    def _Move(self, event):
+        # _Move(): Reports the pointer position, clamped to the pad.
+        w, h = max(1, self.width() - 1), max(1, self.height() - 1)
+        fX, fY = min(1.0, max(0.0, event.x() / w)), min(1.0, max(0.0, 1.0 - event.y() / h))
+        if (fX, fY) != (self.fX, self.fY):
+            self.fX, self.fY = fX, fY
+            self.update()
+            self.sigMoved.emit(fX, fY)
+
+    def mousePressEvent(self, event):
+        self._Move(event)
+
+    def mouseMoveEvent(self, event):
+        self._Move(event)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor('#202020'))
+        x, y = round(self.fX * (self.width() - 1)), round((1.0 - self.fY) * (self.height() - 1))
+        painter.setPen(QColor('#808080'))
+        painter.drawLine(x, 0, x, self.height())
+        painter.drawLine(0, y, self.width(), y)
+        painter.setBrush(QColor('#FFD700'))
+        painter.drawEllipse(x - 5, y - 5, 10, 10)
+        painter.end()
+
+
+class tCtrlSurface(QWidget):
+    """
+    tCtrlSurface is a strip of controller sliders and an XY pad feeding a tMidiPlayer.
+
+    Attributes:
+        CONTROLS (tuple): Per slider, (label, controller, minimum, maximum, rest value, springs back).
+        XY_CONTROLLERS (tuple): The controllers of the pad's x and y axes; None for no pad.
+        oMidiPlayer (tMidiPlayer): The player controllers are set on.
+        oThrottle (tCtrlThrottle): Paces the values sent.
+        oFlushTimer (QTimer): Single-shot timer sending the values the throttle holds back.
+        dSliders (dict): controller -> QSlider.
+        oPad (tXYPad): The XY pad, None without XY_CONTROLLERS.
+    """
+    CONTROLS = (('Bend', tMidiPlayer.PITCH_BEND, 0, 16383, tMidiPlayer.BEND_CENTER, True),
+                ('Mod', tMidiPlayer.MODULATION, 0, 127, 0, False),
+                ('Expr', tMidiPlayer.EXPRESSION, 0, 127, 127, False))
+    XY_CONTROLLERS = (74, 71)  # Brightness, resonance (General MIDI 2 sound controllers)
+
+    def __init__(self, oMidiPlayer, vControls=CONTROLS, tXY=XY_CONTROLLERS, parent=None, oThrottle=None):
+        """
+        Initializes the surface.
+
+        Args:
+            oMidiPlayer (tMidiPlayer): The MIDI player instance.
+            vControls (tuple, optional): The sliders, as in CONTROLS. Defaults to CONTROLS.
+            tXY (tuple, optional): The pad's (x, y) controllers, or None. Defaults to XY_CONTROLLERS.
+            parent (QWidget, optional): The parent widget. Defaults to None.
+            oThrottle (tCtrlThrottle, optional): Defaults to one sending to oMidiPlayer.SetControl.
+        """
+        super().__init__(parent)
+        self.oMidiPlayer = oMidiPlayer
+        self.oThrottle = oThrottle or tCtrlThrottle(oMidiPlayer.SetControl)
+        self.oFlushTimer = QTimer(self)
+        self.oFlushTimer.setSingleShot(True)
+        self.oFlushTimer.timeout.connect(self.Flush)
+        self.dSliders = {}
+        layout = QHBoxLayout(self)
+        for sLabel, controller, nMin, nMax, nRest, bSpring in vControls:
+            column = QVBoxLayout()
+            slider = QSlider(Qt.Vertical)
+            slider.setRange(nMin, nMax)
+            slider.setValue(nRest)  # Before connecting: the rest value is not sent
+            slider.valueChanged.connect(lambda value, controller=controller: self.Set(controller, value))
+            if bSpring:
+                slider.sliderReleased.connect(lambda slider=slider, nRest=nRest: slider.setValue(nRest))
+            column.addWidget(slider, 1, Qt.AlignHCenter)
+            column.addWidget(QLabel(sLabel), 0, Qt.AlignHCenter)
+            layout.addLayout(column)
+            self.dSliders[controller] = slider
+        self.oPad = None
+        if tXY:
+            self.oPad = tXYPad(self)
+            nX, nY = tXY
+            self.oPad.sigMoved.connect(lambda fX, fY: (self.Set(nX, round(fX * 127)), self.Set(nY, round(fY * 127))))
+            layout.addWidget(self.oPad, 1)
+
+    def Set(self, controller, value):
+        """
+        Hands a value to the throttle, and arranges for whatever it holds back to be sent in time.
+
+        Args:
+            controller (int): A CC number or tMidiPlayer.PITCH_BEND.
+            value (int): The value.
+        """
+        self._Schedule(self.oThrottle.Set(controller, value))
+
+    def Flush(self):
+        """
+        Sends the values that are due; runs on oFlushTimer.
+        """
+        self._Schedule(self.oThrottle.Flush())
+
+    def _Schedule(self, fDelay):
+        # _Schedule(): Starts oFlushTimer for fDelay ms, unless it is already due sooner.
+        if fDelay is None:
+            return
+        nMs = max(1, ceil(fDelay))
+        if not self.oFlushTimer.isActive() or self.oFlushTimer.remainingTime() > nMs:
+            self.oFlushTimer.start(nMs)
+
+    @staticmethod
+    def main():
+        """
+        The main method to run a test application for the tCtrlSurface class; messages are printed.
+        """
+        from tMidiBackend import tRecordBackend
+        from tEventLog import tEventLog
+        app = QApplication(argv)
+        oMidiPlayer = tMidiPlayer(oBackend=tRecordBackend())  # Records instead of playing; no MIDI device needed
+        oMidiPlayer.oLog.SetLevel(tEventLog.ECHO)              # Print each message as it is sent
+        oMidiPlayer.On(21, 60)                                 # A channel in use, so controllers are sent
+        surface = tCtrlSurface(oMidiPlayer)
+        surface.resize(400, 300)
+        surface.show()
+        exit(app.exec_())
+
+
+if __name__ == "__main__":
+    tCtrlSurface.main()
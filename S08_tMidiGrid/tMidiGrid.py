@@ -9,12 +9,32 @@ Description:
     that interacts with a MIDI player. Each button is associated with a specific musical
     instrument and note, and dynamically resizes based on the window size.
 
+    With Listen(), the grid also monitors a MIDI input (tMidiInput) and lights the buttons whose
+    note is sounding there. Buttons are found through a note -> buttons index, and incoming
+    messages are applied once per display frame (INPUT_MS), so a dense stream from a sequencer
+    costs at most one repaint per frame.
+
+    With SetKeyboardMode(), the computer keyboard plays the grid: the number row and the QWERTY,
+    ASDF and ZXCV rows play the first ten cells of grid rows 0-3. Keys are looked up by physical
+    scancode where the platform reports one (so any keyboard layout plays the same positions),
+    otherwise by key; auto-repeat is ignored, and each key holds its note until it is released.
+
+    On a touchscreen the grid takes the touch events itself: every touch point plays the cell under
+    it, and sliding a finger onto another cell ends the old note and starts the new one
+    (glissando). All the notes of one touch event are sent in one tMidiPlayer batch.
+
+    However a cell is played (mouse, key or touch), it plays its play mode through the button's
+    tCellVoice: its note, a chord sent as one write, a strum, or an arpeggio stepped by the player's
+    scheduler thread at tCellVoice.BPM (--bpm=N).
+
 Dependencies:
     PyQt5: Used for the GUI components.
     tMidiPlayer: A custom class handling MIDI playback functionalities.
     tMidiBtn: Custom button class that represents a MIDI controller button.
-    kNote: Module containing constants and mappings for notes.
-    kNamClr: Module containing constants and mappings for colors.
+    tMidiInput: Batched MIDI input poller, for Listen().
+    tCellVoice: Plays a cell's note, chord, strum or arpeggio while a key or touch holds it.
+    tLayout: The grid's rows, columns and cells, built in or loaded from a layout file.
+    tLatencyProbe: Latency instrumentation, shown by the optional overlay.
 
 Usage:
     This class is intended to be used in a graphical MIDI control application.
@@ -31,12 +51,18 @@ Notes:
     - This module is part of a larger application that requires a graphical environment to run.
 """
 
-from PyQt5.QtWidgets import QApplication, QWidget, QGridLayout, QSizePolicy
-from PyQt5.QtCore import Qt
+from sys import argv
+from bisect import bisect_right
+from tLatencyProbe import PROBE  # First, so startup milestones are timed from here
+from PyQt5.QtWidgets import QApplication, QWidget, QGridLayout, QHBoxLayout, QSizePolicy, QLabel, QShortcut
+from PyQt5.QtGui import QFont, QKeySequence
+from PyQt5.QtCore import Qt, QEvent, QTimer, pyqtSignal
 from tMidiPlayer import tMidiPlayer
+from tMidiBackend import tPygameBackend
+from tMidiInput import tMidiInput
+from tCellVoice import tCellVoice
 from tMidiBtn import tMidiBtn
-from kNote import NOTE_NUMS
-from kNamClr import COLOR_RGBS
+from tLayout import tLayout
 
 class tMidiGrid(QWidget):
     """
@@ -44,84 +70,566 @@ class tMidiGrid(QWidget):
     each representing a MIDI controller button.
 
     Attributes:
-        NUM_ROWS (int): The number of rows in the grid.
-        NUM_COLS (int): The number of columns in the grid.
+        NUM_ROWS (int): The default number of rows in the grid.
+        NUM_COLS (int): The default number of columns in the grid.
+        RESIZE_MS (int): Interval over which resize events are coalesced into one font pass.
         oMidiPlayer (tMidiPlayer): The MIDI player instance used to handle MIDI functionalities.
+        oLayout (tLayout): The layout last applied; cells reassigned since are only in the buttons.
+        vBtns (list): The grid's tMidiBtn buttons in row-major order.
+        oResizeTimer (QTimer): Single-shot timer that runs the coalesced font pass.
+        OVERLAY_MS (int): Refresh interval of the latency overlay.
+        oOverlay (QLabel): The latency overlay, None until ShowLatencyOverlay() is called.
+        oPanicKey (QShortcut): Escape, bound to Panic().
+        INPUT_MS (int): Interval over which incoming MIDI messages are coalesced into one update.
+        oInput (tMidiInput): The monitored MIDI input, None unless Listen() was called.
+        oInputTimer (QTimer): Single-shot timer that applies the coalesced input.
+        vInNotes (list): Per channel, a bitset of the notes sounding on the input.
+        sigInput (pyqtSignal): Emitted by the input's poller thread when messages are waiting.
+        KEY_ROWS (tuple): Keyboard rows mapped onto grid rows 0-3, as US-layout characters.
+        SCAN_BASE (dict): QPA platform -> scancode of KEY_ROWS[0][0]'s position; others use Qt key codes.
+        bKeyboard (bool): Whether the computer keyboard plays the grid.
+        dKeyHeld (dict): Scancode or key -> (button, tCellVoice) held by that key.
+        dTouch (dict): Touch point id -> cell index it is playing.
+        dCellTouches (dict): Cell index -> (number of touch points on it, tCellVoice); the voice stops with the last.
     """
     NUM_ROWS = 4
     NUM_COLS = 8
+    RESIZE_MS = 16  # About one display frame
+    INPUT_MS = 16
+    OVERLAY_MS = 500
+    sigInput = pyqtSignal()  # Queued to the GUI thread
+    KEY_ROWS = ('1234567890', 'QWERTYUIOP', 'ASDFGHJKL;', 'ZXCVBNM,./')
+    _SCAN_ROWS = (0x02, 0x10, 0x1E, 0x2C)  # PC set 1 scancode of each row's first key; the rows run on by one
+    SCAN_BASE = {'windows': 0, 'xcb': 8, 'wayland': 8}  # Added to set 1 codes: X11/Wayland keycodes are evdev + 8
 
-    def __init__(self, oMidiPlayer, parent=None):
+    def __init__(self, oMidiPlayer, parent=None, oLayout=None):
         """
         Initializes the tMidiGrid with the specified MIDI player.
 
         Args:
             oMidiPlayer (tMidiPlayer): The MIDI player instance.
             parent (QWidget, optional): The parent widget. Defaults to None.
+            oLayout (tLayout, optional): The cells. Defaults to tLayout.Default(NUM_ROWS, NUM_COLS).
         """
         super().__init__(parent)
         self.oMidiPlayer = oMidiPlayer
+        self.oLayout = oLayout or tLayout.Default(self.NUM_ROWS, self.NUM_COLS)
+        self.vBtns = []
+        self.oResizeTimer = QTimer(self)
+        self.oResizeTimer.setSingleShot(True)
+        self.oResizeTimer.setInterval(self.RESIZE_MS)
+        self.oResizeTimer.timeout.connect(self.updateGridSize)
+        self.oOverlay, self.oOverlayTimer = None, None
+        self._bProbeWas = None  # PROBE.bEnabled from before the overlay was shown; None while it is hidden
+        self.oInput = None
+        self.oInputTimer = QTimer(self)
+        self.oInputTimer.setSingleShot(True)
+        self.oInputTimer.setInterval(self.INPUT_MS)
+        self.oInputTimer.timeout.connect(self.updateInput)
+        self.sigInput.connect(self._OnInput)
+        self.vInNotes = [0] * 16
+        self._dNoteBtns, self._nIndexGen = {}, -1  # note -> buttons, as of tMidiBtn.nGeneration
+        self.bKeyboard = False
+        self.dKeyHeld = {}
+        self._dKeyCells, self._bScanCodes = {}, False  # Scancode (or key) -> cell index
+        self.dTouch, self.dCellTouches = {}, {}
+        self._vColX, self._vRowY = None, None  # Cell left and top edges for CellAt(); None until needed
+        self.setAttribute(Qt.WA_AcceptTouchEvents)  # The buttons do not, so touches on them come here
+        # A shortcut, not keyPressEvent: a held QPushButton consumes Escape itself
+        self.oPanicKey = QShortcut(QKeySequence(Qt.Key_Escape), self, self.Panic,
+                                   context=Qt.WidgetWithChildrenShortcut)
         self.initUI()
 
     def initUI(self):
         """
         Initializes the user interface by creating a grid layout and adding
-        tMidiBtn buttons to it.
+        tMidiBtn buttons to it, one per cell of oLayout.
         """
         layout = QGridLayout(self)
         layout.setSpacing(0)  # Remove spacing between buttons
         self.setLayout(layout)
+        self._BuildButtons()
+
+    def _BuildButtons(self):
+        """
+        Replaces the buttons with one per cell of oLayout.
+        """
+        layout = self.layout()
+        self.ReleaseKeys()
+        self.ReleaseTouches()
+        self._vColX, self._vRowY = None, None
+        for btn in self.vBtns:
+            btn.ReleaseNote()
+            layout.removeWidget(btn)
+            btn.deleteLater()
+        self.vBtns = []
+        for index in range(max(layout.rowCount(), self.oLayout.nRows)):
+            layout.setRowStretch(index, 1 if index < self.oLayout.nRows else 0)
+        for index in range(max(layout.columnCount(), self.oLayout.nCols)):
+            layout.setColumnStretch(index, 1 if index < self.oLayout.nCols else 0)
+        for index, cell in enumerate(self.oLayout.vCells):
+            btn = tMidiBtn(self.oMidiPlayer, *cell)
+            btn.bAutoFit = False  # The grid fits fonts for all buttons at once
+            btn.setMinimumSize(1, 1)  # Size follows the grid, not the fitted font
+            btn.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+            if self.bKeyboard:
+                btn.setFocusPolicy(Qt.NoFocus)  # The grid keeps the focus for keyboard play
+            layout.addWidget(btn, index // self.oLayout.nCols, index % self.oLayout.nCols)
+            self.vBtns.append(btn)
+        self._BuildKeyCells()
+
+    def _BuildKeyCells(self):
+        """
+        Precomputes the scancode (or key) -> cell table for the current shape, so a key press
+        costs one dictionary lookup.
+        """
+        nBase = self.SCAN_BASE.get(QApplication.platformName())
+        self._bScanCodes = nBase is not None
+        self._dKeyCells = {}
+        nCols = self.oLayout.nCols
+        for row, sKeys in enumerate(self.KEY_ROWS[:self.oLayout.nRows]):
+            for col, sKey in enumerate(sKeys[:nCols]):
+                code = nBase + self._SCAN_ROWS[row] + col if self._bScanCodes else ord(sKey)  # Qt.Key_A == ord('A')
+                self._dKeyCells[code] = row * nCols + col
+
+    def ApplyLayout(self, oLayout):
+        """
+        Switches to another layout. With the same rows and columns only the cells that differ
+        are updated and refitted, with repaints suspended until all of them are done; otherwise
+        the buttons are rebuilt.
+
+        Args:
+            oLayout (tLayout): The layout, already validated.
+
+        Returns:
+            int: The number of cells updated.
+        """
+        if not oLayout.SameShape(self.oLayout):
+            self.oLayout = oLayout
+            self.setUpdatesEnabled(False)
+            try:
+                self._BuildButtons()
+            finally:
+                self.setUpdatesEnabled(True)
+            self.updateGridSize()
+            return len(oLayout)
+        vChanged = oLayout.Diff([btn.oCell[:4] for btn in self.vBtns])  # Includes cells reassigned by dialog
+        self.oLayout = oLayout
+        self.setUpdatesEnabled(False)
+        try:
+            for index in vChanged:
+                btn = self.vBtns[index]
+                btn.Update(*oLayout.vCells[index])
+                btn.CalcFontSz()
+        finally:
+            self.setUpdatesEnabled(True)
+        return len(vChanged)
+
+    def Listen(self, input_id=None, oSource=None):
+        """
+        Starts monitoring a MIDI input; buttons light up while their note sounds on it.
+
+        Args:
+            input_id (int or str, optional): Device id or name; None for the default input.
+            oSource (optional): Passed to tMidiInput instead of opening a device; False to Feed() only.
+
+        Returns:
+            tMidiInput: The input, also kept in oInput.
+        """
+        self.StopListening()
+        self.oInput = tMidiInput(input_id, fnNotify=self.sigInput.emit, oSource=oSource)
+        return self.oInput
+
+    def StopListening(self):
+        """
+        Closes the monitored input and unlights every button.
+        """
+        if self.oInput is not None:
+            self.oInput.Close()
+            self.oInput = None
+        self.oInputTimer.stop()
+        self.vInNotes = [0] * 16
+        for btn in self.vBtns:
+            btn.SetLit(False)
+
+    def _OnInput(self):
+        # _OnInput(): Messages are waiting; apply them at the end of this frame, with any that follow.
+        if not self.oInputTimer.isActive():
+            self.oInputTimer.start()
+
+    def _NoteBtns(self):
+        """
+        Returns the note -> buttons index, rebuilt only after some button was updated.
+        """
+        if self._nIndexGen != tMidiBtn.nGeneration:
+            dNoteBtns = {}
+            for btn in self.vBtns:
+                dNoteBtns.setdefault(btn.Note, []).append(btn)
+            self._dNoteBtns, self._nIndexGen = dNoteBtns, tMidiBtn.nGeneration
+            nSounding = 0
+            for nBits in self.vInNotes:
+                nSounding |= nBits
+            for btn in self.vBtns:  # A button may have moved onto or off a sounding note
+                btn.SetLit(bool(nSounding >> btn.Note & 1))
+        return self._dNoteBtns
+
+    def updateInput(self):
+        """
+        Applies every message waiting on the input and relights only the buttons whose note
+        started or stopped sounding on any channel.
+        """
+        if self.oInput is None:
+            return
+        vInNotes = self.vInNotes
+        nBefore = 0
+        for nBits in vInNotes:
+            nBefore |= nBits
+        for status, channel, note, velocity in self.oInput.Drain():
+            if status == tMidiInput.NOTE_ON and velocity:
+                vInNotes[channel] |= 1 << note
+            elif status == tMidiInput.CONTROL_CHANGE:  # All notes off
+                vInNotes[channel] = 0
+            else:
+                vInNotes[channel] &= ~(1 << note)
+        nAfter = 0
+        for nBits in vInNotes:
+            nAfter |= nBits
+        nChanged = nBefore ^ nAfter
+        dNoteBtns = self._NoteBtns()
+        while nChanged:
+            nBit = nChanged & -nChanged
+            note = nBit.bit_length() - 1
+            for btn in dNoteBtns.get(note, ()):
+                btn.SetLit(bool(nAfter & nBit))
+            nChanged ^= nBit
+
+    def paintEvent(self, event):
+        """
+        Records the 'first_frame' startup milestone on the first paint.
+
+        Args:
+            event (QPaintEvent): The paint event.
+        """
+        super().paintEvent(event)
+        PROBE.Milestone('first_frame')
+
+    def CellAt(self, x, y):
+        """
+        Returns the index of the cell containing a point, by binary search of the cell edges.
+
+        Args:
+            x (int): The x coordinate in grid coordinates.
+            y (int): The y coordinate in grid coordinates.
+
+        Returns:
+            int: The row-major cell index, or -1 if the point is outside every cell.
+        """
+        nCols = self.oLayout.nCols
+        if self._vColX is None:
+            self._vColX = [btn.x() for btn in self.vBtns[:nCols]]
+            self._vRowY = [btn.y() for btn in self.vBtns[::nCols]]
+        last = self.vBtns[-1].geometry()
+        if x < self._vColX[0] or y < self._vRowY[0] or x > last.right() or y > last.bottom():
+            return -1
+        return (bisect_right(self._vRowY, y) - 1) * nCols + bisect_right(self._vColX, x) - 1
 
-        # Generate a sorted list of notes and colors
-        sorted_notes = sorted(NOTE_NUMS.items(), key=lambda x: x[1])[:self.NUM_ROWS * self.NUM_COLS]
-        sorted_colors = sorted(COLOR_RGBS.keys())[:self.NUM_ROWS * self.NUM_COLS]
-
-        index = 0
-        for row in range(self.NUM_ROWS):
-            for col in range(self.NUM_COLS):
-                if index < len(sorted_notes) and index < len(sorted_colors):
-                    note, color = sorted_notes[index][0], sorted_colors[index]
-                    btn = tMidiBtn(self.oMidiPlayer, color, 'Accordion', note)
-                    btn.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
-                    layout.addWidget(btn, row, col)
-                    layout.setRowStretch(row, 1)
-                    layout.setColumnStretch(col, 1)
-                index += 1
+    def event(self, event):
+        if event.type() in (QEvent.TouchBegin, QEvent.TouchUpdate, QEvent.TouchEnd, QEvent.TouchCancel):
+            self.touchEvent(event)
+            return True
+        return super().event(event)
+
+    def touchEvent(self, event):
+        """
+        Moves each touch point's note to the cell now under it: a new point starts a note, a point
+        sliding onto another cell ends its note and starts that cell's, a lifted point ends its note.
+        A cell touched by several points sounds once, until the last leaves. Note-offs go before
+        note-ons, and the whole event is one tMidiPlayer batch.
+
+        Args:
+            event (QTouchEvent): The touch event.
+        """
+        bCancel = event.type() == QEvent.TouchCancel
+        vOff, vOn = [], []
+        dTouch = self.dTouch
+        for point in event.touchPoints():
+            nId = point.id()
+            if bCancel or point.state() == Qt.TouchPointReleased:
+                index = -1
+            else:
+                pos = point.pos()
+                index = self.CellAt(int(pos.x()), int(pos.y()))
+            nHeld = dTouch.get(nId, -1)
+            if nHeld == index:
+                continue  # Still on the same cell
+            if nHeld >= 0:
+                del dTouch[nId]
+                vOff.append(nHeld)
+            if index >= 0:
+                dTouch[nId] = index
+                vOn.append(index)
+        if bCancel:  # Points missing from a cancel are gone too
+            vOff.extend(dTouch.values())
+            dTouch.clear()
+        if vOff or vOn:
+            if vOn and PROBE.bEnabled:
+                PROBE.Begin(PROBE.INPUT_TO_MIDI)
+            self._PlayTouches(vOff, vOn)
+        event.accept()
+
+    def _PlayTouches(self, vOff, vOn):
+        # _PlayTouches(): Stops the cells touch points left, then starts the cells they reached, in one batch.
+        dCellTouches, oPlayer = self.dCellTouches, self.oMidiPlayer
+        oPlayer.BeginBatch()
+        try:
+            for index in vOff:
+                nTouches, oVoice = dCellTouches.pop(index)
+                if nTouches > 1:
+                    dCellTouches[index] = (nTouches - 1, oVoice)
+                else:
+                    oVoice.Stop()
+                    self.vBtns[index].setDown(False)
+            for index in vOn:
+                tTouches = dCellTouches.get(index)
+                if tTouches is not None:
+                    dCellTouches[index] = (tTouches[0] + 1, tTouches[1])
+                else:
+                    btn = self.vBtns[index]
+                    oVoice = btn.Voice()
+                    dCellTouches[index] = (1, oVoice)
+                    oVoice.Start()
+                    btn.setDown(True)
+        finally:
+            oPlayer.EndBatch()
+
+    def ReleaseTouches(self):
+        """
+        Turns off every note held by a touch point.
+        """
+        if self.dTouch:
+            vOff = list(self.dTouch.values())
+            self.dTouch.clear()
+            self._PlayTouches(vOff, [])
+
+    def SetKeyboardMode(self, bKeyboard=True):
+        """
+        Turns keyboard play on or off. While on, the grid keeps the focus: buttons no longer take
+        it when clicked, so a key pressed after a click still reaches keyPressEvent.
+
+        Args:
+            bKeyboard (bool, optional): Whether the keyboard plays the grid. Defaults to True.
+        """
+        self.ReleaseKeys()
+        self.bKeyboard = bKeyboard
+        self.setFocusPolicy(Qt.StrongFocus if bKeyboard else Qt.NoFocus)
+        for btn in self.vBtns:
+            btn.setFocusPolicy(Qt.NoFocus if bKeyboard else Qt.StrongFocus)
+        if bKeyboard:
+            self.setFocus()
+
+    def _KeyCode(self, event):
+        # _KeyCode(): The physical scancode where the platform reports one, else the key.
+        return event.nativeScanCode() if self._bScanCodes and event.nativeScanCode() else event.key()
+
+    def keyPressEvent(self, event):
+        """
+        Plays the cell mapped to a key; auto-repeats, keys already held and keys with Ctrl, Alt
+        or Meta are ignored.
+
+        Args:
+            event (QKeyEvent): The key event.
+        """
+        if not self.bKeyboard or event.modifiers() & (Qt.ControlModifier | Qt.AltModifier | Qt.MetaModifier):
+            super().keyPressEvent(event)
+            return
+        code = self._KeyCode(event)
+        index = self._dKeyCells.get(code)
+        if index is None:
+            super().keyPressEvent(event)
+            return
+        if not event.isAutoRepeat() and code not in self.dKeyHeld:
+            if PROBE.bEnabled:
+                PROBE.Begin(PROBE.INPUT_TO_MIDI)
+            btn = self.vBtns[index]
+            oVoice = btn.Voice()
+            self.dKeyHeld[code] = (btn, oVoice)
+            oVoice.Start()
+            btn.setDown(True)
+        event.accept()
+
+    def keyReleaseEvent(self, event):
+        """
+        Turns off the note held by a key; the releases that accompany auto-repeat are ignored.
+
+        Args:
+            event (QKeyEvent): The key event.
+        """
+        if event.isAutoRepeat():
+            event.accept()
+            return
+        tHeld = self.dKeyHeld.pop(self._KeyCode(event), None)
+        if tHeld is None:
+            super().keyReleaseEvent(event)
+            return
+        btn, oVoice = tHeld
+        oVoice.Stop()
+        btn.setDown(False)
+        event.accept()
+
+    def ReleaseKeys(self):
+        """
+        Turns off every note held by a key; a key released elsewhere is never seen.
+        """
+        dKeyHeld, self.dKeyHeld = self.dKeyHeld, {}
+        for btn, oVoice in dKeyHeld.values():
+            oVoice.Stop()
+            btn.setDown(False)
+
+    def focusOutEvent(self, event):
+        self.ReleaseKeys()
+        super().focusOutEvent(event)
+
+    def hideEvent(self, event):
+        self.ReleaseKeys()
+        self.ReleaseTouches()
+        super().hideEvent(event)
+
+    def Panic(self):
+        """
+        Releases every button and key and turns off every note (tMidiPlayer.Panic()); bound to Escape.
+        """
+        self.ReleaseKeys()
+        self.ReleaseTouches()
+        for btn in self.vBtns:
+            btn.ReleaseNote()
+        self.oMidiPlayer.Panic()
 
     def resizeEvent(self, event):
         """
-        Handles the resize event to ensure the grid is resized properly.
+        Schedules one font pass for a burst of resize events.
+
+        The first event of a burst starts oResizeTimer; later events within RESIZE_MS
+        are absorbed, so a window drag costs at most one pass per frame.
 
         Args:
             event (QResizeEvent): The resize event.
         """
         super().resizeEvent(event)
-        self.updateGridSize()
+        self._vColX, self._vRowY = None, None  # The layout has moved the buttons
+        if not self.oResizeTimer.isActive():
+            self.oResizeTimer.start()
 
+    @PROBE.Timed('resize')
     def updateGridSize(self):
         """
-        Updates the size of each cell in the grid based on the current window size.
+        Fits the fonts of every button in the grid in one pass.
+
+        Buttons with the same label, size and fitter settings share a single fit. The
+        results are applied with widget updates suspended, so the grid repaints once.
+        """
+        dFits = {}
+        vApply = []
+        for btn in self.vBtns:
+            oFitter = btn.oFitter
+            key = (btn.text(), btn.width(), btn.height(),
+                   oFitter.FONT_NAME, oFitter.MIN_FONT_SZ, oFitter.MAX_FONT_SZ, oFitter.PADDING)
+            font_size = dFits.get(key)
+            if font_size is None:
+                font_size = dFits[key] = oFitter.Fit(btn.text(), btn.width(), btn.height())
+            vApply.append((btn, font_size))
+        self.setUpdatesEnabled(False)
+        try:
+            for btn, font_size in vApply:
+                btn.ApplyFontSz(font_size)
+        finally:
+            self.setUpdatesEnabled(True)
+
+    def ShowLatencyOverlay(self, bShow=True):
+        """
+        Shows or hides a text overlay with the PROBE stage percentiles, refreshed every OVERLAY_MS.
+        Showing the overlay enables PROBE; hiding it puts PROBE back as it was before, so a PROBE
+        already enabled elsewhere (e.g. by a benchmark) stays on.
+
+        Args:
+            bShow (bool, optional): Whether to show the overlay. Defaults to True.
+        """
+        if bShow and self._bProbeWas is None:
+            self._bProbeWas = PROBE.bEnabled
+            PROBE.bEnabled = True
+        elif not bShow and self._bProbeWas is not None:
+            PROBE.bEnabled, self._bProbeWas = self._bProbeWas, None
+        if self.oOverlay is None:
+            if not bShow:
+                return
+            self.oOverlay = QLabel(self)
+            self.oOverlay.setFont(QFont('Courier New', 9))
+            self.oOverlay.setStyleSheet('background-color: rgba(0, 0, 0, 160); color: #FFFFFF; padding: 4px;')
+            self.oOverlay.setAttribute(Qt.WA_TransparentForMouseEvents)  # Clicks go to the buttons
+            self.oOverlayTimer = QTimer(self)
+            self.oOverlayTimer.setInterval(self.OVERLAY_MS)
+            self.oOverlayTimer.timeout.connect(self.updateLatencyOverlay)
+        if bShow:
+            self.updateLatencyOverlay()
+            self.oOverlay.show()
+            self.oOverlay.raise_()
+            self.oOverlayTimer.start()
+        else:
+            self.oOverlayTimer.stop()
+            self.oOverlay.hide()
+
+    def updateLatencyOverlay(self):
+        """
+        Refreshes the overlay text from PROBE.
         """
-        grid_layout = self.layout()
-        total_rows = grid_layout.rowCount()
-        total_cols = grid_layout.columnCount()
-        for row in range(total_rows):
-            grid_layout.setRowStretch(row, 1)
-        for col in range(total_cols):
-            grid_layout.setColumnStretch(col, 1)
+        self.oOverlay.setText(PROBE.Report())
+        self.oOverlay.adjustSize()
 
     @staticmethod
     def main():
         """
         The main method to run a test application for the tMidiGrid class.
+        An optional argument names the MIDI output (device id or name); the default output is used
+        otherwise. The output is opened in the background once the window is up.
+        --layout=FILE.json loads a layout file; --record=FILE.mid records the session to a Standard
+        MIDI File; --input[=NAME] lights the buttons played on a MIDI input; --controls adds a
+        tCtrlSurface beside the grid; --bpm=N sets the arpeggio tempo; --latency shows the overlay.
+        The computer keyboard plays the grid.
         """
         app = QApplication([])
-        midiPlayer = tMidiPlayer()  # Replace with actual implementation
-        grid = tMidiGrid(midiPlayer)
+        PROBE.bPrintMilestones = True
+        vArgs = [s for s in argv[1:] if not s.startswith('--')]
+        oBackend = tPygameBackend(vArgs[0] if vArgs else None, tMidiPlayer.LATENCY, bDeferred=True)
+        midiPlayer = tMidiPlayer(bThreaded=True, oBackend=oBackend)  # Keep MIDI writes off the GUI thread
+        oLayout = None
+        for sArg in argv[1:]:
+            if sArg.startswith('--layout='):
+                oLayout = tLayout.Load(sArg[len('--layout='):])
+            elif sArg.startswith('--bpm='):
+                tCellVoice.BPM = float(sArg[len('--bpm='):])
+        grid = tMidiGrid(midiPlayer, oLayout=oLayout)
         grid.setMinimumSize(100, 100)  # Set a small minimum size
-        grid.resize(300, 150)  # Set a small initial size
-        grid.show()
-        exit(app.exec_())
+        window = grid
+        if '--controls' in argv:
+            from tCtrlSurface import tCtrlSurface
+            window = QWidget()
+            row = QHBoxLayout(window)
+            row.addWidget(grid, 1)
+            row.addWidget(tCtrlSurface(midiPlayer))
+        window.resize(300 if window is grid else 600, 150 if window is grid else 300)  # Set a small initial size
+        window.show()
+        grid.SetKeyboardMode()
+        QTimer.singleShot(0, oBackend.OpenAsync)  # After the first frame is queued
+        if '--latency' in argv:
+            grid.ShowLatencyOverlay()
+        for sArg in argv[1:]:
+            if sArg.startswith('--record='):
+                midiPlayer.StartRecording(sArg[len('--record='):])
+            elif sArg == '--input' or sArg.startswith('--input='):
+                grid.Listen(sArg[len('--input='):] or None)
+        nResult = app.exec_()
+        grid.StopListening()
+        midiPlayer.Close()  # Ends any recording
+        exit(nResult)
 
 if __name__ == "__main__":
     tMidiGrid.main()
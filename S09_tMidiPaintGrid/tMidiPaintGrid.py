@@ -0,0 +1,343 @@
+"""
+tMidiPaintGrid.py
+
+Description:
+    This module defines the tMidiPaintGrid class, a single QWidget that draws a whole MIDI
+    controller grid itself. It is an alternative to tMidiGrid for large layouts: instead of one
+    tMidiBtn (a full QPushButton with its own stylesheet) per cell, all cells are painted in one
+    paintEvent and mouse positions are mapped to cells with index arithmetic. The widget count
+    stays constant whatever the number of cells, and only the cells that change are repainted.
+
+    Cells behave like tMidiBtn: a left press starts the cell's tCellVoice (its note, chord, strum
+    or arpeggio), the release stops it, and a right click opens tMidiBtnDlg to reassign the cell. Ctrl+click selects
+    cells; a right click on a selected cell reassigns every selected cell in one dialog.
+
+Dependencies:
+    PyQt5: Used for the GUI components.
+    tMidiPlayer: A custom class handling MIDI playback functionalities.
+    tMidiBtnDlg: Dialog used to reassign a cell's color, instrument, note and play mode.
+    tCellVoice: Plays a cell's note, chord, strum or arpeggio while it is held.
+    tFontFitter: Shared font-size fitting engine.
+    tFaceCache: Shared cache of pre-rendered cell faces; a repaint blits one pixmap per cell.
+    CellUtils: Validated, memoized lookups of cell names.
+    tLayout: The grid's rows, columns and cells.
+
+Usage:
+    Run this module directly to open a 16x16 grid:
+        $ python tMidiPaintGrid.py
+
+Example:
+    >>> from tMidiPlayer import tMidiPlayer
+    >>> grid = tMidiPaintGrid(tMidiPlayer(), 8, 16)
+    >>> grid.show()
+"""
+from sys import argv, exit
+
+from PyQt5.QtWidgets import QApplication, QWidget, QSizePolicy
+from PyQt5.QtGui import QPainter, QRegion
+from PyQt5.QtCore import Qt, QRect
+
+from tMidiPlayer import tMidiPlayer
+from tMidiBtnDlg import tMidiBtnDlg
+from tCellVoice import tCellVoice
+from tFontFitter import tFontFitter
+from tFaceCache import FACE_CACHE
+from CellUtils import ResolveCell
+from kChord import PLAY_NOTE
+from tLatencyProbe import PROBE
+from tLayout import tLayout
+
+
+class tMidiPaintGrid(QWidget):
+    """
+    tMidiPaintGrid is a custom QWidget that paints a grid of MIDI cells in a single widget.
+
+    Attributes:
+        NUM_ROWS (int): The default number of rows.
+        NUM_COLS (int): The default number of columns.
+        oMidiPlayer (tMidiPlayer): The MIDI player instance used to handle MIDI functionalities.
+        nRows (int): The number of rows in the grid.
+        nCols (int): The number of columns in the grid.
+        oLayout (tLayout): The layout last applied; cells reassigned since are only in vCells.
+        vCells (list): Per cell, row-major: [sNamClr, sInstr, sNote, sPlay, nInstr, nNote, bg hex, fg hex,
+            notes played, pattern, label].
+        nPressed (int): Index of the cell held with the left button, -1 if none.
+        oVoice (tCellVoice): The voice of the held cell, None if none.
+        vSelected (set): Indices of the cells selected with Ctrl+click.
+        oFitter (tFontFitter): Fits cell labels to the cell size.
+    """
+    NUM_ROWS = 4
+    NUM_COLS = 8
+
+    # Indices into a vCells entry
+    NAM_CLR, INSTR, NOTE, PLAY, N_INSTR, N_NOTE, BG, FG, NOTES, PATTERN, LABEL = range(11)
+
+    def __init__(self, oMidiPlayer, nRows=NUM_ROWS, nCols=NUM_COLS, parent=None, oLayout=None):
+        """
+        Initializes the tMidiPaintGrid with the specified MIDI player and dimensions.
+
+        Args:
+            oMidiPlayer (tMidiPlayer): The MIDI player instance.
+            nRows (int, optional): The number of rows. Defaults to NUM_ROWS.
+            nCols (int, optional): The number of columns. Defaults to NUM_COLS.
+            parent (QWidget, optional): The parent widget. Defaults to None.
+            oLayout (tLayout, optional): The cells; overrides nRows and nCols. Defaults to
+                tLayout.Default(nRows, nCols).
+        """
+        super().__init__(parent)
+        assert nRows > 0 and nCols > 0, f'ERR: tMidiPaintGrid: {nRows}x{nCols} grid is empty.'
+        self.oMidiPlayer = oMidiPlayer
+        self.oLayout = oLayout or tLayout.Default(nRows, nCols)
+        self.nRows, self.nCols = self.oLayout.nRows, self.oLayout.nCols
+        self.vCells = [None] * len(self.oLayout)
+        self.nPressed = -1
+        self.oVoice = None
+        self.vSelected = set()
+        self.oFitter = tFontFitter('Times New Roman', 3, 90, 4)
+        self._dFonts = {}  # (label, width, height) -> fitted QFont
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        self.setAttribute(Qt.WA_OpaquePaintEvent)  # Every pixel is painted by paintEvent
+        self.setFocusPolicy(Qt.StrongFocus)  # For Escape
+        self.initUI()
+
+    def initUI(self):
+        """
+        Fills the cells from oLayout.
+        """
+        for index, oCell in enumerate(self.oLayout.vRecs):
+            self._SetCell(index, oCell)
+
+    def _SetCell(self, index, oCell):
+        # _SetCell(): Stores a resolved cell without repainting.
+        self.vCells[index] = list(oCell)
+
+    def ApplyLayout(self, oLayout):
+        """
+        Switches to another layout. With the same rows and columns only the cells that differ
+        are replaced and repainted, in one update; otherwise the whole grid is rebuilt.
+
+        Args:
+            oLayout (tLayout): The layout, already validated.
+
+        Returns:
+            int: The number of cells updated.
+        """
+        self.ReleasePressed()
+        if not oLayout.SameShape(self.oLayout):
+            self.oLayout = oLayout
+            self.nRows, self.nCols = oLayout.nRows, oLayout.nCols
+            self.vCells = [None] * len(oLayout)
+            self.vSelected.clear()
+            self._dFonts.clear()
+            self.initUI()
+            self.update()
+            return len(oLayout)
+        vChanged = oLayout.Diff([cell[:4] for cell in self.vCells])  # Includes cells reassigned by dialog
+        self.oLayout = oLayout
+        region = QRegion()
+        for index in vChanged:
+            self._SetCell(index, oLayout.vRecs[index])
+            region += self.CellRect(index)
+        if vChanged:
+            self.update(region)
+        return len(vChanged)
+
+    def UpdateCell(self, index, sNamClr, sInstr, sNote, sPlay=PLAY_NOTE):
+        """
+        Assigns a color, instrument, note and play mode to a cell and repaints it.
+
+        Args:
+            index (int): The row-major cell index.
+            sNamClr (str): The color name.
+            sInstr (str): The instrument name.
+            sNote (str): The note name.
+            sPlay (str, optional): The play mode (kChord). Defaults to PLAY_NOTE.
+        """
+        if index == self.nPressed:
+            self.ReleasePressed()  # Its note would otherwise be left on
+        self._SetCell(index, ResolveCell(sNamClr, sInstr, sNote, sPlay))
+        self.update(self.CellRect(index))
+
+    def CellRect(self, index):
+        """
+        Returns the rectangle of a cell.
+
+        Args:
+            index (int): The row-major cell index.
+
+        Returns:
+            QRect: The cell's rectangle in widget coordinates.
+        """
+        row, col = divmod(index, self.nCols)
+        w, h = self.width(), self.height()
+        x0, x1 = col * w // self.nCols, (col + 1) * w // self.nCols
+        y0, y1 = row * h // self.nRows, (row + 1) * h // self.nRows
+        return QRect(x0, y0, x1 - x0, y1 - y0)
+
+    def CellAt(self, x, y):
+        """
+        Returns the index of the cell containing a point, the inverse of CellRect.
+
+        Args:
+            x (int): The x coordinate in widget coordinates.
+            y (int): The y coordinate in widget coordinates.
+
+        Returns:
+            int: The row-major cell index, or -1 if the point is outside the grid.
+        """
+        w, h = self.width(), self.height()
+        if not (0 <= x < w and 0 <= y < h):
+            return -1
+        col = ((x + 1) * self.nCols - 1) // w
+        row = ((y + 1) * self.nRows - 1) // h
+        return row * self.nCols + col
+
+    def _Font(self, label, rect):
+        """Returns the fitted font for a label, fitting each distinct label once per cell size."""
+        key = (label, rect.width(), rect.height())
+        font = self._dFonts.get(key)
+        if font is None:
+            font = self._dFonts[key] = self.oFitter.FitFont(label, rect.width(), rect.height())
+        return font
+
+    def paintEvent(self, event):
+        """
+        Paints the cells intersecting the update region, one cached face (FACE_CACHE) per cell.
+
+        Args:
+            event (QPaintEvent): The paint event.
+        """
+        w, h = self.width(), self.height()
+        if w <= 0 or h <= 0:
+            return
+        region = event.rect()
+        # Only walk the rows and columns the update rectangle touches
+        col0 = self.CellAt(max(0, region.left()), 0) % self.nCols
+        col1 = self.CellAt(min(w - 1, region.right()), 0) % self.nCols
+        row0 = self.CellAt(0, max(0, region.top())) // self.nCols
+        row1 = self.CellAt(0, min(h - 1, region.bottom())) // self.nCols
+        fDpr = self.devicePixelRatioF()
+        painter = QPainter(self)
+        for row in range(row0, row1 + 1):
+            for col in range(col0, col1 + 1):
+                index = row * self.nCols + col
+                cell = self.vCells[index]
+                rect = self.CellRect(index)
+                label = cell[self.LABEL]
+                nState = (FACE_CACHE.PRESSED if index == self.nPressed else 0) | \
+                         (FACE_CACHE.SELECTED if index in self.vSelected else 0)
+                painter.drawPixmap(rect.topLeft(), FACE_CACHE.Face(cell[self.BG], cell[self.FG], label, self._Font(label, rect),
+                                                                   rect.width(), rect.height(), nState, fDpr))
+        painter.end()
+
+    def resizeEvent(self, event):
+        """
+        Drops the fitted fonts of the old cell sizes; they are refitted on the next paint.
+
+        Args:
+            event (QResizeEvent): The resize event.
+        """
+        super().resizeEvent(event)
+        self._dFonts.clear()
+
+    def mousePressEvent(self, event):
+        super().mousePressEvent(event)
+        if event.button() == Qt.LeftButton and event.modifiers() & Qt.ControlModifier:
+            index = self.CellAt(event.x(), event.y())
+            if index >= 0:
+                self.vSelected ^= {index}  # Selects instead of playing
+                self.update(self.CellRect(index))
+        elif event.button() == Qt.LeftButton and self.nPressed < 0:
+            index = self.CellAt(event.x(), event.y())
+            if index >= 0:
+                cell = self.vCells[index]
+                self.nPressed = index
+                if PROBE.bEnabled:
+                    PROBE.Begin(PROBE.INPUT_TO_MIDI)
+                self.oVoice = tCellVoice(self.oMidiPlayer, cell[self.N_INSTR], cell[self.NOTES], cell[self.PATTERN])
+                self.oVoice.Start()
+                self.update(self.CellRect(index))
+
+    def mouseReleaseEvent(self, event):
+        super().mouseReleaseEvent(event)
+        if event.button() == Qt.LeftButton:
+            self.ReleasePressed()  # Release the cell that was pressed, wherever the pointer is now
+        elif event.button() == Qt.RightButton:
+            index = self.CellAt(event.x(), event.y())
+            if index >= 0:
+                self.openSelectionDialog(index)
+
+    def ReleasePressed(self):
+        """
+        Stops the voice of the held cell, if any, and repaints the cell.
+        """
+        index, self.nPressed = self.nPressed, -1
+        oVoice, self.oVoice = self.oVoice, None
+        if oVoice:
+            oVoice.Stop()
+        if index >= 0:
+            self.update(self.CellRect(index))
+
+    def keyPressEvent(self, event):
+        """
+        Escape turns off every note (tMidiPlayer.Panic()).
+
+        Args:
+            event (QKeyEvent): The key event.
+        """
+        if event.key() == Qt.Key_Escape:
+            self.ReleasePressed()
+            self.oMidiPlayer.Panic()
+        else:
+            super().keyPressEvent(event)
+
+    def hideEvent(self, event):
+        """
+        Releases the held cell; a hidden grid gets no mouse release.
+
+        Args:
+            event (QHideEvent): The hide event.
+        """
+        self.ReleasePressed()
+        super().hideEvent(event)
+
+    def openSelectionDialog(self, index):
+        """
+        Opens the shared tMidiBtnDlg to reassign a cell, or every selected cell if it is one of
+        them; fields left blank keep each cell's own value. A held note is released first; the
+        modal dialog would swallow its mouse release.
+
+        Args:
+            index (int): The row-major cell index.
+        """
+        self.ReleasePressed()
+        vIndices = sorted(self.vSelected) if index in self.vSelected else [index]
+        dialog = tMidiBtnDlg.Shared(self)
+        dialog.SetCells([self.vCells[i][:4] for i in vIndices])
+        if dialog.exec_():
+            region = QRegion()
+            for i in vIndices:
+                tCell = dialog.Merge(self.vCells[i][:4])
+                if tCell != tuple(self.vCells[i][:4]) or i in self.vSelected:
+                    self._SetCell(i, ResolveCell(*tCell))
+                    region += self.CellRect(i)
+            self.vSelected.difference_update(vIndices)
+            if not region.isEmpty():
+                self.update(region)
+
+    @staticmethod
+    def main():
+        """
+        The main method to run a test application for the tMidiPaintGrid class.
+        """
+        app = QApplication(argv)
+        midiPlayer = tMidiPlayer(bThreaded=True)  # Keep MIDI writes off the GUI thread
+        grid = tMidiPaintGrid(midiPlayer, 16, 16)
+        grid.setMinimumSize(100, 100)  # Set a small minimum size
+        grid.resize(1200, 600)
+        grid.show()
+        exit(app.exec_())
+
+
+if __name__ == "__main__":
+    tMidiPaintGrid.main()
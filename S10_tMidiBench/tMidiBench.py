@@ -0,0 +1,351 @@
+"""
+tMidiBench.py
+
+Description:
+    Headless benchmark suite for the MIDI grid. Runs under Qt's offscreen platform and a tNullBackend
+    player, so it needs neither a display nor MIDI hardware. It covers:
+        grid_build   -- tMidiGrid and tMidiPaintGrid construction at several sizes
+        grid_resize  -- scripted resize sweeps through the grid's coalesced font pass
+        font_fit     -- tFontFitter/CalcFontSz across label lengths, cold and memoized
+        btn_update   -- tMidiBtn.Update churn over instruments, notes and colors
+        note_rate    -- tMidiPlayer On/Off messages against a null backend, direct and threaded
+        layout_apply -- ApplyLayout() preset swaps of 128 cells on both grids, excluding the repaint
+        repaint      -- a full repaint of both grids from the shared face cache
+        input        -- bursts of MIDI input fed through tMidiInput to the grid's lights
+        keys         -- a ten-key chord pressed and released from the computer keyboard
+        dialog_open  -- the cell dialog, built fresh each time versus shared
+
+    Each case reports the median time of several repeats in microseconds per operation. Results can
+    be saved as a JSON baseline and later runs checked against it; a case slower than the baseline
+    by more than the tolerance factor (and by more than a microsecond, to ignore timer noise on the
+    fastest cases) is reported as a regression and the exit status is 1. A case the baseline has no
+entry for is reported as MISSING BASELINE and also fails the check: rerun with --save when adding one.
+
+Usage:
+    $ python tMidiBench.py                     # Run and print
+    $ python tMidiBench.py --save              # Run and write baseline.json next to this file
+    $ python tMidiBench.py --check [--tol 2.0] # Run and compare against baseline.json
+    $ python tMidiBench.py --only font_fit     # Run the cases whose name starts with a prefix
+"""
+from os import environ, path
+import sys
+
+environ.setdefault('QT_QPA_PLATFORM', 'offscreen')  # Must be set before the QApplication exists
+
+# The modules import each other by bare name; put the latest stage of each on the path
+_ROOT = path.dirname(path.dirname(path.abspath(__file__)))
+for _sDir in ('S00_Constants', 'S00_Utilities', 'S01_tMidiPlayer', 'S03_tMidiBtnDlg', 'S06_tTxtReSzBtn',
+              'S07_tTMidiBtn(tTxtReSzBtn)', 'S08_tMidiGrid', 'S09_tMidiPaintGrid'):
+    if path.join(_ROOT, _sDir) not in sys.path:
+        sys.path.insert(0, path.join(_ROOT, _sDir))
+
+from argparse import ArgumentParser
+from json import dump, load
+from platform import platform, python_version
+from statistics import median
+from time import perf_counter
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtGui import QKeyEvent
+from PyQt5.QtCore import QEvent, Qt
+
+from tMidiPlayer import tMidiPlayer
+from tMidiBackend import tNullBackend
+from tFontFitter import tFontFitter
+from tFontFitCache import FONT_FIT_CACHE
+from tTxtReSzBtn import tTxtReSzBtn
+from tMidiBtn import tMidiBtn
+from tMidiGrid import tMidiGrid
+from tMidiPaintGrid import tMidiPaintGrid
+from tMidiBtnDlg import tMidiBtnDlg
+from tEventLog import tEventLog
+from tCellVoice import tCellVoice
+from tLayout import tLayout
+from kInstr import INSTR_NAMES, INSTR_NUMS
+from kNote import NOTE_NUMS
+from kNamClr import COLOR_RGBS, COLOR_LIST
+
+BASELINE = path.join(path.dirname(path.abspath(__file__)), 'baseline.json')
+REPEATS = 7
+
+
+def Time(fn, nOps: int, nRepeats: int = REPEATS) -> float:
+    """Return the median microseconds per operation of fn() over nRepeats runs of nOps operations."""
+    vTimes = []
+    for _ in range(nRepeats):
+        fStart = perf_counter()
+        fn()
+        vTimes.append((perf_counter() - fStart) * 1e6 / nOps)
+    return median(vTimes)
+
+
+def NullPlayer(bThreaded: bool = False) -> tMidiPlayer:
+    oPlayer = tMidiPlayer(bThreaded=bThreaded, oBackend=tNullBackend())
+    oPlayer.oLog.SetLevel(tEventLog.OFF)
+    return oPlayer
+
+
+def BenchGridBuild(app) -> dict:
+    dResults = {}
+    oPlayer = NullPlayer()
+    for nRows, nCols in ((2, 4), (4, 8)):
+        class tSizedGrid(tMidiGrid):
+            NUM_ROWS, NUM_COLS = nRows, nCols
+        def Build():
+            oGrid = tSizedGrid(oPlayer)
+            oGrid.deleteLater()
+            app.processEvents()
+        dResults[f'grid_build/buttons/{nRows}x{nCols}'] = Time(Build, 1)
+    for nRows, nCols in ((4, 8), (8, 16), (16, 16)):
+        def Build():
+            oGrid = tMidiPaintGrid(oPlayer, nRows, nCols)
+            oGrid.deleteLater()
+            app.processEvents()
+        dResults[f'grid_build/painted/{nRows}x{nCols}'] = Time(Build, 1)
+    return dResults
+
+
+def BenchGridResize(app) -> dict:
+    dResults = {}
+    vSizes = [(300 + 20 * i, 150 + 10 * i) for i in range(40)]
+    oGrid = tMidiGrid(NullPlayer())
+    oGrid.show()
+    def Sweep():
+        for w, h in vSizes:
+            oGrid.resize(w, h)
+            app.processEvents()      # Layout the buttons at the new size
+            oGrid.updateGridSize()   # The coalesced pass a burst of resize events ends in
+    FONT_FIT_CACHE.Clear()
+    fStart = perf_counter()
+    Sweep()
+    dResults['grid_resize/buttons/cold'] = (perf_counter() - fStart) * 1e6 / len(vSizes)
+    dResults['grid_resize/buttons/warm'] = Time(Sweep, len(vSizes))
+    oGrid.close()
+
+    oPaint = tMidiPaintGrid(NullPlayer(), 16, 16)
+    oPaint.show()
+    def PaintSweep():
+        for w, h in vSizes:
+            oPaint.resize(w, h)
+            oPaint.grab()  # Renders every cell, whether or not the platform exposes the window
+    dResults['grid_resize/painted/16x16'] = Time(PaintSweep, len(vSizes))
+    oPaint.close()
+    return dResults
+
+
+def BenchFontFit(app) -> dict:
+    dResults = {}
+    vSizes = [(40 + 7 * i, 20 + 3 * i) for i in range(50)]
+    for nLen in (4, 16, 40):
+        sTxt = ('Accordion ' * 8)[:nLen] + '\nMiddle_C'
+        oFitter = tFontFitter('Times New Roman', 3, 90, 4)
+        def Cold():
+            FONT_FIT_CACHE.Clear()
+            for w, h in vSizes:
+                oFitter.Fit(sTxt, w, h)
+        def Warm():
+            for w, h in vSizes:
+                oFitter.Fit(sTxt, w, h)
+        dResults[f'font_fit/fitter/cold/len{nLen}'] = Time(Cold, len(vSizes))
+        dResults[f'font_fit/fitter/warm/len{nLen}'] = Time(Warm, len(vSizes))
+        oBtn = tTxtReSzBtn(sTxt, 3, 90, 'Times New Roman', 4)
+        def CalcFontSz():
+            FONT_FIT_CACHE.Clear()
+            for w, h in vSizes:
+                oBtn.resize(w, h)
+                oBtn.CalcFontSz()
+        dResults[f'font_fit/CalcFontSz/len{nLen}'] = Time(CalcFontSz, len(vSizes))
+    return dResults
+
+
+def BenchBtnUpdate(app) -> dict:
+    oBtn = tMidiBtn(NullPlayer(), 'Red', 'Accordion', 'Middle_C')
+    vInstrs, vNotes, vColors = list(INSTR_NUMS)[:16], list(NOTE_NUMS)[:16], list(COLOR_RGBS)[:16]
+    nOps = 2048
+    def Churn():
+        for i in range(nOps):
+            oBtn.Update(vColors[i % 16], vInstrs[(i * 3) % 16], vNotes[(i * 5) % 16])
+    return {'btn_update/Update': Time(Churn, nOps)}
+
+
+def BenchNoteRate(app) -> dict:
+    dResults = {}
+    nNotes = 2000
+    vInstrs = list(INSTR_NUMS.values())
+    for bThreaded in (False, True):
+        oPlayer = NullPlayer(bThreaded)
+        def Play():
+            for i in range(nNotes):
+                nInstr, nNote = vInstrs[i % 4], 48 + i % 24
+                oPlayer.On(nInstr, nNote)
+                oPlayer.Off(nInstr, nNote)
+            if oPlayer.oOutThread:
+                oPlayer.oOutThread.Flush(10.0)
+        sMode = 'threaded' if bThreaded else 'direct'
+        dResults[f'note_rate/{sMode}/on_off_pair'] = Time(Play, nNotes)
+        def PlayChords():
+            for i in range(0, nNotes, 10):
+                oPlayer.BeginBatch()
+                for j in range(10):
+                    oPlayer.On(vInstrs[0], 48 + (i + j) % 24)
+                oPlayer.EndBatch()
+                oPlayer.BeginBatch()
+                for j in range(10):
+                    oPlayer.Off(vInstrs[0], 48 + (i + j) % 24)
+                oPlayer.EndBatch()
+            if oPlayer.oOutThread:
+                oPlayer.oOutThread.Flush(10.0)
+        dResults[f'note_rate/{sMode}/batched_chord10'] = Time(PlayChords, nNotes)
+        def PlayChordCells():  # A Dom7 chord cell pressed and released: two writes per chord
+            for i in range(nNotes // 4):
+                oVoice = tCellVoice(oPlayer, vInstrs[i % 4], (48 + i % 24, 52 + i % 24, 55 + i % 24, 58 + i % 24))
+                oVoice.Start()
+                oVoice.Stop()
+            if oPlayer.oOutThread:
+                oPlayer.oOutThread.Flush(10.0)
+        dResults[f'note_rate/{sMode}/chord_cell4'] = Time(PlayChordCells, nNotes)
+        oPlayer.Close()
+    return dResults
+
+
+def BenchLayoutApply(app) -> dict:
+    dResults = {}
+    oA = tLayout.Default(8, 16)
+    oB = tLayout(8, 16, [(COLOR_LIST[(i * 7) % len(COLOR_LIST)], INSTR_NAMES[i], cell[2])
+                         for i, cell in enumerate(oA.vCells)])
+    vGrids = (('buttons', tMidiGrid(NullPlayer(), oLayout=oA)), ('painted', tMidiPaintGrid(NullPlayer(), oLayout=oA)))
+    for sName, oGrid in vGrids:
+        oGrid.resize(1200, 600)
+        oGrid.show()
+        app.processEvents()
+        def Swap():
+            oGrid.ApplyLayout(oB)
+            oGrid.ApplyLayout(oA)
+        dResults[f'layout_apply/{sName}/8x16'] = Time(Swap, 2)
+        oGrid.close()
+    return dResults
+
+
+def BenchRepaint(app) -> dict:
+    dResults = {}
+    oLayout = tLayout.Default(8, 16)
+    vGrids = (('buttons', tMidiGrid(NullPlayer(), oLayout=oLayout)), ('painted', tMidiPaintGrid(NullPlayer(), oLayout=oLayout)))
+    for sName, oGrid in vGrids:
+        oGrid.resize(1200, 600)
+        oGrid.show()
+        app.processEvents()
+        oGrid.repaint()  # Warm FACE_CACHE
+        dResults[f'repaint/{sName}/8x16'] = Time(oGrid.repaint, 1)
+        oGrid.close()
+    return dResults
+
+
+def BenchInput(app) -> dict:
+    oGrid = tMidiGrid(NullPlayer(), oLayout=tLayout.Default(8, 16))
+    oGrid.resize(1200, 600)
+    oGrid.show()
+    app.processEvents()
+    oInput = oGrid.Listen(oSource=False)
+    nOps = 256
+    vOn = [[[0x90 | (i % 4), 51 + i % 39, 100, 0], i] for i in range(nOps)]
+    vOff = [[[0x80 | (i % 4), 51 + i % 39, 0, 0], i] for i in range(nOps)]
+    def Burst():
+        oInput.Feed(vOn)
+        oGrid.updateInput()
+        oInput.Feed(vOff)
+        oGrid.updateInput()
+    dResults = {'input/8x16/burst': Time(Burst, 2 * nOps)}
+    oGrid.StopListening()
+    oGrid.close()
+    return dResults
+
+
+def BenchKeys(app) -> dict:
+    oGrid = tMidiGrid(NullPlayer(), oLayout=tLayout.Default(4, 10))
+    oGrid.resize(1000, 400)
+    oGrid.show()
+    oGrid.SetKeyboardMode()
+    app.processEvents()
+    vPress = [QKeyEvent(QEvent.KeyPress, ord(c), Qt.NoModifier, c) for c in 'QWERTYUIOP']
+    vRelease = [QKeyEvent(QEvent.KeyRelease, ord(c), Qt.NoModifier, c) for c in 'QWERTYUIOP']
+    def Chord():
+        for e in vPress:
+            oGrid.keyPressEvent(e)
+        for e in vRelease:
+            oGrid.keyReleaseEvent(e)
+    dResults = {'keys/chord10/per_key': Time(Chord, 2 * len(vPress))}
+    oGrid.close()
+    return dResults
+
+
+def BenchDialogOpen(app) -> dict:
+    vCells = [tLayout.Default(1, 16).vCells[i] for i in range(16)]
+    nOps = 64
+    def Fresh():
+        for i in range(nOps):
+            oDlg = tMidiBtnDlg()
+            oDlg.SetCells(vCells[i % 16:i % 16 + 1])
+            oDlg.deleteLater()
+        app.processEvents()
+    def Shared():
+        for i in range(nOps):
+            tMidiBtnDlg.Shared().SetCells(vCells[i % 16:i % 16 + 1])
+    return {'dialog_open/fresh': Time(Fresh, nOps), 'dialog_open/shared': Time(Shared, nOps)}
+
+
+CASES = (('grid_build', BenchGridBuild), ('grid_resize', BenchGridResize), ('font_fit', BenchFontFit),
+         ('btn_update', BenchBtnUpdate), ('note_rate', BenchNoteRate), ('layout_apply', BenchLayoutApply),
+         ('repaint', BenchRepaint), ('input', BenchInput), ('keys', BenchKeys),
+         ('dialog_open', BenchDialogOpen))
+
+
+def Run(sOnly: str = '') -> dict:
+    """Run every case (or those starting with sOnly) and return {case: microseconds per op}."""
+    app = QApplication.instance() or QApplication([])
+    dResults = {}
+    for sName, fn in CASES:
+        if sName.startswith(sOnly) or not sOnly:
+            dResults.update(fn(app))
+    return dResults
+
+
+def Check(dResults: dict, dBaseline: dict, fTol: float, fMinUs: float = 1.0) -> list:
+    """Return lines describing every case slower than fTol times its baseline and by more than fMinUs,
+    and every case missing from the baseline."""
+    vRegressions = []
+    for sCase, fUs in dResults.items():
+        fBase = dBaseline.get(sCase)
+        if not fBase:
+            vRegressions.append(f'MISSING BASELINE {sCase}: {fUs:.2f} us, no baseline to compare with')
+        elif fUs > fBase * fTol and fUs - fBase > fMinUs:
+            vRegressions.append(f'REGRESSION {sCase}: {fUs:.2f} us vs baseline {fBase:.2f} us ({fUs / fBase:.2f}x)')
+    return vRegressions
+
+
+def main():
+    oParser = ArgumentParser(description='Headless MIDI grid benchmarks.')
+    oParser.add_argument('--save', action='store_true', help='write the results as the baseline')
+    oParser.add_argument('--check', action='store_true', help='compare the results with the baseline')
+    oParser.add_argument('--baseline', default=BASELINE, help='baseline file (default: %(default)s)')
+    oParser.add_argument('--tol', type=float, default=2.0, help='slowdown factor counted as a regression')
+    oParser.add_argument('--min-us', type=float, default=1.0, help='ignore slowdowns smaller than this (us)')
+    oParser.add_argument('--only', default='', help='only run cases starting with this prefix')
+    args = oParser.parse_args()
+
+    dResults = Run(args.only)
+    for sCase, fUs in dResults.items():
+        print(f'{sCase:<36}{fUs:>12.2f} us/op')
+    if args.save:
+        with open(args.baseline, 'w') as f:
+            dump({'platform': platform(), 'python': python_version(), 'results': dResults}, f, indent=2)
+        print(f'Saved baseline to {args.baseline}')
+    if args.check:
+        with open(args.baseline) as f:
+            dBaseline = load(f)['results']
+        vRegressions = Check(dResults, dBaseline, args.tol, args.min_us)
+        print('\n'.join(vRegressions) if vRegressions else 'No regressions.')
+        sys.exit(1 if vRegressions else 0)
+
+
+if __name__ == "__main__":
+    main()